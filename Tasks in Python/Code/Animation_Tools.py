@@ -0,0 +1,173 @@
+# Required libraries
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import numpy as np
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Incremental trajectory animation shared by the bouncing-ball and atmosphere renderers.
+# Frames are chosen by simulated time at a target fps rather than one per integrator
+# sample. Each frame only draws the path segment added since the previous frame on top
+# of a cached image of the path so far, so the cost of a frame does not grow with the
+# length of the trajectory. Dashed or dotted paths would restart their pattern at every
+# segment, so they are drawn whole each frame from views of their samples instead.
+class TrailAnimation:
+    def __init__(self, fig, fps=30, speed=1.0):
+        self.fig = fig
+        self.fps = fps
+        self.speed = speed  # Simulated seconds shown per second of animation
+        self.tracks = []
+        self.overlays = []
+
+    # Add a trajectory drawn as a growing line with a marker at its current position
+    def add_track(self, line, point, t, x, y):
+        line.set_animated(True)
+        point.set_animated(True)
+        self.tracks.append({'line': line, 'point': point, 't': np.asarray(t), 'x': np.asarray(x), 'y': np.asarray(y),
+                            'incremental': line.get_linestyle() in ('-', 'solid')})
+
+    # Add an artist redrawn every frame; update(frame_time) sets its state for that frame
+    def add_overlay(self, artist, update):
+        artist.set_animated(True)
+        self.overlays.append((artist, update))
+
+    # Function to calculate the simulated time of every frame and the sample each track shows at it
+    def frame_indices(self):
+        t_end = max(track['t'][-1] for track in self.tracks)
+        frame_times = np.append(np.arange(0, t_end, self.speed / self.fps), t_end)
+        indices = np.array([np.clip(np.searchsorted(track['t'], frame_times, side='right') - 1, 0, len(track['t']) - 1)
+                            for track in self.tracks])
+        return frame_times, indices
+
+    # Number of frames in the animation
+    def __len__(self):
+        return len(self.frame_indices()[0])
+
+    # Generator of RGB frames start..stop as (height, width, 3) views of the canvas buffer
+    # (each view is only valid until the next frame is requested)
+    def frames(self, start=0, stop=None):
+        canvas = self.fig.canvas
+        frame_times, indices = self.frame_indices()
+        stop = len(frame_times) if stop is None else stop
+
+        canvas.draw()  # Static background: animated artists are left out
+        trail = canvas.copy_from_bbox(self.fig.bbox)
+        drawn = [0] * len(self.tracks)  # Last sample of each track already in the trail image
+
+        for frame in range(start, stop):
+            # Extend the cached trail image with only the new segment of each path
+            canvas.restore_region(trail)
+            for k, track in enumerate(self.tracks):
+                i = indices[k, frame]
+                if track['incremental'] and (i > drawn[k] or frame == start):
+                    track['line'].set_data(track['x'][drawn[k]:i + 1], track['y'][drawn[k]:i + 1])
+                    track['line'].axes.draw_artist(track['line'])
+                    drawn[k] = i
+            trail = canvas.copy_from_bbox(self.fig.bbox)
+
+            # Patterned paths, markers and overlays go on top and are not kept in the trail
+            for track, i in zip(self.tracks, indices[:, frame]):
+                if not track['incremental']:
+                    track['line'].set_data(track['x'][:i + 1], track['y'][:i + 1])
+                    track['line'].axes.draw_artist(track['line'])
+                track['point'].set_data([track['x'][i]], [track['y'][i]])
+                track['point'].axes.draw_artist(track['point'])
+            for artist, update in self.overlays:
+                update(frame_times[frame])
+                (artist.axes or self.fig).draw_artist(artist)
+            yield np.asarray(canvas.buffer_rgba())[:, :, :3]
+
+        # Leave the full paths on the figure for any later static redraw
+        for track in self.tracks:
+            track['line'].set_data(track['x'], track['y'])
+
+    # Function to encode frames start..stop with ffmpeg, piping raw RGB frames to its stdin
+    def encode(self, filename, start=0, stop=None, bitrate=1800, metadata=None, codec='h264'):
+        width, height = self.fig.canvas.get_width_height(physical=True)
+        command = [mpl.rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(self.fps), '-i', '-',
+                   '-vcodec', codec, '-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-b:v', f'{bitrate}k']
+        for key, value in (metadata or {}).items():
+            command += ['-metadata', f'{key}={value}']
+        process = subprocess.Popen(command + [filename], stdin=subprocess.PIPE)
+        try:
+            for frame in self.frames(start, stop):
+                process.stdin.write(frame.tobytes())
+        finally:
+            process.stdin.close()
+            if process.wait():
+                raise RuntimeError(f"ffmpeg exited with status {process.returncode} while writing {filename}")
+
+    # Function to save the animation as a video
+    # With more than one process the frame range is split into contiguous segments that are
+    # rasterized with Agg and encoded in worker processes, then joined without re-encoding.
+    # dpi sets the output resolution (defaults to the figure's own dpi).
+    def save(self, filename, bitrate=1800, metadata=None, codec='h264', dpi=None, processes=None):
+        if dpi is not None:
+            self.fig.set_dpi(dpi)
+        processes = processes or os.cpu_count() or 1
+        n_frames = len(self)
+
+        # Workers inherit the figure by forking, so other platforms encode in this process
+        if processes == 1 or n_frames < 2 * processes or 'fork' not in multiprocessing.get_all_start_methods():
+            self.encode(filename, bitrate=bitrate, metadata=metadata, codec=codec)
+            return
+
+        bounds = np.linspace(0, n_frames, processes + 1).astype(int)
+        segment_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(filename)))
+        segments = [os.path.join(segment_dir, f'segment_{i:04d}.mp4') for i in range(processes)]
+        jobs = [(path, start, stop, bitrate, codec) for path, start, stop in zip(segments, bounds[:-1], bounds[1:])]
+        try:
+            encoding['animation'] = self
+            with multiprocessing.get_context('fork').Pool(processes) as pool:
+                pool.map(encode_segment, jobs)
+
+            # Concatenate the segments losslessly with the concat demuxer
+            listing = os.path.join(segment_dir, 'segments.txt')
+            with open(listing, 'w') as f:
+                f.writelines(f"file '{path}'\n" for path in segments)
+            command = [mpl.rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error',
+                       '-f', 'concat', '-safe', '0', '-i', listing, '-c', 'copy']
+            for key, value in (metadata or {}).items():
+                command += ['-metadata', f'{key}={value}']
+            subprocess.run(command + [filename], check=True)
+        finally:
+            encoding.clear()
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+    # Function to play the animation on screen, blitting one frame per timer tick
+    def show(self):
+        playback = {'frames': None, 'frame': 0}
+
+        def restart(event=None):
+            playback['frames'] = self.frames(start=playback['frame'])
+
+        def tick():
+            try:
+                next(playback['frames'])
+            except StopIteration:
+                timer.stop()
+                return
+            playback['frame'] += 1
+            self.fig.canvas.blit(self.fig.bbox)
+
+        timer = self.fig.canvas.new_timer(interval=1000 / self.fps)
+        timer.add_callback(tick)
+        self.fig.canvas.mpl_connect('resize_event', restart)  # The cached trail is invalid after a resize
+        restart()
+        timer.start()
+        plt.show()
+
+# Animation being saved, inherited by the forked encoder processes
+encoding = {}
+
+# Function run in a worker process: rasterize one segment with Agg and encode it
+def encode_segment(job):
+    filename, start, stop, bitrate, codec = job
+    animation = encoding['animation']
+    FigureCanvasAgg(animation.fig)  # Draw on a fresh Agg canvas, whatever backend the parent uses
+    animation.encode(filename, start, stop, bitrate=bitrate, codec=codec)
@@ -1,9 +1,6 @@
 # Required libraries
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from scipy.integrate import solve_ivp
-from matplotlib.animation import FFMpegWriter
+from Atmosphere_Models import ExponentialAtmosphere, as_table
 
 # Constants
 g = 9.81         # Acceleration due to gravity (m/s^2)
@@ -17,6 +14,9 @@ H = 8500         # Scale height for atmospheric density (m)
 def air_density(y):
     return rho_0 * np.exp(-y / H)
 
+# The same atmosphere as a pluggable model (see Atmosphere_Models for layered and tabulated ones)
+STANDARD_ATMOSPHERE = ExponentialAtmosphere(rho_0, H)
+
 # Function to calculate drag force on the projectile
 def drag_force(vx, vy, y):
     v = np.sqrt(vx ** 2 + vy ** 2)  # Magnitude of velocity vector
@@ -26,58 +26,421 @@ def drag_force(vx, vy, y):
 # Equations of motion with drag
 def equations_with_drag(t, z):
     vx, vy, x, y = z  # Decompose state vector
-    D = drag_force(vx, vy, y)  # Calculate drag force
-    ax = -D * vx / np.sqrt(vx ** 2 + vy ** 2)  # Acceleration in x-direction
-    ay = -g - D * vy / np.sqrt(vx ** 2 + vy ** 2)  # Acceleration in y-direction (gravity + drag)
+    v = np.sqrt(vx ** 2 + vy ** 2)  # Speed, computed once per evaluation
+    kv = 0.5 * Cd * A * air_density(y) * v / m  # Drag force per unit mass divided by speed
+    ax = -kv * vx  # Acceleration in x-direction
+    ay = -g - kv * vy  # Acceleration in y-direction (gravity + drag)
     return [ax, ay, vx, vy]  # Return derivatives for ODE solver
 
+# Equations of motion with drag for N trajectories stacked as the columns of a (4, N) state
+# k = Cd * A * rho_0 / (2 * m) and the scale height may be scalars or (N,) arrays. A compiled
+# density table (Atmosphere_Models.DensityTable) replaces the exponential profile when given.
+def equations_with_drag_batch(t, z, k, scale_height=H, table=None):
+    vx, vy, x, y = z  # Each component is an (N,) array
+    density = np.exp(-y / scale_height) if table is None else table(y)  # Density relative to y = 0
+    kv = k * density * np.sqrt(vx ** 2 + vy ** 2)
+    return np.array([-kv * vx, -g - kv * vy, vx, vy])
+
+# Parameters of the forward sensitivities, in the order of the gradient columns (theta in degrees)
+SENSITIVITY_PARAMETERS = ('u', 'theta', 'h', 'Cd', 'rho_0')
+
+# Equations of motion with drag together with their forward sensitivities
+# The (4 + 4 P, N) state stacks the (4, N) state and, for each of P parameters p, its derivative
+# S = dz/dp, which follows dS/dt = J S + df/dk dk/dp along the trajectory, with J the Jacobian of
+# the equations of motion. dk is the (P, N) derivative of the drag constant k with respect to
+# the parameters.
+def sensitivity_equations_batch(t, z, k, dk, scale_height=H, table=None):
+    vx, vy, x, y = z[:4]
+    if table is None:
+        density = np.exp(-y / scale_height)
+        slope = -density / scale_height  # d(density)/dy
+    else:
+        density, slope = table(y), table.derivative(y)
+    v = np.sqrt(vx ** 2 + vy ** 2)
+    inv_v = np.divide(1, v, out=np.zeros_like(v), where=v > 0)  # The drag Jacobian vanishes with the speed
+    kd = k * density
+
+    # Jacobian of the drag acceleration -k density v (vx, vy) with respect to vx, vy and y
+    a_xx = -kd * (v + vx * vx * inv_v)
+    a_xy = -kd * vx * vy * inv_v
+    a_yy = -kd * (v + vy * vy * inv_v)
+    a_xh = -k * slope * v * vx
+    a_yh = -k * slope * v * vy
+
+    S = z[4:].reshape(-1, 4, len(vx))  # (P, 4, N)
+    dS = np.empty_like(S)
+    dS[:, 0] = a_xx * S[:, 0] + a_xy * S[:, 1] + a_xh * S[:, 3] - dk * density * v * vx
+    dS[:, 1] = a_xy * S[:, 0] + a_yy * S[:, 1] + a_yh * S[:, 3] - dk * density * v * vy
+    dS[:, 2] = S[:, 0]
+    dS[:, 3] = S[:, 1]
+    kv = kd * v
+    return np.concatenate([np.array([-kv * vx, -g - kv * vy, vx, vy]), dS.reshape(-1, len(vx))])
+
 # Equations of motion without drag
 def equations_without_drag(t, z):
     vx, vy, x, y = z  # Decompose state vector
     return [0, -g, vx, vy]  # Only gravity affects the projectile
 
-# Function to solve the projectile motion equations
-def solve_projectile(u, theta, h, with_drag=True):
+# Accuracy presets for the ODE solver: tight for plots and reference values, loose for fast sweeps
+ACCURACY_PRESETS = {
+    'tight': {'method': 'DOP853', 'rtol': 1e-10, 'atol': 1e-10},
+    'loose': {'method': 'RK45', 'rtol': 1e-4, 'atol': 1e-6},
+}
+
+# Function to look up the solver options for a preset name (or pass through a dict shaped like the presets)
+def accuracy_options(accuracy):
+    return ACCURACY_PRESETS[accuracy] if isinstance(accuracy, str) else accuracy
+
+# Event function: the projectile hits the ground when y falls through 0
+def hit_ground(t, z):
+    return z[3]
+
+hit_ground.terminal = True  # Stop integrating at impact
+hit_ground.direction = -1   # Only trigger while falling
+
+# Function to solve the projectile motion up to ground impact
+# Returns the exact landing time and range together with the dense-output solution,
+# which can be resampled at any rate without solving again. An atmosphere model (or its
+# compiled table) as profile replaces the exponential density profile.
+def projectile_solution(u, theta, h, with_drag=True, accuracy='tight', t_max=1000, profile=None):
     theta_rad = np.radians(theta)  # Convert angle to radians
     vx0 = u * np.cos(theta_rad)  # Initial velocity in x-direction
     vy0 = u * np.sin(theta_rad)  # Initial velocity in y-direction
     z0 = [vx0, vy0, 0, h]  # Initial state vector [vx, vy, x, y]
-    t_span = (0, 20)  # Time span for the simulation
-    t_eval = np.linspace(0, 20, 2000)  # Time points to evaluate the solution
+    from scipy.integrate import solve_ivp  # Imported here so the rest of the module does not need scipy
+    equations = equations_with_drag if with_drag else equations_without_drag
+    if with_drag and profile is not None:
+        table = as_table(profile)
+        k = 0.5 * Cd * A * table.rho_0 / m  # Drag constant at y = 0 of the model
+        equations = lambda t, z: equations_with_drag_batch(t, z, k, table=table)
 
-    if with_drag:
-        # Solve the equations of motion with drag
-        sol = solve_ivp(equations_with_drag, t_span, z0, t_eval=t_eval)
-    else:
-        # Solve the equations of motion without drag
-        sol = solve_ivp(equations_without_drag, t_span, z0, t_eval=t_eval)
+    sol = solve_ivp(equations, (0, t_max), z0, events=hit_ground, dense_output=True, **accuracy_options(accuracy))
+
+    landed = len(sol.t_events[0]) > 0
+    z_end = sol.y_events[0][0] if landed else sol.y[:, -1]  # State at impact (or at t_max)
+    return {
+        'T': sol.t_events[0][0] if landed else np.nan,  # Time of flight
+        'R': z_end[2] if landed else np.nan,  # Range
+        'v_impact': np.hypot(z_end[0], z_end[1]),  # Speed at impact
+        't_end': sol.t[-1],  # Last time covered by the dense output
+        'sol': sol.sol,  # Dense output: sol(t) -> [vx, vy, x, y]
+        'nfev': sol.nfev,  # Number of right-hand side evaluations
+    }
+
+# Function to resample a solved trajectory at arbitrary times (held at the impact point afterwards)
+def resample(solution, t):
+    z = solution['sol'](np.clip(t, 0, solution['t_end']))
+    return z[2], z[3], z[0], z[1]
+
+# Function to solve the projectile motion equations
+def solve_projectile(u, theta, h, with_drag=True, accuracy='tight', dt=0.01, profile=None):
+    solution = projectile_solution(u, theta, h, with_drag, accuracy, profile=profile)
+    t = np.append(np.arange(0, solution['t_end'], dt), solution['t_end'])  # Samples every dt, ending exactly at impact
+    x, y, vx, vy = resample(solution, t)
 
     # Return time, x and y positions, and velocities in x and y directions
-    return sol.t, sol.y[2], sol.y[3], sol.y[0], sol.y[1]
+    return t, x, y, vx, vy
 
 # Function to determine the time when the projectile hits the x-axis (ground)
 def time_to_reach_x_axis(x, y, t):
-    for i in range(len(y)):
-        if y[i] <= 0:  # If the projectile reaches or goes below the ground
-            return t[i], i  # Return the time and index when it happens
-    return np.nan, len(y) - 1  # Return NaN if it never hits the ground
+    below = np.flatnonzero(y <= 0)  # Samples at or below the ground
+    if len(below) == 0:
+        return np.nan, len(y) - 1  # Return NaN if it never hits the ground
+    return t[below[0]], below[0]  # Return the time and index when it happens
+
+# Dormand-Prince 5(4) tableau used by the batched stepper
+DP_A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+    [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+]
+DP_B = np.array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0])
+DP_E = DP_B - np.array([5179 / 57600, 0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40])
+
+# Function to interpolate (4, n) states inside steps of length dt with cubic Hermite polynomials
+# z0, z1 are the states and f0, f1 their derivatives at the two ends; s in [0, 1] is the fraction of the step
+def hermite_interpolate(z0, z1, f0, f1, dt, s):
+    h00 = (1 + 2 * s) * (1 - s) ** 2
+    h10 = s * (1 - s) ** 2
+    h01 = s ** 2 * (3 - 2 * s)
+    h11 = s ** 2 * (s - 1)
+    return h00 * z0 + h10 * dt * f0 + h01 * z1 + h11 * dt * f1
+
+# Function to find the fraction of each step where one component of the interpolant crosses zero
+# (or the values in offset). Newton's method on the Hermite cubic, started from linear
+# interpolation between the step ends
+def hermite_root(component, z0, z1, f0, f1, dt, iterations=6, offset=0):
+    p0, p1 = z0[component] - offset, z1[component] - offset
+    d0, d1 = dt * f0[component], dt * f1[component]
+    s = p0 / (p0 - p1)
+    for _ in range(iterations):
+        value = (1 + 2 * s) * (1 - s) ** 2 * p0 + s * (1 - s) ** 2 * d0 + s ** 2 * (3 - 2 * s) * p1 + s ** 2 * (s - 1) * d1
+        slope = 6 * s * (s - 1) * (p0 - p1) + (3 * s ** 2 - 4 * s + 1) * d0 + (3 * s ** 2 - 2 * s) * d1
+        s = np.clip(s - np.divide(value, slope, out=np.zeros_like(value), where=slope != 0), 0, 1)
+    return s
+
+# Function to move sensitivities to an event where one component of the state crosses a fixed value
+# S (P, 4, n) are the sensitivities and f (4, n) the derivatives of the state at the event. The event
+# time moves by dt/dp = -S_c / f_c, so the state there moves by S + f dt/dp. Returns both.
+def event_sensitivities(S, f, component):
+    dt = -S[:, component] / f[component]
+    return dt, S + f * dt[:, None]
+
+# Function to solve many drag trajectories at once with one vectorized adaptive stepper
+# u, theta, h and the drag parameters may be scalars or arrays (broadcast together). The
+# sea-level drag constant k = Cd * A * rho_0 / (2 * m) is computed from Cd, A, m and rho_0
+# unless given directly. Results are flat arrays over the broadcast inputs. Every trajectory
+# has its own step size; trajectories drop out of the active set as soon as they land.
+# With x_target the ground is ignored instead: each trajectory runs until it passes
+# x = x_target, and the height and time there are returned as y_target and t_target.
+# Trajectories that fall below y_floor first are given up (y_target stays NaN).
+# An atmosphere model (or its compiled table) as profile replaces the exponential profile
+# of scale height H; rho_0 then defaults to the model's density at y = 0. With an increasing
+# x_grid, the height of every trajectory is also recorded where it passes each grid position
+# (as y_grid, NaN where it stopped short).
+# With sensitivities=True the derivatives of the results with respect to u, theta (per degree),
+# h, Cd and rho_0 are integrated alongside, on the same steps, and returned in 'gradient': one
+# (N, P) array per result, columns in the order of SENSITIVITY_PARAMETERS. A sequence of names
+# from SENSITIVITY_PARAMETERS asks for only those columns (in the order given), which is cheaper.
+# Only the trajectory itself controls the step size, so the results are the same as without
+# them. With k given directly, Cd and rho_0 are taken to be the values it was calculated from.
+def solve_projectile_batch(u, theta, h, with_drag=True, accuracy='tight', Cd=Cd, A=A, m=m, rho_0=None, H=H, k=None, t_max=1000, x_target=None, y_floor=-np.inf, profile=None, x_grid=None, sensitivities=False):
+    table = None if profile is None else as_table(profile)
+    if rho_0 is None:
+        rho_0 = (STANDARD_ATMOSPHERE if table is None else table).rho_0
+    if not with_drag:
+        k = 0.0
+    elif k is None:
+        k = 0.5 * Cd * A * rho_0 / m  # Drag constant at sea level
+    targeting = x_target is not None
+    if not targeting:
+        x_target = np.inf
+    k_slopes = (np.divide(k, Cd), np.divide(k, rho_0)) if sensitivities else (0.0, 0.0)  # dk/dCd and dk/drho_0
+    u, theta, h, k, H, x_target, y_floor, dk_dCd, dk_drho = (np.ravel(a) for a in np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (u, theta, h, k, H, x_target, y_floor) + k_slopes)))
+    N = len(u)
+    rtol = accuracy_options(accuracy)['rtol']
+    atol = accuracy_options(accuracy)['atol']
+
+    theta_rad = np.radians(theta)
+    z = np.stack([u * np.cos(theta_rad), u * np.sin(theta_rad), np.zeros(N), h])  # (4, N) state [vx, vy, x, y]
+    dk = None
+    if sensitivities is True:
+        sensitivities = SENSITIVITY_PARAMETERS
+    if sensitivities:
+        # Initial sensitivities: only the launch velocity depends on u and theta, only the height on h
+        columns = [SENSITIVITY_PARAMETERS.index(name) for name in sensitivities]
+        P = len(columns)
+        S = np.zeros((len(SENSITIVITY_PARAMETERS), 4, N))
+        S[0, 0], S[0, 1] = np.cos(theta_rad), np.sin(theta_rad)
+        S[1, 0], S[1, 1] = -np.radians(z[1]), np.radians(z[0])
+        S[2, 3] = 1
+        z = np.concatenate([z, S[columns].reshape(-1, N)])  # (4 + 4 P, N)
+        dk = np.stack([np.zeros(N), np.zeros(N), np.zeros(N), dk_dCd, dk_drho])[columns]  # (P, N) dk/dp
+
+    # Function to evaluate the equations of motion (with the sensitivities when asked for) of a subset of trajectories
+    def derivatives(z, k, H, dk):
+        if dk is None:
+            return equations_with_drag_batch(0, z, k, H, table)
+        return sensitivity_equations_batch(0, z, k, dk, H, table)
+
+    f = derivatives(z, k, H, dk)  # Derivatives at the current state (first-same-as-last)
+    t = np.zeros(N)
+    dt = np.full(N, 0.01)  # Per-trajectory step size
+
+    result = {
+        'T': np.full(N, np.nan),  # Time of flight
+        'R': np.full(N, np.nan),  # Range
+        'v_impact': np.full(N, np.nan),  # Speed at impact
+        'vx_impact': np.full(N, np.nan),  # Velocity components at impact
+        'vy_impact': np.full(N, np.nan),
+        'apogee': np.where(z[1] > 0, np.nan, h),  # Maximum height (the launch height when fired downwards)
+        'x_apogee': np.where(z[1] > 0, np.nan, 0.0),  # Horizontal position of the apogee
+        'steps': np.zeros(N, dtype=np.int64),  # Accepted steps per trajectory
+    }
+    if targeting:
+        result['y_target'] = np.full(N, np.nan)  # Height when passing x_target
+        result['t_target'] = np.full(N, np.nan)  # Time when passing x_target
+    if x_grid is not None:
+        x_grid = np.asarray(x_grid, dtype=float)
+        result['y_grid'] = np.full((N, len(x_grid)), np.nan)  # Height when passing each grid position
+    if sensitivities:
+        fields = ['y_target', 't_target'] if targeting else ['T', 'R', 'v_impact']
+        gradient = {name: np.full((N, P), np.nan) for name in fields + ['apogee', 'x_apogee']}
+        gradient['apogee'][z[1] <= 0] = [name == 'h' for name in sensitivities]  # The launch height
+        gradient['x_apogee'][z[1] <= 0] = 0
+        result['gradient'] = gradient
+    active = np.flatnonzero(np.all(np.isfinite(z), axis=0))  # Trajectories still in flight (NaN inputs are skipped)
+
+    while len(active):
+        za, fa, dta = z[:, active], f[:, active], dt[active]
+        ka, Ha = k[active], H[active]
+        dka = None if dk is None else dk[:, active]
+
+        # Dormand-Prince stages for all active trajectories at once
+        stages = [fa]
+        for row in DP_A[1:]:
+            zs = za + dta * sum(a * K for a, K in zip(row, stages) if a)
+            stages.append(derivatives(zs, ka, Ha, dka))
+        z_new = za + dta * sum(b * K for b, K in zip(DP_B, stages) if b)
+        err = dta * sum(e * K for e, K in zip(DP_E, stages) if e)
+        scale = atol + rtol * np.maximum(np.abs(za[:4]), np.abs(z_new[:4]))
+        err_norm = np.sqrt(np.mean((err[:4] / scale) ** 2, axis=0))  # The state alone, not its sensitivities
+
+        # Standard step-size control, never growing a rejected step
+        accept = err_norm <= 1
+        with np.errstate(divide='ignore'):
+            factor = np.clip(0.9 * err_norm ** -0.2, 0.2, 5.0)
+        dt[active] = dta * np.where(accept, factor, np.minimum(factor, 1.0))
+
+        idx = active[accept]
+        z0, z1, f0, f1, h_acc = za[:, accept], z_new[:, accept], fa[:, accept], stages[-1][:, accept], dta[accept]
+
+        # Apogee: vertical velocity changes sign inside the step
+        apex = (z0[1] > 0) & (z1[1] <= 0)
+        if np.any(apex):
+            s = hermite_root(1, z0[:, apex], z1[:, apex], f0[:, apex], f1[:, apex], h_acc[apex])
+            z_apex = hermite_interpolate(z0[:, apex], z1[:, apex], f0[:, apex], f1[:, apex], h_acc[apex], s)
+            result['apogee'][idx[apex]] = z_apex[3]
+            result['x_apogee'][idx[apex]] = z_apex[2]
+            if sensitivities:
+                _, dz = event_sensitivities(z_apex[4:].reshape(P, 4, -1), equations_with_drag_batch(0, z_apex[:4], k[idx[apex]], H[idx[apex]], table), 1)
+                gradient['apogee'][idx[apex]] = dz[:, 3].T
+                gradient['x_apogee'][idx[apex]] = dz[:, 2].T
+
+        # Grid: every grid position passed inside the step, several per step when the grid is fine
+        if x_grid is not None:
+            first = np.searchsorted(x_grid, z0[2], side='right')
+            count = np.searchsorted(x_grid, z1[2], side='right') - first
+            j = np.repeat(np.arange(len(idx)), count)  # Step of every crossing
+            if len(j):
+                k_grid = first[j] + np.arange(len(j)) - np.repeat(np.cumsum(count) - count, count)
+                s = hermite_root(2, z0[:, j], z1[:, j], f0[:, j], f1[:, j], h_acc[j], offset=x_grid[k_grid])
+                result['y_grid'][idx[j], k_grid] = hermite_interpolate(z0[:, j], z1[:, j], f0[:, j], f1[:, j], h_acc[j], s)[3]
+
+        # Target: horizontal position passes x_target inside the step
+        if targeting:
+            landed = z1[2] >= x_target[idx]
+            if np.any(landed):
+                s = hermite_root(2, z0[:, landed], z1[:, landed], f0[:, landed], f1[:, landed], h_acc[landed], offset=x_target[idx[landed]])
+                z_hit = hermite_interpolate(z0[:, landed], z1[:, landed], f0[:, landed], f1[:, landed], h_acc[landed], s)
+                result['t_target'][idx[landed]] = t[idx[landed]] + s * h_acc[landed]
+                result['y_target'][idx[landed]] = z_hit[3]
+                if sensitivities:
+                    dt_hit, dz = event_sensitivities(z_hit[4:].reshape(P, 4, -1), equations_with_drag_batch(0, z_hit[:4], k[idx[landed]], H[idx[landed]], table), 2)
+                    gradient['t_target'][idx[landed]] = dt_hit.T
+                    gradient['y_target'][idx[landed]] = dz[:, 3].T
+
+        # Landing: height changes sign inside the step
+        else:
+            landed = z1[3] < 0
+            if np.any(landed):
+                s = hermite_root(3, z0[:, landed], z1[:, landed], f0[:, landed], f1[:, landed], h_acc[landed])
+                z_hit = hermite_interpolate(z0[:, landed], z1[:, landed], f0[:, landed], f1[:, landed], h_acc[landed], s)
+                result['T'][idx[landed]] = t[idx[landed]] + s * h_acc[landed]
+                result['R'][idx[landed]] = z_hit[2]
+                result['v_impact'][idx[landed]] = np.hypot(z_hit[0], z_hit[1])
+                result['vx_impact'][idx[landed]] = z_hit[0]
+                result['vy_impact'][idx[landed]] = z_hit[1]
+                if sensitivities:
+                    dt_hit, dz = event_sensitivities(z_hit[4:].reshape(P, 4, -1), equations_with_drag_batch(0, z_hit[:4], k[idx[landed]], H[idx[landed]], table), 3)
+                    gradient['T'][idx[landed]] = dt_hit.T
+                    gradient['R'][idx[landed]] = dz[:, 2].T
+                    gradient['v_impact'][idx[landed]] = ((z_hit[0] * dz[:, 0] + z_hit[1] * dz[:, 1]) / np.hypot(z_hit[0], z_hit[1])).T
+
+        z[:, idx] = z1
+        f[:, idx] = f1
+        t[idx] += h_acc
+        result['steps'][idx] += 1
+
+        # Drop trajectories that have landed or reached the target (or run out of time) from the active set
+        # Trajectories whose state overflowed (e.g. with a negative drag constant) are given up too
+        done = np.zeros(N, dtype=bool)
+        done[idx[landed]] = True
+        done[active[np.isnan(err_norm)]] = True
+        done |= t >= t_max
+        if targeting:
+            done[idx] |= z1[3] < y_floor[idx]
+        active = active[~done[active]]
+
+    return result
+
+# Function to fit shared parameters to measured landings by Gauss-Newton with forward sensitivities
+# Every shot (u, theta, h, broadcast together) has a measured range R and optionally a flight time
+# T (NaN for shots where it was not measured). The parameters named in fit (from
+# SENSITIVITY_PARAMETERS) are shared by all shots and start from the given values (the mean for
+# u, theta and h); each iteration is one batched solve that returns the residuals and their
+# Jacobian together. A step that does not lower the residual (or makes a shot miss the ground)
+# is halved instead. Stops once the step is below tol relative to the parameters. Returns the
+# fitted values, the root-mean-square residual and the number of solves.
+def fit_parameters(u, theta, h, R, T=None, fit=('Cd',), Cd=Cd, A=A, m=m, rho_0=None, H=H, profile=None, accuracy='tight', tol=1e-10, max_iter=20):
+    if rho_0 is None:
+        rho_0 = (STANDARD_ATMOSPHERE if profile is None else as_table(profile)).rho_0
+    measured = (R,) if T is None else (R, T)
+    u, theta, h, *measured = (np.ravel(a) for a in np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (u, theta, h) + measured)))
+    fields = ('R', 'T')[:len(measured)]
+    measured = np.concatenate(measured)
+    valid = np.isfinite(measured)  # Measurements that were taken
+    values = {'u': u, 'theta': theta, 'h': h, 'Cd': Cd, 'rho_0': rho_0}
+    p = np.array([np.mean(values[name]) for name in fit])
+    p_best, cost_best, step = p, np.inf, np.zeros(len(fit))
+
+    for iteration in range(1, max_iter + 1):
+        values.update(zip(fit, p))
+        result = solve_projectile_batch(values['u'], values['theta'], values['h'], Cd=values['Cd'], A=A, m=m, rho_0=values['rho_0'],
+                                        H=H, profile=profile, accuracy=accuracy, sensitivities=fit)
+        residual = np.concatenate([result[name] for name in fields])[valid] - measured[valid]
+        cost = np.mean(residual ** 2)  # NaN when a shot no longer lands
+        if not cost < cost_best:
+            if not np.isfinite(cost_best):
+                raise ValueError("Not every measured shot lands with the starting parameters.")
+            step = 0.5 * step  # Go back half way towards the best parameters so far
+            p = p_best + step
+            continue
+        p_best, cost_best = p, cost
+
+        J = np.concatenate([result['gradient'][name] for name in fields])[valid]
+        step = np.linalg.lstsq(J, -residual, rcond=None)[0]
+        p = p + step
+        if np.all(np.abs(step) <= tol * np.maximum(np.abs(p), 1)):
+            break
+
+    fitted = dict(zip(fit, p))
+    fitted['rms'] = np.sqrt(cost_best)  # Residual of the best solve
+    fitted['iterations'] = iteration
+    return fitted
+
+# Function to calculate the numbers shown by this extension
+def summary(u=10, theta=45, h=2):
+    sol_drag = projectile_solution(u, theta, h, with_drag=True)
+    sol_no_drag = projectile_solution(u, theta, h, with_drag=False)
+    return {
+        'T_drag': sol_drag['T'], 'R_drag': sol_drag['R'], 'v_impact_drag': sol_drag['v_impact'],
+        'T_no_drag': sol_no_drag['T'], 'R_no_drag': sol_no_drag['R'], 'v_impact_no_drag': sol_no_drag['v_impact'],
+    }
 
 # Function to plot the trajectories with and without drag
-def plot_trajectories():
-    u = 10       # Initial speed (m/s)
-    theta = 45   # Launch angle (degrees)
-    h = 2        # Initial height (m)
-
-    # Solve for trajectory with and without drag
-    t_drag, x_drag, y_drag, vx_drag, vy_drag = solve_projectile(u, theta, h, with_drag=True)
-    t_no_drag, x_no_drag, y_no_drag, vx_no_drag, vy_no_drag = solve_projectile(u, theta, h, with_drag=False)
-    
-    # Determine the time and index when each trajectory hits the ground
-    time_drag, idx_drag = time_to_reach_x_axis(x_drag, y_drag, t_drag)
-    time_no_drag, idx_no_drag = time_to_reach_x_axis(x_no_drag, y_no_drag, t_no_drag)
+def plot_trajectories(u=10, theta=45, h=2, out=None, show=True):
+    import matplotlib.pyplot as plt
+    from Animation_Tools import TrailAnimation
+
+    # Solve for trajectory with and without drag, stopping each at ground impact
+    sol_drag = projectile_solution(u, theta, h, with_drag=True)
+    sol_no_drag = projectile_solution(u, theta, h, with_drag=False)
+
+    # Sample each trajectory every 0.01 s up to its own exact landing time
+    t_drag = np.append(np.arange(0, sol_drag['t_end'], 0.01), sol_drag['t_end'])
+    t_no_drag = np.append(np.arange(0, sol_no_drag['t_end'], 0.01), sol_no_drag['t_end'])
+    x_drag, y_drag, vx_drag, vy_drag = resample(sol_drag, t_drag)
+    x_no_drag, y_no_drag, vx_no_drag, vy_no_drag = resample(sol_no_drag, t_no_drag)
 
-    # The animation will run until the later of the two trajectories hits the ground
-    stop_idx = max(idx_drag, idx_no_drag)
+    # Values shown in the information boxes, computed for every sample at once
+    speed_drag = np.hypot(vx_drag, vy_drag)
+    pressure_drag = drag_force(vx_drag, vy_drag, y_drag)
+    speed_no_drag = np.hypot(vx_no_drag, vy_no_drag)
 
     # Create figure and axes for the animation
     fig, ax = plt.subplots(figsize=(12, 6))
@@ -113,78 +476,34 @@ def plot_trajectories():
     ax.legend()
     ax.grid(True)
 
-    # Variables to store final speed and pressure values
-    final_speed_drag = final_pressure_drag = final_time_drag = 0
-    final_speed_no_drag = final_pressure_no_drag = final_time_no_drag = 0
-
-    # Initialization function for the animation
-    def init():
-        line_drag.set_data([], [])
-        line_no_drag.set_data([], [])
-        point_drag.set_data([], [])
-        point_no_drag.set_data([], [])
-        info_box_drag.set_text('')
-        info_box_no_drag.set_text('')
-        return line_drag, line_no_drag, point_drag, point_no_drag, info_box_drag, info_box_no_drag
-
-    # Animation function that updates the plot at each frame
-    def animate(i):
-        nonlocal final_speed_drag, final_pressure_drag, final_time_drag
-        nonlocal final_speed_no_drag, final_pressure_no_drag, final_time_no_drag
-
-        if i <= stop_idx:
-            # Update trajectory with drag
-            if y_drag[i] >= 0:
-                x_data_drag = x_drag[:i + 1]
-                y_data_drag = y_drag[:i + 1]
-                vx_drag_curr = vx_drag[i]
-                vy_drag_curr = vy_drag[i]
-                final_speed_drag = np.sqrt(vx_drag_curr ** 2 + vy_drag_curr ** 2)
-                final_pressure_drag = drag_force(vx_drag_curr, vy_drag_curr, y_drag[i])
-                final_time_drag = t_drag[i]
-
-                line_drag.set_data(x_data_drag, y_data_drag)
-                point_drag.set_data([x_data_drag[-1]], [y_data_drag[-1]])
-            else:
-                line_drag.set_data(x_drag[:i + 1], y_drag[:i + 1])
-                point_drag.set_data([x_drag[i]], [0])
-
-            # Update trajectory without drag
-            if y_no_drag[i] >= 0:
-                x_data_no_drag = x_no_drag[:i + 1]
-                y_data_no_drag = y_no_drag[:i + 1]
-                vx_no_drag_curr = vx_no_drag[i]
-                vy_no_drag_curr = vy_no_drag[i]
-                final_speed_no_drag = np.sqrt(vx_no_drag_curr ** 2 + vy_no_drag_curr ** 2)
-                final_pressure_no_drag = 0  # No drag force
-                final_time_no_drag = t_no_drag[i]
-
-                line_no_drag.set_data(x_data_no_drag, y_data_no_drag)
-                point_no_drag.set_data([x_data_no_drag[-1]], [y_data_no_drag[-1]])
-            else:
-                line_no_drag.set_data(x_no_drag[:i + 1], y_no_drag[:i + 1])
-                point_no_drag.set_data([x_no_drag[i]], [0])
-
-            # Update the information boxes with current data
-            info_box_drag.set_text(
-                f'With Drag:\nSpeed: {final_speed_drag:.2f} m/s\nPressure: {final_pressure_drag:.2f} N/m²\nTime to x-axis: {final_time_drag:.2f} s'
-            )
-
-            info_box_no_drag.set_text(
-                f'Without Drag:\nSpeed: {final_speed_no_drag:.2f} m/s\nPressure: {final_pressure_no_drag:.2f} N/m²\nTime to x-axis: {final_time_no_drag:.2f} s'
-            )
-
-        return line_drag, line_no_drag, point_drag, point_no_drag, info_box_drag, info_box_no_drag
-
-    # Create the animation
-    ani = animation.FuncAnimation(fig, animate, frames=stop_idx+1, init_func=init, blit=True, interval=50, repeat=False)
+    # Functions to update the information boxes for the sample shown at a given time
+    def update_info_drag(frame_time):
+        i = min(np.searchsorted(t_drag, frame_time, side='right') - 1, len(t_drag) - 1)
+        info_box_drag.set_text(
+            f'With Drag:\nSpeed: {speed_drag[i]:.2f} m/s\nPressure: {pressure_drag[i]:.2f} N/m²\nTime to x-axis: {t_drag[i]:.2f} s'
+        )
+
+    def update_info_no_drag(frame_time):
+        i = min(np.searchsorted(t_no_drag, frame_time, side='right') - 1, len(t_no_drag) - 1)
+        info_box_no_drag.set_text(
+            f'Without Drag:\nSpeed: {speed_no_drag[i]:.2f} m/s\nPressure: 0.00 N/m²\nTime to x-axis: {t_no_drag[i]:.2f} s'
+        )
+
+    # Create the animation: 30 frames per simulated second, drawing only new path segments each frame
+    ani = TrailAnimation(fig, fps=30)
+    ani.add_track(line_drag, point_drag, t_drag, x_drag, y_drag)
+    ani.add_track(line_no_drag, point_no_drag, t_no_drag, x_no_drag, y_no_drag)
+    ani.add_overlay(info_box_drag, update_info_drag)
+    ani.add_overlay(info_box_no_drag, update_info_no_drag)
 
     # Save the animation as a video file
-    writer = FFMpegWriter(fps=30, metadata={'artist': 'Your Name'}, bitrate=1800)
-    ani.save("Atmosphere_Extension.mp4", writer=writer)
+    if out:
+        ani.save(out, bitrate=1800, metadata={'artist': 'Your Name'})
 
-    # Show the plot
-    plt.show()
+    # Show the animation
+    if show:
+        ani.show()
 
-# Call the function to plot the trajectories
-plot_trajectories()
+# Call the function to plot the trajectories (only when run as a script, so the solvers can be imported)
+if __name__ == '__main__':
+    plot_trajectories(out="Atmosphere_Extension.mp4")
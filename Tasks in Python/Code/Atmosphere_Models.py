@@ -0,0 +1,182 @@
+# Required libraries
+import numpy as np
+from abc import ABC, abstractmethod
+
+# Atmosphere models for the drag solvers.
+# Every model gives the air density at a height y (m) above the launch ground. Evaluating a
+# layered or tabulated profile piecewise at every right-hand side call would be slow, so each
+# model compiles into a DensityTable: the density relative to its value at y = 0 sampled on
+# a uniform grid, with per-cell linear or cubic Hermite coefficients. Looking a height up is
+# then an index computation, one gather and a short polynomial, whatever the model.
+
+# Constants of the International Standard Atmosphere
+g0 = 9.80665           # Standard gravity (m/s^2)
+R_air = 287.05287      # Specific gas constant of dry air (J/(kg K))
+T0 = 288.15            # Sea-level temperature (K)
+P0 = 101325.0          # Sea-level pressure (Pa)
+ISA_LAYERS = [         # (base height (m), temperature lapse rate (K/m)) up to the mesopause
+    (0.0, -0.0065),
+    (11000.0, 0.0),
+    (20000.0, 0.001),
+    (32000.0, 0.0028),
+    (47000.0, 0.0),
+    (51000.0, -0.0028),
+    (71000.0, -0.002),
+]
+
+# Density relative to y = 0 on a uniform grid, interpolated linearly or with cubic Hermite polynomials
+# Heights outside [y_min, y_max] are held at the value at the nearest end of the table.
+class DensityTable:
+    def __init__(self, model, y_min=-1000.0, y_max=20000.0, dy=1.0, kind='linear'):
+        if kind not in ('linear', 'cubic'):
+            raise ValueError(f"Unknown interpolation '{kind}' (choose 'linear' or 'cubic')")
+        n_cells = int(np.ceil((y_max - y_min) / dy))
+        y = y_min + dy * np.arange(n_cells + 1)
+        self.rho_0 = float(model.density(0.0))  # Density at y = 0 (kg/m^3), the scale of the table
+        self.y_min = y_min
+        self.y_max = y[-1]
+        self.dy = dy
+        self.kind = kind
+        self.inv_dy = 1 / dy
+        self.offset = 1 - y_min / dy  # Index of y = 0 in units of cells, past the padding cell
+
+        # Coefficients of each cell in the fraction s in [0, 1) of the cell. A constant cell is
+        # added at both ends; indices are clamped into the table, so heights outside it take the
+        # value at its nearest end without any extra clipping of the heights.
+        f = model.density(y) / self.rho_0
+        if kind == 'linear':
+            coefficients = [f[:-1], np.diff(f)]
+        else:
+            # Slopes at the nodes from second-order one-sided differences into each cell,
+            # so kinks of the profile that fall on nodes (layer bases) are kept sharp
+            e = 1e-3 * dy
+            d_right = dy * (-3 * f[:-1] + 4 * model.density(y[:-1] + e) / self.rho_0 - model.density(y[:-1] + 2 * e) / self.rho_0) / (2 * e)
+            d_left = dy * (3 * f[1:] - 4 * model.density(y[1:] - e) / self.rho_0 + model.density(y[1:] - 2 * e) / self.rho_0) / (2 * e)
+            df = np.diff(f)
+            coefficients = [f[:-1], d_right, 3 * df - 2 * d_right - d_left, -2 * df + d_right + d_left]
+        self.coefficients = [np.concatenate([[f[0] if j == 0 else 0.0], c, [f[-1] if j == 0 else 0.0]]) for j, c in enumerate(coefficients)]
+
+    # Density relative to y = 0 at heights y (any shape)
+    def __call__(self, y):
+        u = np.asarray(y, dtype=float) * self.inv_dy + self.offset
+        i = u.astype(np.intp)  # Truncation; heights below the table give indices <= 0, clamped to the padding cell
+        s = u - i
+        c = self.coefficients
+        if self.kind == 'linear':
+            return c[0].take(i, mode='clip') + s * c[1].take(i, mode='clip')
+        return c[0].take(i, mode='clip') + s * (c[1].take(i, mode='clip') + s * (c[2].take(i, mode='clip') + s * c[3].take(i, mode='clip')))
+
+    # Derivative of the relative density with respect to height (1/m) at heights y
+    def derivative(self, y):
+        u = np.asarray(y, dtype=float) * self.inv_dy + self.offset
+        i = u.astype(np.intp)
+        s = u - i
+        c = self.coefficients
+        if self.kind == 'linear':
+            return self.inv_dy * c[1].take(i, mode='clip')
+        return self.inv_dy * (c[1].take(i, mode='clip') + s * (2 * c[2].take(i, mode='clip') + 3 * s * c[3].take(i, mode='clip')))
+
+    # Air density (kg/m^3) at heights y
+    def density(self, y):
+        return self.rho_0 * self(y)
+
+# Shared interface of the atmosphere models: density(y) evaluates the model itself,
+# compile() builds (and remembers) its lookup table. Tables are remembered only while the
+# model's attributes stay the same, so changing e.g. rho_0 or H afterwards compiles afresh.
+class AtmosphereModel(ABC):
+    @abstractmethod
+    def density(self, y):
+        pass
+
+    # Function to capture the model's attributes (everything but its remembered tables)
+    def fingerprint(self):
+        return tuple((name, np.asarray(value).tobytes()) for name, value in sorted(vars(self).items())
+                     if name not in ('tables', 'compiled_fingerprint'))
+
+    def compile(self, y_min=-1000.0, y_max=20000.0, dy=1.0, kind='linear'):
+        fingerprint = self.fingerprint()
+        if self.__dict__.get('compiled_fingerprint') != fingerprint:  # New model, or its attributes changed
+            self.__dict__.update(compiled_fingerprint=fingerprint, tables={})
+        key = (y_min, y_max, dy, kind)
+        if key not in self.tables:
+            self.tables[key] = DensityTable(self, y_min, y_max, dy, kind)
+        return self.tables[key]
+
+# Isothermal atmosphere: rho = rho_0 * exp(-y / H), the model the extension has always used
+class ExponentialAtmosphere(AtmosphereModel):
+    def __init__(self, rho_0=1.225, H=8500.0):
+        self.rho_0 = rho_0  # Density at y = 0 (kg/m^3)
+        self.H = H          # Scale height (m)
+
+    def density(self, y):
+        return self.rho_0 * np.exp(-np.asarray(y, dtype=float) / self.H)
+
+# Layered atmosphere with a constant temperature lapse rate in each layer (ISA by default)
+# Pressure follows hydrostatic balance of an ideal gas through the layers, starting from the
+# temperature T_ground and pressure P_ground at y = 0; y_ground shifts the layers when the
+# launch site is above sea level. Heights below the first layer continue its lapse rate.
+class LayeredAtmosphere(AtmosphereModel):
+    def __init__(self, layers=ISA_LAYERS, T_ground=T0, P_ground=P0, y_ground=0.0):
+        self.y_ground = y_ground
+        self.bases = np.array([base for base, lapse in layers], dtype=float)
+        self.lapse = np.array([lapse for base, lapse in layers], dtype=float)
+
+        # Temperature and pressure at the base of every layer, from the ground conditions
+        # (taken to lie in the first layer) up through the layers
+        self.T_base = np.empty(len(layers))
+        self.P_base = np.empty(len(layers))
+        self.T_base[0], self.P_base[0] = self.layer_state(T_ground, P_ground, self.lapse[0], self.bases[0] - y_ground)
+        for j in range(1, len(layers)):
+            self.T_base[j], self.P_base[j] = self.layer_state(self.T_base[j - 1], self.P_base[j - 1], self.lapse[j - 1], self.bases[j] - self.bases[j - 1])
+
+    # Function to carry temperature and pressure a height dz through a layer with the given lapse rate
+    @staticmethod
+    def layer_state(T, P, lapse, dz):
+        T_top = T + lapse * dz
+        if lapse == 0:
+            return T_top, P * np.exp(-g0 * dz / (R_air * T))
+        return T_top, P * (T_top / T) ** (-g0 / (R_air * lapse))
+
+    # Temperature (K) and pressure (Pa) at heights y
+    def state(self, y):
+        altitude = np.asarray(y, dtype=float) + self.y_ground
+        j = np.clip(np.searchsorted(self.bases, altitude, side='right') - 1, 0, len(self.bases) - 1)
+        dz = altitude - self.bases[j]
+        lapse, T_b, P_b = self.lapse[j], self.T_base[j], self.P_base[j]
+        T = T_b + lapse * dz
+        safe_lapse = np.where(lapse == 0, 1.0, lapse)
+        P = np.where(lapse == 0, P_b * np.exp(-g0 * dz / (R_air * T_b)), P_b * (T / T_b) ** (-g0 / (R_air * safe_lapse)))
+        return T, P
+
+    def density(self, y):
+        T, P = self.state(y)
+        return P / (R_air * T)
+
+# Atmosphere tabulated at measured heights, e.g. from a radiosonde sounding
+# Give the density directly or the temperature (K) and pressure (Pa) it follows from. The
+# logarithm of the density is interpolated linearly between the heights and extrapolated
+# from the end segments, which is exact for an isothermal layer.
+class TabulatedAtmosphere(AtmosphereModel):
+    def __init__(self, heights, density=None, temperature=None, pressure=None):
+        heights = np.asarray(heights, dtype=float)
+        if density is None:
+            if temperature is None or pressure is None:
+                raise ValueError("A sounding needs the density or both the temperature and the pressure")
+            density = np.asarray(pressure, dtype=float) / (R_air * np.asarray(temperature, dtype=float))
+        density = np.asarray(density, dtype=float)
+        if len(heights) < 2 or len(heights) != len(density):
+            raise ValueError("A sounding needs at least two heights, each with one density")
+        if np.any(np.diff(heights) <= 0) or np.any(density <= 0):
+            raise ValueError("Sounding heights must increase and densities must be positive")
+        self.heights = heights
+        self.log_density = np.log(density)
+
+    def density(self, y):
+        y = np.asarray(y, dtype=float)
+        j = np.clip(np.searchsorted(self.heights, y, side='right') - 1, 0, len(self.heights) - 2)
+        slope = (self.log_density[j + 1] - self.log_density[j]) / (self.heights[j + 1] - self.heights[j])
+        return np.exp(self.log_density[j] + slope * (y - self.heights[j]))
+
+# Function to turn an atmosphere model (or a compiled table) into a lookup table
+def as_table(profile):
+    return profile if isinstance(profile, DensityTable) else profile.compile()
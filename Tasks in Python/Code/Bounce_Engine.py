@@ -0,0 +1,419 @@
+# Required libraries
+import numpy as np
+from Terrain import NUDGE, reflect
+
+# Bounce engines for balls bouncing on flat ground.
+# Without drag every arc between impacts is an exact parabola, so the engine jumps
+# from one impact to the next in closed form and only samples positions when asked to.
+# Linear drag also has closed-form arcs (Linear_Drag), so it uses the same event approach.
+# With quadratic drag many balls are integrated together with RK4 on (K, 4) state arrays.
+# Over piecewise-linear terrain (Terrain) the drag-free arcs are still exact parabolas whose
+# impacts are found by the terrain's segment index, and the RK4 steps are cast against it.
+
+# Function to compute every arc of a drag-free bouncing ball in closed form
+def bounce_events(x0, y0, vx0, vy0, g, e, N_bounces):
+    if N_bounces < 1:
+        raise ValueError("N_bounces must be at least 1 (the first arc ends with the first impact)")
+
+    # Arc 0 starts from the launch point; every later arc starts on the ground
+    v_impact0 = np.sqrt(vy0 ** 2 + 2 * g * y0)  # Vertical speed at the first impact
+    T0 = (vy0 + v_impact0) / g  # Duration of the first arc
+
+    # Arc k >= 1 leaves the ground with vertical speed e**k * v_impact0 and lasts 2 * that / g
+    k = np.arange(1, N_bounces)
+    vy_launch = v_impact0 * e ** k.astype(float)
+    durations = np.concatenate(([T0], 2 * vy_launch / g))
+
+    # Impact times are the running sum of the arc durations
+    t_hit = np.cumsum(durations)
+    t_start = np.concatenate(([0.0], t_hit[:-1]))
+
+    # Zeno accumulation point: the arc durations form a geometric series with ratio e
+    if e < 1:
+        t_inf = T0 + 2 * e * v_impact0 / (g * (1 - e))
+    else:
+        t_inf = np.inf
+
+    return {
+        't_start': t_start,  # Start time of each arc
+        't_hit': t_hit,  # Impact time ending each arc
+        'x_hit': x0 + vx0 * t_hit,  # Horizontal position of each impact
+        'y_start': np.concatenate(([float(y0)], np.zeros(N_bounces - 1))),  # Height at the start of each arc
+        'vy_start': np.concatenate(([float(vy0)], vy_launch)),  # Vertical velocity at the start of each arc
+        'x0': x0,
+        'vx0': vx0,
+        'g': g,
+        't_inf': t_inf,  # Time at which infinitely many bounces have happened
+        'x_inf': x0 + vx0 * t_inf,  # Distance travelled by then
+    }
+
+# Function to sample the bouncing ball on an arbitrary time grid
+def sample_bounces(events, t):
+    t = np.asarray(t, dtype=float)
+    k = np.clip(np.searchsorted(events['t_start'], t, side='right') - 1, 0, len(events['t_start']) - 1)  # Arc index of every sample
+    tau = t - events['t_start'][k]  # Time since the start of that arc
+    x = events['x0'] + events['vx0'] * t
+    y = events['y_start'][k] + events['vy_start'][k] * tau - 0.5 * events['g'] * tau ** 2
+    y[t >= events['t_hit'][-1]] = 0  # After the final impact the ball stays on the ground
+    return x, np.maximum(y, 0)
+
+# Function to compute every arc of a bouncing ball with linear drag (a = -b v - g) in closed form
+# Each arc is exact; the ball leaves every impact with its vertical velocity reversed and
+# scaled by e and its horizontal velocity kept. With b = 0 the arcs are those of bounce_events.
+def linear_bounce_events(x0, y0, vx0, vy0, g, e, b, N_bounces):
+    from Linear_Drag import linear_landing_time, relaxation  # Imported here so the other engines do not load the atmosphere model
+    if N_bounces < 1:
+        raise ValueError("N_bounces must be at least 1 (the first arc ends with the first impact)")
+    start = np.empty((4, N_bounces))  # x, y, vx, vy at the start of each arc
+    t_hit = np.empty(N_bounces)
+    x_hit = np.empty(N_bounces)
+    v_hit = np.empty(N_bounces)
+    t, state = 0.0, (float(x0), float(y0), float(vx0), float(vy0))
+    for k in range(N_bounces):
+        x, y, vx, vy = state
+        start[:, k] = state
+        T = linear_landing_time(vy, y, b, g)
+        D, decay = relaxation(b, T), np.exp(-b * T)
+        t_hit[k] = t + T
+        x_hit[k] = x + vx * D
+        v_hit[k] = np.hypot(vx * decay, vy * decay - g * D)
+        t, state = t_hit[k], (x_hit[k], 0.0, vx * decay, -e * (vy * decay - g * D))
+    return {
+        't_start': np.concatenate(([0.0], t_hit[:-1])),  # Start time of each arc
+        't_hit': t_hit,  # Impact time ending each arc
+        'x_hit': x_hit,  # Horizontal position of each impact
+        'v_hit': v_hit,  # Speed just before each impact
+        'x_start': start[0], 'y_start': start[1], 'vx_start': start[2], 'vy_start': start[3],
+        'b': b,
+        'g': g,
+    }
+
+# Function to sample a bouncing ball with linear drag on an arbitrary time grid
+def sample_linear_bounces(events, t):
+    from Linear_Drag import relaxation, relaxation_fall
+    t = np.minimum(np.asarray(t, dtype=float), events['t_hit'][-1])  # After the final impact the ball stays there
+    k = np.clip(np.searchsorted(events['t_start'], t, side='right') - 1, 0, len(events['t_start']) - 1)
+    tau = t - events['t_start'][k]
+    D = relaxation(events['b'], tau)
+    x = events['x_start'][k] + events['vx_start'][k] * D
+    y = events['y_start'][k] + events['vy_start'][k] * D - events['g'] * relaxation_fall(events['b'], tau)
+    return x, np.maximum(y, 0)
+
+# Function to compute every arc of a drag-free bouncing ball over terrain (Terrain.Terrain)
+# Each arc is an exact parabola; its impact is the earliest crossing of a terrain segment, where
+# the ball leaves with its velocity along the surface normal reversed and scaled by e and its
+# velocity along the surface kept. Stops early if an arc never meets the terrain.
+def terrain_bounce_events(x0, y0, vx0, vy0, g, e, N_bounces, terrain):
+    if N_bounces < 1:
+        raise ValueError("N_bounces must be at least 1 (the first arc ends with the first impact)")
+    start = np.empty((4, N_bounces))  # x, y, vx, vy at the start of each arc
+    t_hit = np.empty(N_bounces)
+    point = np.empty((N_bounces, 2))  # Impact points
+    normal = np.empty((N_bounces, 2))  # Surface normals at the impacts, facing the ball
+    v_hit = np.empty(N_bounces)
+    t, state = 0.0, np.array([x0, y0, vx0, vy0], dtype=float)
+    n = N_bounces
+    for k in range(N_bounces):
+        start[:, k] = state
+        hit = terrain.cast_parabola(state[None, :2], state[None, 2:], g)
+        if not hit['hit'][0]:
+            n = k
+            break
+        T = hit['t'][0]
+        v = state[2:] - np.array([0, g * T])  # Velocity just before the impact
+        t_hit[k], point[k], normal[k], v_hit[k] = t + T, hit['point'][0], hit['normal'][0], np.hypot(v[0], v[1])
+        t, state = t_hit[k], np.concatenate([point[k] + NUDGE * normal[k], reflect(v[None], normal[k][None], e)[0]])
+    return {
+        't_start': np.concatenate(([0.0], t_hit[:n - 1])),  # Start time of each arc
+        't_hit': t_hit[:n],  # Impact time ending each arc
+        'x_hit': point[:n, 0],  # Position of each impact
+        'y_hit': point[:n, 1],
+        'normal': normal[:n],  # Surface normal at each impact
+        'v_hit': v_hit[:n],  # Speed just before each impact
+        'x_start': start[0, :n], 'y_start': start[1, :n], 'vx_start': start[2, :n], 'vy_start': start[3, :n],
+        'g': g,
+    }
+
+# Function to sample a drag-free bouncing ball over terrain on an arbitrary time grid
+def sample_terrain_bounces(events, t):
+    t = np.minimum(np.asarray(t, dtype=float), events['t_hit'][-1])  # After the final impact the ball stays there
+    k = np.clip(np.searchsorted(events['t_start'], t, side='right') - 1, 0, len(events['t_start']) - 1)
+    tau = t - events['t_start'][k]
+    x = events['x_start'][k] + events['vx_start'][k] * tau
+    y = events['y_start'][k] + events['vy_start'][k] * tau - 0.5 * events['g'] * tau ** 2
+    return x, y
+
+# Function to build a uniform time grid that ends exactly on the final impact
+def bounce_time_grid(events, dt):
+    t_end = events['t_hit'][-1]
+    return np.append(np.arange(0, t_end, dt), t_end)
+
+# Function to calculate the time derivative of a (K, 4) state [x, y, vx, vy] under quadratic drag
+def drag_derivatives(state, g, c):
+    vx = state[:, 2]
+    vy = state[:, 3]
+    cv = c * np.sqrt(vx ** 2 + vy ** 2)  # Drag per unit velocity, computed once per ball
+    deriv = np.empty_like(state)
+    deriv[:, 0] = vx
+    deriv[:, 1] = vy
+    deriv[:, 2] = -cv * vx
+    deriv[:, 3] = -g - cv * vy
+    return deriv
+
+# Function to advance a (K, 4) state by one classical RK4 step (dt may be a scalar or a (K,) array)
+def rk4_step(state, dt, g, c):
+    dt = np.reshape(dt, (-1, 1)) if np.ndim(dt) else dt
+    k1 = drag_derivatives(state, g, c)
+    k2 = drag_derivatives(state + 0.5 * dt * k1, g, c)
+    k3 = drag_derivatives(state + 0.5 * dt * k2, g, c)
+    k4 = drag_derivatives(state + dt * k3, g, c)
+    return state + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+# Function to bounce balls that reached flat ground (y = 0) and finish their step from there
+# impact holds the (n, 4) states at the impacts, remaining the time left in the step (n,),
+# balls their indices and t_end the time at the end of the step. A ball that comes down again
+# before the step ends bounces again inside it, at the root of the parabola through its launch
+# from the ground and its height at the end of the step, so slow or weakly bouncing balls
+# neither lose impacts nor gain extra ones. Impacts are added to events and counted in
+# bounces; balls that use up their bounces stay at their last impact. Returns the end states.
+def ground_bounces(impact, remaining, balls, t_end, bounces, events, g, e, c, N_bounces):
+    impact, remaining = impact.copy(), remaining.copy()
+    end = np.empty_like(impact)
+    rows = np.arange(len(balls))  # Balls still bouncing inside the step
+    while len(rows):
+        idx = balls[rows]
+        events.append((idx, bounces[idx].copy(), t_end - remaining[rows], impact[rows, 0], impact[rows, 1], np.hypot(impact[rows, 2], impact[rows, 3])))
+        bounces[idx] += 1
+        finished = bounces[idx] >= N_bounces
+
+        # Send the ball up with its vertical speed reduced by e, then finish the step from the ground
+        # (upwards even when the interpolated impact of a ball that grazed the ground moves up)
+        impact[rows, 1] = 0
+        impact[rows, 3] = e[idx] * np.abs(impact[rows, 3])
+        rest = rk4_step(impact[rows], remaining[rows], g, c[idx])
+        end[rows] = np.where(finished[:, None], impact[rows], rest)
+
+        # Time to come down again: root of vy t + a t ** 2 through the height y at the end of the step
+        again = ~finished & (rest[:, 1] < 0)
+        T, vy, y = remaining[rows[again]], impact[rows[again], 3], rest[again, 1]
+        tau = vy * T ** 2 / (vy * T - y)
+        impact[rows[again]] = rk4_step(impact[rows[again]], tau, g, c[idx[again]])
+        remaining[rows[again]] = T - tau
+        rows = rows[again]
+    return end
+
+# Function to simulate K bouncing balls with quadratic drag in lockstep, as a stream of chunks
+# x0, y0, vx0, vy0, e and c may be scalars or (K,) arrays. Balls that have used up their
+# bounces are masked out and stay where they landed. Each chunk holds the times t (n,) and
+# the states x, y, vx, vy (n, K) of up to chunk_size consecutive steps (the first chunk starts
+# with the launch state), plus the impacts of those steps as arrays of ball index, bounce
+# number, time, position and speed. Every chunk is a fresh array, so memory stays flat as
+# long as the consumer drops the chunks it has used. With record=False no history is kept at
+# all: each chunk holds only the state after its last step (n = 1). On flat ground every
+# impact inside a step is resolved (see ground_bounces). With a terrain (Terrain.Terrain) every
+# step is cast against its segments instead of y = 0, all balls in one batched query, and the
+# velocity is reflected along the surface normal; when the rest of a step after an impact
+# would cross the terrain again, the ball waits at the impact point for the next step.
+def stream_drag_bounces(x0, y0, vx0, vy0, g, e, c, N_bounces, dt=0.01, chunk_size=1024, t_max=1000.0, terrain=None, record=True):
+    x0, y0, vx0, vy0, e, c = np.broadcast_arrays(*(np.atleast_1d(np.asarray(a, dtype=float)) for a in (x0, y0, vx0, vy0, e, c)))
+    K = len(x0)
+    state = np.stack([x0, y0, vx0, vy0], axis=1)  # (K, 4) state of every ball
+    bounces = np.zeros(K, dtype=np.int64)  # Bounces used so far by each ball
+    active = np.arange(K)  # Indices of balls still in flight
+
+    if record:
+        buf = np.empty((chunk_size, K, 4))
+        buf[0] = state
+    row = 1
+    n_steps = 0
+    start = 0  # Step index of the first row of the chunk
+    events = []
+
+    while len(active) and n_steps * dt < t_max:
+        n_steps += 1
+        old = state[active]
+        new = rk4_step(old, dt, g, c[active])
+
+        # Interpolate the impact inside the step for balls that crossed the ground
+        if terrain is None:
+            hit = new[:, 1] < 0
+        else:
+            crossing = terrain.cast(old[:, :2], new[:, :2])
+            hit = crossing['hit']
+        if np.any(hit):
+            idx = active[hit]
+            if terrain is None:
+                frac = old[hit, 1] / (old[hit, 1] - new[hit, 1])  # Fraction of the step taken before impact
+            else:
+                frac = crossing['s'][hit]
+            impact = old[hit] + frac[:, None] * (new[hit] - old[hit])
+            if terrain is None:
+                new[hit] = ground_bounces(impact, (1 - frac) * dt, idx, n_steps * dt, bounces, events, g, e, c, N_bounces)
+            else:
+                events.append((idx, bounces[idx].copy(), (n_steps - 1 + frac) * dt, impact[:, 0], impact[:, 1], np.hypot(impact[:, 2], impact[:, 3])))
+                bounces[idx] += 1
+                finished = bounces[idx] >= N_bounces
+
+                # Reverse and reduce the velocity along the surface normal, then finish the step from the surface
+                normal = crossing['normal'][hit]
+                impact[:, :2] = crossing['point'][hit] + NUDGE * normal
+                impact[:, 2:] = reflect(impact[:, 2:], normal, e[idx])
+                rest = rk4_step(impact, (1 - frac) * dt, g, c[idx])
+                again = terrain.cast(impact[:, :2], rest[:, :2])['hit']
+                rest[again] = impact[again]
+                new[hit] = np.where(finished[:, None], impact, rest)
+
+        state[active] = new
+        active = active[bounces[active] < N_bounces]  # Mask out balls that have used up their bounces
+
+        # Hand over a full chunk and start a fresh buffer (only the current state without history)
+        if row == chunk_size:
+            if record:
+                yield chunk_record(buf, row, start, dt, events)
+                buf = np.empty((chunk_size, K, 4))
+            else:
+                yield chunk_record(state[None].copy(), 1, n_steps, dt, events)
+            start += row
+            row = 0
+            events = []
+        if record:
+            buf[row] = state
+        row += 1
+
+    if record:
+        yield chunk_record(buf, row, start, dt, events)
+    else:
+        yield chunk_record(state[None].copy(), 1, n_steps, dt, events)
+
+# Function to package rows 0..n of a (chunk, K, 4) state buffer and its impacts as a stream chunk
+def chunk_record(buf, n, start, dt, events):
+    names = ('ball', 'bounce', 't', 'x', 'y', 'speed')
+    if events:
+        impacts = {name: np.concatenate(values) for name, values in zip(names, zip(*events))}
+    else:
+        impacts = {name: np.zeros(0, dtype=np.int64 if name in ('ball', 'bounce') else float) for name in names}
+    return {
+        't': (start + np.arange(n)) * dt,
+        'x': buf[:n, :, 0],
+        'y': buf[:n, :, 1],
+        'vx': buf[:n, :, 2],
+        'vy': buf[:n, :, 3],
+        'events': impacts,
+    }
+
+# Function to simulate K bouncing balls with quadratic drag in lockstep
+# Collects stream_drag_bounces. Positions and velocities are recorded every dt (pass
+# record=False to keep only the impacts and the final state).
+def simulate_drag_bounces(x0, y0, vx0, vy0, g, e, c, N_bounces, dt=0.01, chunk_size=1024, record=True, t_max=1000.0, terrain=None):
+    K = len(np.broadcast_arrays(*(np.atleast_1d(a) for a in (x0, y0, vx0, vy0, e, c)))[0])
+    bounces = np.zeros(K, dtype=np.int64)
+    t_impact = np.full((K, N_bounces), np.nan)  # Time of every impact
+    x_impact = np.full((K, N_bounces), np.nan)  # Horizontal position of every impact
+    y_impact = np.full((K, N_bounces), np.nan)  # Height of every impact (0 on flat ground)
+    chunks = []
+
+    for chunk in stream_drag_bounces(x0, y0, vx0, vy0, g, e, c, N_bounces, dt, chunk_size, t_max, terrain, record):
+        impacts = chunk['events']
+        t_impact[impacts['ball'], impacts['bounce']] = impacts['t']
+        x_impact[impacts['ball'], impacts['bounce']] = impacts['x']
+        y_impact[impacts['ball'], impacts['bounce']] = impacts['y']
+        np.add.at(bounces, impacts['ball'], 1)
+        if record:
+            chunks.append(chunk)
+    state = np.stack([chunk[name][-1] for name in ('x', 'y', 'vx', 'vy')], axis=1)  # The last row is the final state
+
+    result = {
+        'bounces': bounces,  # Number of impacts each ball made
+        't_impact': t_impact,  # (K, N_bounces) impact times
+        'x_impact': x_impact,  # (K, N_bounces) impact positions
+        'y_impact': y_impact,  # (K, N_bounces) impact heights
+        'state': state,  # Final (K, 4) state
+    }
+    if record:
+        result['t'] = np.concatenate([chunk['t'] for chunk in chunks])
+        for name in ('x', 'y', 'vx', 'vy'):
+            result[name] = np.concatenate([chunk[name] for chunk in chunks])  # (steps + 1, K) samples
+    return result
+
+# Function to stream a drag-free bouncing ball sampled every dt, in the chunk format of stream_drag_bounces
+# The arcs come from bounce_events; only one chunk of samples exists at a time. x, y, vx and vy are (n,) arrays.
+def stream_bounces(events, dt, chunk_size=1024):
+    t_end = events['t_hit'][-1]
+    n_total = len(np.arange(0, t_end, dt)) + 1  # Uniform samples plus the final impact, as in bounce_time_grid
+    for start in range(0, n_total, chunk_size):
+        n = np.arange(start, min(start + chunk_size, n_total))
+        t = n * dt
+        t[n == n_total - 1] = t_end
+        x, y = sample_bounces(events, t)
+        k = np.clip(np.searchsorted(events['t_start'], t, side='right') - 1, 0, len(events['t_start']) - 1)
+        vy = np.where(t >= t_end, 0.0, events['vy_start'][k] - events['g'] * (t - events['t_start'][k]))
+
+        # Impacts after the previous chunk, up to and including the last sample of this one
+        previous = (start - 1) * dt if start else -np.inf
+        hits = np.flatnonzero((events['t_hit'] > previous) & (events['t_hit'] <= t[-1]))
+        speed = np.hypot(events['vx0'], events['vy_start'][hits] - events['g'] * (events['t_hit'][hits] - events['t_start'][hits]))
+        yield {
+            't': t, 'x': x, 'y': y, 'vx': np.full(len(t), float(events['vx0'])), 'vy': vy,
+            'events': {'ball': np.zeros(len(hits), dtype=np.int64), 'bounce': hits, 't': events['t_hit'][hits],
+                       'x': events['x_hit'][hits], 'y': np.zeros(len(hits)), 'speed': speed},
+        }
+
+# Function to keep every n-th sample of a stream (counted across chunk boundaries); impacts pass through
+def decimate(chunks, every):
+    position = 0
+    for chunk in chunks:
+        n = len(chunk['t'])
+        keep = np.arange(-position % every, n, every)
+        position += n
+        yield {name: (value if name == 'events' else value[keep]) for name, value in chunk.items()}
+
+# Function to resample a stream at the frame times of an animation (fps frames per simulated second / speed)
+# Each frame takes the last sample at or before its time, so only one sample per frame is kept;
+# the result feeds Animation_Tools.TrailAnimation.add_track. column picks the ball of a multi-ball stream.
+def animation_samples(chunks, fps=30, speed=1.0, column=0):
+    frame_dt = speed / fps
+    kept = []
+    frame = 0  # Index of the next frame
+    previous = None  # Last sample of the previous chunk, for frames that fall between chunks
+    for chunk in chunks:
+        t, x, y = (chunk[name] if chunk[name].ndim == 1 else chunk[name][:, column] for name in ('t', 'x', 'y'))
+        if previous is not None:
+            t, x, y = (np.append(p, v) for p, v in zip(previous, (t, x, y)))
+        frame_times = np.arange(frame, np.floor(t[-1] / frame_dt) + 1) * frame_dt
+        i = np.maximum(np.searchsorted(t, frame_times, side='right') - 1, 0)
+        kept.append((frame_times, x[i], y[i]))
+        frame += len(frame_times)
+        previous = (t[-1], x[-1], y[-1])
+
+    # End on the final sample, like the time grids of the bounce engines (no frames for an empty stream)
+    if previous is None:
+        return np.empty(0), np.empty(0), np.empty(0)
+    if previous[0] > frame_dt * (frame - 1):
+        kept.append(tuple(np.array([v]) for v in previous))
+    return tuple(np.concatenate(columns) for columns in zip(*kept))
+
+# Function to reduce a stream to running statistics without keeping any samples
+# Per ball: final position, highest point, top speed and number of impacts, plus the sample count and final time.
+def stream_statistics(chunks):
+    stats = None
+    for chunk in chunks:
+        n = len(chunk['t'])
+        x, y, vx, vy = (chunk[name].reshape(n, -1) for name in ('x', 'y', 'vx', 'vy'))  # (n, K), also for one ball
+        if stats is None:
+            K = x.shape[1]
+            stats = {'samples': 0, 't_end': 0.0, 'x_end': np.zeros(K), 'y_max': np.full(K, -np.inf),
+                     'speed_max': np.zeros(K), 'bounces': np.zeros(K, dtype=np.int64)}
+        stats['samples'] += n
+        stats['t_end'] = chunk['t'][-1]
+        stats['x_end'] = x[-1].copy()
+        stats['y_max'] = np.maximum(stats['y_max'], y.max(axis=0))
+        stats['speed_max'] = np.maximum(stats['speed_max'], np.hypot(vx, vy).max(axis=0))
+        np.add.at(stats['bounces'], chunk['events']['ball'], 1)
+    return stats
+
+# Function to write one ball of a stream into a Trajectory_Store.TrajectoryWriter as a single trajectory
+def write_stream(chunks, writer, params, ball=0):
+    for chunk in chunks:
+        columns = [chunk[name] if chunk[name].ndim == 1 else chunk[name][:, ball] for name in ('x', 'y', 'vx', 'vy')]
+        writer.extend(chunk['t'], *columns)
+    writer.finish(params)
@@ -0,0 +1,248 @@
+# Kernel-level speed benchmarks with scaling curves and regression baselines, e.g.
+#     python Kernel_Benchmarks.py --save baseline.json
+#     python Kernel_Benchmarks.py --baseline baseline.json --threshold 0.25
+# Every kernel is timed over increasing problem sizes; the scaling exponent is the slope of
+# log(time) against log(size) and the throughput is measured at the largest size. Nothing
+# is plotted, so the harness runs without a display (and without matplotlib).
+
+# Required libraries
+import argparse
+import functools
+import json
+import platform
+import sys
+import time
+import numpy as np
+import Atmosphere_Extension as atmosphere
+import Atmosphere_Models
+import Linear_Drag
+import Surrogate
+import Terrain
+import Task_1
+import Task_3
+import Task_5
+import Task_6
+from Bounce_Engine import bounce_events, sample_bounces, bounce_time_grid, simulate_drag_bounces
+
+# Flight time of Task 1's default shot, used to turn a step count into a time step (computed on first use)
+@functools.lru_cache(maxsize=1)
+def task1_flight_time():
+    return Task_1.summary()['T']
+
+# Layered standard atmosphere, compiled into its lookup table on first use
+ISA = Atmosphere_Models.LayeredAtmosphere()
+
+# Function to run Task 1's Euler trajectory with about n steps
+def kernel_euler_steps(n):
+    Task_1.projectile_motion(Task_1.initial_theta, Task_1.initial_u, Task_1.g, Task_1.h, task1_flight_time() / n)
+
+# Function to run n Euler trajectories at once
+def kernel_euler_batch(n):
+    Task_1.projectile_motion_batch(np.linspace(10, 80, n), Task_1.initial_u, Task_1.g, Task_1.h, Task_1.dt)
+
+# Function to run pcalc with n samples, reading every sampled field
+def kernel_pcalc_samples(n):
+    p = Task_6.pcalc(Task_6.theta, Task_6.u, Task_6.g, Task_6.h, n)
+    p.x, p.y, p.v, p.phi, p.s_numeric
+
+# Function to run pcalc over n launch angles at once, reading the arc lengths
+def kernel_pcalc_angles(n):
+    Task_6.pcalc(np.linspace(1, 89, n), Task_6.u, Task_6.g, Task_6.h, Task_6.N).s
+
+# Function to generate Task 3's trajectory with n points
+def kernel_generate_trajectory(n):
+    theta_high, theta_low = Task_3.calculate_launch_angles(Task_3.u_given, Task_3.X, Task_3.Y)
+    Task_3.generate_trajectory(theta_low, Task_3.u_given, Task_3.X, Task_3.Y, num_points=n)
+
+# Function to generate Task 5's bounding parabola with n points
+def kernel_bounding_parabola(n):
+    Task_5.generate_bounding_parabola(Task_5.u_given, Task_5.u_given ** 2 / Task_5.g, num_points=n)
+
+# Function to compute n drag-free bounces in closed form and sample them every 0.01 s (Task 8)
+def kernel_bounce_events(n):
+    events = bounce_events(0, 10, 2, 10, 9.81, 0.8, n)
+    sample_bounces(events, bounce_time_grid(events, 0.01))
+
+# Function to simulate n balls bouncing 10 times with drag (Task 9)
+def kernel_drag_bounces_balls(n):
+    simulate_drag_bounces(0, 10, np.linspace(1, 3, n), 10, 9.81, 0.8, 0.1, 10, 0.01, record=False)
+
+# Function to simulate one ball bouncing n times with drag (Task 9), recording its history
+def kernel_drag_bounces_count(n):
+    simulate_drag_bounces(0, 10, 2, 10, 9.81, 0.9, 0.01, n, 0.001)
+
+# Function to solve the atmosphere model once and resample it with about n points
+def kernel_solve_projectile(n):
+    atmosphere.solve_projectile(10, 45, 2, dt=1.5 / n)
+
+# Function to solve n drag trajectories with the batched stepper
+def kernel_solve_batch(n):
+    atmosphere.solve_projectile_batch(np.linspace(5, 50, n), 45, 2, accuracy='loose')
+
+# Function to solve n drag trajectories through the lookup table of the layered standard atmosphere
+def kernel_solve_batch_isa(n):
+    atmosphere.solve_projectile_batch(np.linspace(5, 50, n), 45, 2, accuracy='loose', profile=ISA)
+
+# Function to solve n drag trajectories in one batch with all their forward sensitivities
+def kernel_solve_batch_gradient(n):
+    atmosphere.solve_projectile_batch(np.linspace(5, 50, n), 45, 2, accuracy='loose', sensitivities=True)
+
+# Function to evaluate n linear-drag shots in closed form
+def kernel_linear_shots(n):
+    Linear_Drag.solve_shots(np.linspace(5, 50, n), 45, 2, drag='linear')
+
+# Surrogate of a small grid for kernel_surrogate_query (built on first use)
+@functools.lru_cache(maxsize=1)
+def small_surrogate():
+    return Surrogate.build_surrogate([5, 50], [10, 80], [0, 10], [0, 0.2], max_rounds=0, processes=1)
+
+# Function to answer n surrogate queries by cubic interpolation
+def kernel_surrogate_query(n):
+    small_surrogate().query(np.linspace(5, 50, n), 45, 2, 0.05)
+
+# Rough ground of 10**5 segments for kernel_terrain_cast (built on first use)
+@functools.lru_cache(maxsize=1)
+def rough_ground():
+    x = np.linspace(0, 1000, 10 ** 5)
+    return Terrain.Terrain(x, 0.5 * np.sin(x))
+
+# Function to cast n short falling steps against the rough ground in one batched query
+def kernel_terrain_cast(n):
+    x = np.linspace(0, 1000, n)
+    rough_ground().cast(np.stack([x, np.full(n, 2.0)], axis=1), np.stack([x + 0.05, np.full(n, -1.0)], axis=1))
+
+# Kernel name -> (function of the size, sizes, unit of work counted by the size)
+KERNELS = {
+    'Task_1.projectile_motion': (kernel_euler_steps, [1000, 10000, 100000, 1000000], 'steps'),
+    'Task_1.projectile_motion_batch': (kernel_euler_batch, [10, 100, 1000, 10000], 'trajectories'),
+    'Task_6.pcalc (samples)': (kernel_pcalc_samples, [1000, 10000, 100000, 1000000], 'samples'),
+    'Task_6.pcalc (angles)': (kernel_pcalc_angles, [1000, 10000, 100000, 1000000], 'trajectories'),
+    'Task_3.generate_trajectory': (kernel_generate_trajectory, [1000, 10000, 100000, 1000000], 'samples'),
+    'Task_5.generate_bounding_parabola': (kernel_bounding_parabola, [1000, 10000, 100000, 1000000], 'samples'),
+    'Task_8 bounces': (kernel_bounce_events, [10, 100, 1000, 10000], 'bounces'),
+    'Task_9 drag bounces (balls)': (kernel_drag_bounces_balls, [1, 10, 100, 1000], 'trajectories'),
+    'Task_9 drag bounces (bounces)': (kernel_drag_bounces_count, [2, 4, 8, 16], 'bounces'),
+    'Atmosphere.solve_projectile': (kernel_solve_projectile, [100, 1000, 10000, 100000], 'samples'),
+    'Atmosphere.solve_projectile_batch': (kernel_solve_batch, [1, 10, 100, 1000], 'trajectories'),
+    'Atmosphere batch (ISA table)': (kernel_solve_batch_isa, [1, 10, 100, 1000], 'trajectories'),
+    'Atmosphere batch (sensitivities)': (kernel_solve_batch_gradient, [1, 10, 100, 1000], 'trajectories'),
+    'Linear_Drag.solve_shots (linear)': (kernel_linear_shots, [1000, 10000, 100000, 1000000], 'trajectories'),
+    'Surrogate.query (cubic)': (kernel_surrogate_query, [1000, 10000, 100000, 1000000], 'queries'),
+    'Terrain.cast (10**5 segments)': (kernel_terrain_cast, [100, 1000, 10000, 100000], 'steps'),
+}
+
+# Kernel name -> setup run once before the kernel is timed, so its first call does not pay for it
+SETUP = {
+    'Task_1.projectile_motion': task1_flight_time,
+    'Surrogate.query (cubic)': small_surrogate,
+    'Terrain.cast (10**5 segments)': rough_ground,
+}
+
+# Function to time one call of a kernel: calls are repeated until they take min_time, best of repeat
+def time_kernel(function, size, repeat=3, min_time=0.05):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function(size)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function(size)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+# Function to time every kernel over its sizes
+# Returns the kernel name -> sizes, times, scaling exponent and throughput at the largest size.
+# Kernels whose optional dependency (scipy) is missing are reported as skipped.
+def run_kernels(names=None, repeat=3, min_time=0.05, quick=False):
+    results = {}
+    for name in names or list(KERNELS):
+        function, sizes, unit = KERNELS[name]
+        if quick:
+            sizes = sizes[:-1]
+        try:
+            if name in SETUP:
+                SETUP[name]()
+            times = [time_kernel(function, size, repeat, min_time) for size in sizes]
+        except ImportError as error:
+            results[name] = {'skipped': str(error)}
+            continue
+        exponent = np.polyfit(np.log(sizes), np.log(times), 1)[0]
+        results[name] = {
+            'sizes': sizes,
+            'times': times,  # Seconds per call
+            'exponent': float(exponent),  # time ~ size ** exponent
+            'throughput': sizes[-1] / times[-1],  # Units of work per second at the largest size
+            'unit': unit,
+        }
+    return results
+
+# Function to describe the machine and library versions a set of results was measured with
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(), 'system': platform.system()}
+
+# Function to save results as a JSON baseline
+def save_baseline(results, path):
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'kernels': results}, f, indent=2)
+
+# Function to compare results with a saved baseline
+# For every kernel present in both, the median ratio of the new to the old time over the sizes
+# they share is reported; kernels slower by more than the threshold (0.25 = 25%) are regressions.
+def compare_baseline(results, path, threshold=0.25):
+    with open(path) as f:
+        baseline = json.load(f)['kernels']
+    comparison = {}
+    for name, result in results.items():
+        old = baseline.get(name)
+        if 'times' not in result or not old or 'times' not in old:
+            continue
+        old_times = dict(zip(old['sizes'], old['times']))
+        ratios = [t / old_times[size] for size, t in zip(result['sizes'], result['times']) if size in old_times]
+        if ratios:
+            ratio = float(np.median(ratios))
+            comparison[name] = {'ratio': ratio, 'regression': ratio > 1 + threshold}
+    return comparison
+
+# Function to format the results (and a comparison with a baseline) as a plain-text table
+def format_results(results, comparison=None):
+    lines = [f"{'kernel':<36} {'sizes':>18} {'exponent':>9} {'throughput':>24} {'vs baseline':>12}"]
+    for name, r in results.items():
+        if 'skipped' in r:
+            lines.append(f"{name:<36} skipped ({r['skipped']})")
+            continue
+        sizes = f"{r['sizes'][0]:.0e}..{r['sizes'][-1]:.0e}"
+        throughput = f"{r['throughput']:.3g} {r['unit']}/s"
+        versus = ''
+        if comparison and name in comparison:
+            versus = f"{comparison[name]['ratio']:.2f}x" + (' SLOWER' if comparison[name]['regression'] else '')
+        lines.append(f"{name:<36} {sizes:>18} {r['exponent']:>9.2f} {throughput:>24} {versus:>12}")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the core kernels and compare them with a baseline.', allow_abbrev=False)
+    parser.add_argument('--save', help='write the results to this JSON baseline')
+    parser.add_argument('--baseline', help='compare with this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='slowdown counted as a regression (default 0.25 = 25%%)')
+    parser.add_argument('--kernel', action='append', choices=sorted(KERNELS), help='only time this kernel (repeatable)')
+    parser.add_argument('--quick', action='store_true', help='skip the largest size of every kernel')
+    args = parser.parse_args(argv)
+
+    results = run_kernels(args.kernel, quick=args.quick)
+    comparison = compare_baseline(results, args.baseline, args.threshold) if args.baseline else None
+    print(format_results(results, comparison))
+    if args.save:
+        save_baseline(results, args.save)
+
+    # A non-zero exit status lets scripts fail on a regression
+    if comparison and any(c['regression'] for c in comparison.values()):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
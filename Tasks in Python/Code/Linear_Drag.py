@@ -0,0 +1,132 @@
+# Required libraries
+import numpy as np
+import Atmosphere_Extension as atmosphere
+
+# Closed-form projectile motion with linear drag, a = -b v - g, as a fast path next to the
+# integrators. Every quantity is exact: the velocity relaxes as exp(-b t) towards the
+# terminal velocity g / b downwards, the positions follow by integration, and the landing
+# time solves a transcendental equation whose solution is a branch of the Lambert W function.
+# All functions broadcast over their arguments, and b = 0 gives the drag-free formulas.
+
+g = atmosphere.g  # Acceleration due to gravity (m/s^2), shared with the drag model
+b = 0.1           # Linear drag rate c / m (1/s) used when none is given
+DRAG_MODELS = ('none', 'linear', 'quadratic')
+
+# Function to calculate the principal branch W0 of the Lambert W function (w * exp(w) = z, z >= -1/e)
+# Halley's iteration from a start that is close everywhere: the branch-point series near -1/e,
+# log(1 + z) elsewhere. z below -1/e gives NaN.
+def lambert_w0(z, iterations=8):
+    z = np.asarray(z, dtype=float)
+    with np.errstate(invalid='ignore', over='ignore'):
+        p = np.sqrt(2 * (np.e * z + 1))
+        w = np.where(z < -0.25, -1 + p - p ** 2 / 3 + 11 / 72 * p ** 3, np.log1p(np.maximum(z, -0.25)))
+        for _ in range(iterations):
+            ew = np.exp(w)
+            f = w * ew - z
+            w = np.where(w == -1, w, w - f / (ew * (w + 1) - (w + 2) * f / (2 * w + 2)))
+    return np.where(z < -1 / np.e, np.nan, w)
+
+# Function to calculate (1 - exp(-b t)) / b, which takes the place of t under linear drag (t itself when b = 0)
+def relaxation(b, t):
+    b, t = np.broadcast_arrays(np.asarray(b, dtype=float), np.asarray(t, dtype=float))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(b > 0, -np.expm1(-b * t) / b, t)
+
+# Function to calculate (t - relaxation(b, t)) / b, the fall under gravity divided by g (t^2 / 2 when b = 0)
+# A short series takes over for small b t, where the difference would cancel.
+def relaxation_fall(b, t):
+    b, t = np.broadcast_arrays(np.asarray(b, dtype=float), np.asarray(t, dtype=float))
+    bt = b * t
+    series = t ** 2 / 2 * (1 - bt / 3 + bt ** 2 / 12 - bt ** 3 / 60 + bt ** 4 / 360)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(np.abs(bt) < 1e-2, series, (bt + np.expm1(-bt)) / b ** 2)
+
+# Function to calculate the position and velocity at times t after launch
+def linear_drag_state(u, theta, h, b, t, g=g):
+    theta_rad = np.radians(theta)
+    vx0, vy0 = u * np.cos(theta_rad), u * np.sin(theta_rad)
+    D = relaxation(b, t)
+    decay = np.exp(-np.asarray(b) * t)
+    x = vx0 * D
+    y = h + vy0 * D - g * relaxation_fall(b, t)
+    return x, y, vx0 * decay, vy0 * decay - g * D
+
+# Function to calculate e - log(1 + e) without cancellation for small e
+def log1p_remainder(e):
+    e = np.asarray(e, dtype=float)
+    series = e ** 2 * (1 / 2 - e / 3 + e ** 2 / 4 - e ** 3 / 5 + e ** 4 / 6 - e ** 5 / 7)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(np.abs(e) < 1e-2, series, e - np.log1p(e))
+
+# Function to calculate the time at which a shot launched at height h >= 0 with vertical velocity vy0 lands
+# With drag the landing time is T = h / v_t + (v_y0 / v_t + 1 + W0(z)) / b, where v_t = g / b is
+# the terminal speed and z = -q exp(-q - b h / v_t) with q = 1 + v_y0 / v_t. Unless the shot is
+# thrown down faster than v_t, z lies in [-1/e, 0), where W0 is ill-conditioned near the branch
+# point; there delta = 1 + W0(z) is found instead from delta = 1 - exp(-s) with
+# s - 1 + exp(-s) = M, M = q - 1 - log(q) + b h / v_t, by Newton's method from above.
+def linear_landing_time(vy0, h, b, g=g):
+    vy0, h, b = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (vy0, h, b)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eps = b * vy0 / g  # v_y0 / v_t
+        c = b ** 2 * h / g  # b h / v_t
+        M = log1p_remainder(eps) + c
+        s = np.sqrt(2 * M) + M  # Above the root, so the iteration decreases monotonically
+        for _ in range(8):
+            slope = -np.expm1(-s)
+            s = np.where(slope > 0, s - (s + np.expm1(-s) - M) / slope, s)
+        delta = -np.expm1(-s)
+
+        # Thrown down faster than the terminal speed: z > 0, where W0 is well-conditioned
+        q = 1 + eps
+        fast = np.where(q <= 0, q + lambert_w0(-q * np.exp(-q - c)), np.nan)
+
+        T = h * b / g + np.where(q > 0, eps + delta, fast) / b
+        T_vacuum = (vy0 + np.sqrt(vy0 ** 2 + 2 * g * h)) / g
+    T = np.where(b > 0, T, T_vacuum)
+
+    # Two Newton steps on y(T) = 0 remove the rounding left where the terms above cancel
+    # (shots thrown downwards with very weak drag)
+    for _ in range(2):
+        D = relaxation(b, T)
+        vy = vy0 * np.exp(-b * T) - g * D
+        y = h + vy0 * D - g * relaxation_fall(b, T)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            T = np.where(vy < 0, T - y / vy, T)
+    return T
+
+# Function to summarise shots with linear drag in closed form, in the format of atmosphere.solve_projectile_batch
+# u, theta, h and b may be scalars or arrays (broadcast together); results are flat arrays.
+def linear_drag_summary(u, theta, h, b=b, g=g):
+    u, theta, h, b = (np.ravel(a) for a in np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (u, theta, h, b))))
+    vy0 = u * np.sin(np.radians(theta))
+    T = linear_landing_time(vy0, h, b, g)
+    R, _, vx, vy = linear_drag_state(u, theta, h, b, T, g)
+
+    # Apogee where the vertical velocity vanishes: exp(b t) = 1 + b v_y0 / g
+    rising = vy0 > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_apogee = np.where(b > 0, np.log1p(b * np.maximum(vy0, 0) / g) / b, np.maximum(vy0, 0) / g)
+    x_apogee, y_apogee, _, _ = linear_drag_state(u, theta, h, b, t_apogee, g)
+    return {
+        'T': T,  # Time of flight
+        'R': R,  # Range
+        'v_impact': np.hypot(vx, vy),  # Speed at impact
+        'vx_impact': vx,  # Velocity components at impact
+        'vy_impact': vy,
+        'apogee': np.where(rising, y_apogee, h),  # Maximum height
+        'x_apogee': np.where(rising, x_apogee, 0.0),  # Horizontal position of the apogee
+        'steps': np.zeros(len(u), dtype=np.int64),  # No integration steps
+    }
+
+# Function to summarise shots with the cheapest exact method for the drag model
+# 'none' and 'linear' (drag rate b) are evaluated in closed form; 'quadratic' drag, with its
+# altitude-dependent density, is integrated by atmosphere.solve_projectile_batch, which gets
+# the remaining keyword arguments (Cd, A, m, rho_0, H, k, profile, accuracy, ...).
+def solve_shots(u, theta, h, drag='quadratic', b=b, g=g, **options):
+    if drag == 'none':
+        return linear_drag_summary(u, theta, h, 0.0, g)
+    if drag == 'linear':
+        return linear_drag_summary(u, theta, h, b, g)
+    if drag == 'quadratic':
+        return atmosphere.solve_projectile_batch(u, theta, h, **options)
+    raise ValueError(f"Unknown drag model '{drag}' (choose from {', '.join(DRAG_MODELS)})")
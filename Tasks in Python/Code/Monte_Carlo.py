@@ -0,0 +1,265 @@
+# Required libraries
+import numpy as np
+from multiprocessing import Pool
+import Atmosphere_Extension as atmosphere
+
+# Monte Carlo uncertainty analysis of the drag model.
+# Launch speed, angle, height, drag coefficient, sea-level air density and restitution are
+# drawn from distributions and pushed through the batched drag solver in chunks. Each chunk
+# is reduced on the spot (count, mean and covariance, min/max, histograms) and only the
+# reductions are kept, so the memory use does not grow with the number of shots. Every chunk
+# has its own random stream derived from (seed, chunk number), and the reductions are merged
+# in chunk order, so a run gives bit-identical results whatever the number of processes.
+
+NOMINAL = {'u': 10.0, 'theta': 45.0, 'h': 2.0, 'Cd': atmosphere.Cd, 'rho_0': atmosphere.rho_0, 'e': 0.8}  # Values of parameters that are not sampled
+BOUNDS = {'u': (0, np.inf), 'theta': (-90, 90), 'h': (0, np.inf), 'Cd': (0, np.inf), 'rho_0': (0, np.inf), 'e': (0, 1)}  # Samples are clipped to these ranges
+OUTPUT_FIELDS = ('R', 'T', 'v_impact', 'apogee')  # Reduced for every shot
+
+# Function to draw n samples of one parameter
+# A distribution is a fixed number or a tuple: ('normal', mean, sd), ('uniform', low, high),
+# ('triangular', low, mode, high) or ('lognormal', median, sigma).
+def sample_distribution(distribution, rng, n):
+    if np.isscalar(distribution):
+        return np.full(n, float(distribution))
+    kind, *args = distribution
+    if kind == 'normal':
+        return rng.normal(args[0], args[1], n)
+    if kind == 'uniform':
+        return rng.uniform(args[0], args[1], n)
+    if kind == 'triangular':
+        return rng.triangular(args[0], args[1], args[2], n)
+    if kind == 'lognormal':
+        return rng.lognormal(np.log(args[0]), args[1], n)
+    raise ValueError(f"Unknown distribution '{kind}'")
+
+# Function to draw n samples of every parameter, using the nominal values for parameters without a distribution
+def sample_parameters(distributions, rng, n):
+    unknown = set(distributions) - set(NOMINAL)
+    if unknown:
+        raise ValueError(f"Unknown Monte Carlo parameters: {sorted(unknown)}")
+    samples = {}
+    for name in NOMINAL:  # Fixed order, so the random streams do not depend on the order of the dict
+        samples[name] = np.clip(sample_distribution(distributions.get(name, NOMINAL[name]), rng, n), *BOUNDS[name])
+    return samples
+
+# Function to create the random generator of one chunk
+# The stream depends only on the seed and the chunk number, not on which process draws it.
+def chunk_rng(seed, chunk):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,)))
+
+# Function to fly a batch of shots with drag up to the impact after n_bounces bounces
+# After each landing the ball is relaunched from the ground with its horizontal velocity
+# kept and its vertical velocity reversed and scaled by the restitution e. Returns the
+# position, total time and speed of the last impact and the highest point of the flight.
+def simulate_shots(p, n_bounces=0, accuracy='loose'):
+    flight = atmosphere.solve_projectile_batch(p['u'], p['theta'], p['h'], accuracy=accuracy, Cd=p['Cd'], rho_0=p['rho_0'])
+    R, T, apogee = flight['R'], flight['T'], flight['apogee']
+    for _ in range(n_bounces):
+        vx, vy = flight['vx_impact'], -p['e'] * flight['vy_impact']
+        flight = atmosphere.solve_projectile_batch(np.hypot(vx, vy), np.degrees(np.arctan2(vy, vx)), 0, accuracy=accuracy, Cd=p['Cd'], rho_0=p['rho_0'])
+        R, T, apogee = R + flight['R'], T + flight['T'], np.fmax(apogee, flight['apogee'])
+    return {'R': R, 'T': T, 'v_impact': flight['v_impact'], 'apogee': apogee}
+
+# Running count, mean, covariance and range of vector samples
+# Batches are combined with the pairwise update of Chan et al., so two accumulators
+# filled from different chunks can be merged without keeping any samples.
+class OnlineMoments:
+    def __init__(self, d):
+        self.n = 0
+        self.mean = np.zeros(d)
+        self.M2 = np.zeros((d, d))  # Sum of outer products of deviations from the mean
+        self.min = np.full(d, np.inf)
+        self.max = np.full(d, -np.inf)
+
+    # Function to add a batch of samples, one per row
+    def update(self, X):
+        batch = OnlineMoments(X.shape[1])
+        batch.n = len(X)
+        if batch.n:
+            batch.mean = X.mean(axis=0)
+            deviations = X - batch.mean
+            batch.M2 = deviations.T @ deviations
+            batch.min = X.min(axis=0)
+            batch.max = X.max(axis=0)
+        self.merge(batch)
+
+    # Function to merge the moments of another accumulator into this one
+    def merge(self, other):
+        n = self.n + other.n
+        if other.n == 0:
+            return
+        delta = other.mean - self.mean
+        self.M2 = self.M2 + other.M2 + np.outer(delta, delta) * (self.n * other.n / n)
+        self.mean = self.mean + delta * (other.n / n)
+        self.n = n
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+
+    # Function to calculate the sample covariance matrix
+    def covariance(self):
+        return self.M2 / (self.n - 1) if self.n > 1 else np.full(self.M2.shape, np.nan)
+
+# Histogram with fixed bins and counts of the samples below and above its range
+class OnlineHistogram:
+    def __init__(self, low, high, bins=256):
+        self.edges = np.linspace(low, high, bins + 1)
+        self.counts = np.zeros(bins + 2, dtype=np.int64)  # Underflow, the bins, overflow
+
+    # Function to add a batch of samples
+    def update(self, values):
+        bins = len(self.edges) - 1
+        index = np.floor((values - self.edges[0]) / (self.edges[-1] - self.edges[0]) * bins)
+        index = np.clip(index, -1, bins).astype(np.int64) + 1
+        self.counts += np.bincount(index, minlength=bins + 2)
+
+    # Function to merge the counts of another histogram with the same bins
+    def merge(self, other):
+        self.counts += other.counts
+
+    # Function to estimate quantiles by interpolating linearly inside the bins
+    # The error is at most one bin width; quantiles outside the histogram range are NaN.
+    def quantile(self, q):
+        q = np.asarray(q, dtype=float)
+        cumulative = np.cumsum(self.counts)
+        target = q * cumulative[-1]
+        i = np.searchsorted(cumulative, target, side='left')  # Index into counts of the bin holding each quantile
+        inside = (i >= 1) & (i <= len(self.edges) - 1)
+        b = np.clip(i - 1, 0, len(self.edges) - 2)
+        below = cumulative[b + 1] - self.counts[b + 1]
+        frac = np.divide(target - below, self.counts[b + 1], out=np.zeros(q.shape), where=self.counts[b + 1] > 0)
+        return np.where(inside, self.edges[b] + frac * (self.edges[b + 1] - self.edges[b]), np.nan)
+
+# Function to simulate one chunk of shots and reduce it
+# Returns the moments of the outputs and sampled parameters, the histograms of the outputs and
+# the number of failed shots (those that did not land within the solver's time limit), and the
+# outputs of the shots that landed (used to choose the histogram ranges from the first chunk).
+def reduce_chunk(distributions, seed, chunk, n, n_bounces, accuracy, ranges, bins):
+    p = sample_parameters(distributions, chunk_rng(seed, chunk), n)
+    out = simulate_shots(p, n_bounces, accuracy)
+    sampled = [name for name in NOMINAL if name in distributions and not np.isscalar(distributions[name])]
+    X = np.column_stack([out[field] for field in OUTPUT_FIELDS] + [p[name] for name in sampled])
+    ok = np.all(np.isfinite(X), axis=1)
+    moments = OnlineMoments(X.shape[1])
+    moments.update(X[ok])
+    histograms = None
+    if ranges is not None:
+        histograms = {field: OnlineHistogram(*ranges[field], bins) for field in OUTPUT_FIELDS}
+        for i, field in enumerate(OUTPUT_FIELDS):
+            histograms[field].update(X[ok, i])
+    return moments, histograms, int(np.count_nonzero(~ok)), X[ok, :len(OUTPUT_FIELDS)]
+
+# Per-process worker state, set up once by init_worker
+worker = {}
+
+# Function to hand the run settings to a worker process
+def init_worker(*settings):
+    worker['settings'] = settings
+
+# Function to reduce one chunk in a worker (only the small reductions travel back)
+def run_chunk(chunk):
+    distributions, seed, chunk_size, n_shots, n_bounces, accuracy, ranges, bins = worker['settings']
+    n = min(chunk_size, n_shots - chunk * chunk_size)
+    return reduce_chunk(distributions, seed, chunk, n, n_bounces, accuracy, ranges, bins)[:3]
+
+# Function to run a Monte Carlo analysis of the drag model
+# distributions maps parameter names from NOMINAL to distributions (see sample_distribution);
+# the others keep their nominal values. The histogram range of each output is taken from
+# ranges if given, otherwise from the first chunk widened by half its span on each side.
+# Returns the number of shots reduced and failed, the field names (outputs, then sampled
+# parameters) with their mean, standard deviation, covariance and range, the histograms of
+# the outputs and the requested quantiles of each output.
+def run_monte_carlo(distributions, n_shots=10 ** 6, seed=0, chunk_size=100000, processes=1, n_bounces=0,
+                    accuracy='loose', bins=256, ranges=None, quantiles=(0.025, 0.5, 0.975)):
+    n_chunks = -(-n_shots // chunk_size)
+    settings = [distributions, seed, chunk_size, n_shots, n_bounces, accuracy, ranges, bins]
+
+    # The first chunk is reduced here, so its outputs can set the histogram ranges
+    moments, histograms, failed, X = reduce_chunk(distributions, seed, 0, min(chunk_size, n_shots), n_bounces, accuracy, ranges, bins)
+    if ranges is None:
+        ranges = {}
+        for i, field in enumerate(OUTPUT_FIELDS):
+            low, high = (X[:, i].min(), X[:, i].max()) if len(X) else (0.0, 1.0)
+            span = max(high - low, 1e-9 * max(1.0, abs(high)))
+            ranges[field] = (low - 0.5 * span, high + 0.5 * span)
+        settings[6] = ranges
+        histograms = {field: OnlineHistogram(*ranges[field], bins) for field in OUTPUT_FIELDS}
+        for i, field in enumerate(OUTPUT_FIELDS):
+            histograms[field].update(X[:, i])
+
+    # The remaining chunks are merged in order, so the result does not depend on the number of processes
+    def merge(reduction):
+        nonlocal failed
+        moments.merge(reduction[0])
+        for field in OUTPUT_FIELDS:
+            histograms[field].merge(reduction[1][field])
+        failed += reduction[2]
+
+    if processes == 1:
+        init_worker(*settings)
+        for chunk in range(1, n_chunks):
+            merge(run_chunk(chunk))
+        worker.clear()
+    elif n_chunks > 1:
+        with Pool(processes, initializer=init_worker, initargs=settings) as pool:
+            for reduction in pool.imap(run_chunk, range(1, n_chunks)):
+                merge(reduction)
+
+    covariance = moments.covariance()
+    return {
+        'n': moments.n,  # Shots reduced
+        'failed': failed,  # Shots that did not land
+        'fields': list(OUTPUT_FIELDS) + [name for name in NOMINAL if name in distributions and not np.isscalar(distributions[name])],
+        'mean': moments.mean,
+        'std': np.sqrt(np.diag(covariance)),
+        'covariance': covariance,
+        'min': moments.min,
+        'max': moments.max,
+        'histograms': histograms,
+        'quantiles': {field: {q: float(v) for q, v in zip(quantiles, histograms[field].quantile(quantiles))} for field in OUTPUT_FIELDS},
+    }
+
+# Function to format the result of a Monte Carlo run as a plain-text table
+def format_result(result):
+    names = [f"q{q:g}" for q in next(iter(result['quantiles'].values()))]
+    lines = [f"{result['n']} shots ({result['failed']} failed)",
+             f"{'field':<10} {'mean':>12} {'std':>12} {'min':>12} {'max':>12} " + ' '.join(f"{n:>12}" for n in names)]
+    for i, field in enumerate(result['fields']):
+        row = f"{field:<10} {result['mean'][i]:>12.5g} {result['std'][i]:>12.5g} {result['min'][i]:>12.5g} {result['max'][i]:>12.5g}"
+        if field in result['quantiles']:
+            row += ' ' + ' '.join(f"{v:>12.5g}" for v in result['quantiles'][field].values())
+        lines.append(row)
+    return '\n'.join(lines)
+
+# Function to plot the histograms of the outputs
+def plot_distributions(result, out=None, show=True):
+    import matplotlib.pyplot as plt
+    fig, axes = plt.subplots(1, len(OUTPUT_FIELDS), figsize=(4 * len(OUTPUT_FIELDS), 4))
+    labels = {'R': 'Range (m)', 'T': 'Time of flight (s)', 'v_impact': 'Impact speed (m/s)', 'apogee': 'Maximum height (m)'}
+    for ax, field in zip(axes, OUTPUT_FIELDS):
+        histogram = result['histograms'][field]
+        ax.stairs(histogram.counts[1:-1], histogram.edges, fill=True)
+        for value in result['quantiles'][field].values():
+            ax.axvline(value, color='red', linestyle='--', linewidth=1)
+        ax.set_xlabel(labels[field])
+    axes[0].set_ylabel('Shots')
+    fig.suptitle(f"Monte Carlo distribution of {result['n']} shots")
+    fig.tight_layout()
+
+    # Save and/or show the plot
+    if out:
+        fig.savefig(out)
+    if show:
+        plt.show()
+
+if __name__ == '__main__':
+    # Tolerances of the launcher, the projectile and the air
+    distributions = {
+        'u': ('normal', 10.0, 0.2),
+        'theta': ('normal', 45.0, 1.0),
+        'Cd': ('uniform', 0.27, 0.33),
+        'rho_0': ('normal', atmosphere.rho_0, 0.03),
+        'e': ('triangular', 0.7, 0.8, 0.85),
+    }
+    result = run_monte_carlo(distributions, n_shots=10 ** 6, processes=None, n_bounces=1)
+    print(format_result(result))
+    plot_distributions(result, out="Monte_Carlo.png")
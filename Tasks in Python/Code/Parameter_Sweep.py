@@ -0,0 +1,185 @@
+# Required libraries
+import os
+import numpy as np
+from multiprocessing import Pool, shared_memory
+import Atmosphere_Extension as atmosphere
+import Linear_Drag
+
+# Parallel parameter sweeps of the atmosphere model.
+# The grid is split into chunks of consecutive flat indices; every worker solves its
+# chunks with the batched drag solver and writes the summaries straight into one
+# shared-memory array, so only chunk numbers travel between processes. Sweeps without
+# drag or with linear drag are evaluated in closed form and take no integration steps.
+
+SWEEP_PARAMETERS = ('u', 'theta', 'h', 'Cd', 'A', 'm', 'H')  # Grid axes, in order
+MODEL_PARAMETERS = {  # Grid axes of each drag model
+    'quadratic': SWEEP_PARAMETERS,
+    'linear': ('u', 'theta', 'h', 'b'),
+    'none': ('u', 'theta', 'h'),
+}
+SUMMARY_FIELDS = ('R', 'T', 'apogee', 'v_impact')  # Outputs stored for every grid point
+
+# Function to collect the axis values of a sweep, using the model constants for axes that are not swept
+def sweep_axes(axes, drag='quadratic'):
+    if drag not in MODEL_PARAMETERS:
+        raise ValueError(f"Unknown drag model '{drag}' (choose from {', '.join(MODEL_PARAMETERS)})")
+    unknown = set(axes) - set(MODEL_PARAMETERS[drag])
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    defaults = {'h': 0.0, 'Cd': atmosphere.Cd, 'A': atmosphere.A, 'm': atmosphere.m, 'H': atmosphere.H, 'b': Linear_Drag.b}
+    values = {}
+    for name in MODEL_PARAMETERS[drag]:
+        if name in axes:
+            values[name] = np.atleast_1d(np.asarray(axes[name], dtype=float))
+        elif name in defaults:
+            values[name] = np.array([defaults[name]])
+        else:
+            raise ValueError(f"The sweep needs values for '{name}'")
+    return values
+
+# Function to calculate the parameter values of the grid points with flat indices start..stop
+def grid_points(axes, start, stop):
+    shape = tuple(len(values) for values in axes.values())
+    index = np.unravel_index(np.arange(start, stop), shape)
+    return {name: axes[name][i] for name, i in zip(axes, index)}
+
+# Function to name the checkpoint file of one chunk
+def chunk_path(checkpoint_dir, chunk):
+    return os.path.join(checkpoint_dir, f'chunk_{chunk:07d}.npy')
+
+# Per-process worker state, set up once by init_worker
+worker = {}
+
+# Function to attach a worker process to the shared result array
+def init_worker(shm_name, total, axes, chunk_size, accuracy, checkpoint_dir, drag='quadratic'):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    worker.update(
+        shm=shm,
+        shm_name=shm_name,
+        results=np.ndarray((len(SUMMARY_FIELDS), total), dtype=float, buffer=shm.buf),
+        total=total,
+        axes=axes,
+        chunk_size=chunk_size,
+        accuracy=accuracy,
+        checkpoint_dir=checkpoint_dir,
+        drag=drag,
+    )
+
+# Function to solve one chunk of the grid and store its summaries in shared memory
+def run_chunk(chunk):
+    start = chunk * worker['chunk_size']
+    stop = min(start + worker['chunk_size'], worker['total'])
+    p = grid_points(worker['axes'], start, stop)
+    drag_parameters = {name: p[name] for name in ('Cd', 'A', 'm', 'H', 'b') if name in p}
+    summary = Linear_Drag.solve_shots(p['u'], p['theta'], p['h'], worker['drag'], accuracy=worker['accuracy'], **drag_parameters)
+    block = worker['results'][:, start:stop]
+    for i, field in enumerate(SUMMARY_FIELDS):
+        block[i] = summary[field]
+
+    # Write the checkpoint under a temporary name first so a killed worker never leaves half a file
+    if worker['checkpoint_dir']:
+        path = chunk_path(worker['checkpoint_dir'], chunk)
+        np.save(path + '.tmp.npy', block)
+        os.replace(path + '.tmp.npy', path)
+    return chunk
+
+# Function to solve one chunk in a pool shared by several sweeps (tasks are (initargs, chunk) pairs)
+# The worker is attached to the sweep's shared memory on its first chunk of that sweep.
+def run_shared_chunk(task):
+    initargs, chunk = task
+    if worker.get('shm_name') != initargs[0]:
+        if 'shm' in worker:
+            worker['shm'].close()
+        init_worker(*initargs)
+    return run_chunk(chunk)
+
+# Function to run a parameter sweep of the atmosphere model over a process pool
+# axes maps parameter names of the drag model ('quadratic', 'linear' or 'none', see
+# MODEL_PARAMETERS) to 1-D arrays of values; the full Cartesian grid is swept. With a
+# checkpoint_dir, completed chunks are saved there and skipped when the same sweep is run
+# again with the same solver accuracy. A multiprocessing pool can be passed in to run several
+# sweeps on the same worker processes. Returns each summary field as a grid-shaped array.
+def run_sweep(axes, chunk_size=10000, processes=None, accuracy='loose', checkpoint_dir=None, drag='quadratic', pool=None):
+    axes = sweep_axes(axes, drag)
+    shape = tuple(len(values) for values in axes.values())
+    total = int(np.prod(shape))
+    n_chunks = -(-total // chunk_size)
+
+    shm = shared_memory.SharedMemory(create=True, size=len(SUMMARY_FIELDS) * total * 8)
+    try:
+        results = np.ndarray((len(SUMMARY_FIELDS), total), dtype=float, buffer=shm.buf)
+        results[:] = np.nan
+
+        # Reload completed chunks, refusing to mix checkpoints from a different sweep
+        pending = list(range(n_chunks))
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            manifest = os.path.join(checkpoint_dir, 'axes.npz')
+            # Solver options the summaries were computed with (manifests without them count as different)
+            solver = {f'solver_{name}': value for name, value in atmosphere.accuracy_options(accuracy).items()}
+            if os.path.exists(manifest):
+                saved = np.load(manifest)
+                saved_drag = str(saved['drag']) if 'drag' in saved else 'quadratic'
+                saved_solver = {name: saved[name].item() for name in saved.files if name.startswith('solver_')}
+                if (int(saved['chunk_size']) != chunk_size or saved_drag != drag or saved_solver != solver
+                        or any(name not in saved or not np.array_equal(saved[name], axes[name]) for name in axes)):
+                    raise ValueError(f"Checkpoints in {checkpoint_dir} belong to a different sweep")
+            else:
+                np.savez(manifest, chunk_size=chunk_size, drag=drag, **solver, **axes)
+            pending = []
+            for chunk in range(n_chunks):
+                path = chunk_path(checkpoint_dir, chunk)
+                if os.path.exists(path):
+                    start = chunk * chunk_size
+                    results[:, start:min(start + chunk_size, total)] = np.load(path)
+                else:
+                    pending.append(chunk)
+
+        initargs = (shm.name, total, axes, chunk_size, accuracy, checkpoint_dir, drag)
+        if pool is not None:
+            for _ in pool.imap_unordered(run_shared_chunk, [(initargs, chunk) for chunk in pending]):
+                pass
+        elif processes == 1:
+            init_worker(*initargs)
+            for chunk in pending:
+                run_chunk(chunk)
+            worker.clear()
+        elif pending:
+            with Pool(processes, initializer=init_worker, initargs=initargs) as pool:
+                for _ in pool.imap_unordered(run_chunk, pending):
+                    pass
+
+        sweep = {field: results[i].reshape(shape).copy() for i, field in enumerate(SUMMARY_FIELDS)}
+    finally:
+        shm.close()
+        shm.unlink()
+
+    sweep['axes'] = axes
+    return sweep
+
+# Function to interpolate values tabulated on a regular grid at arbitrary points (multilinear)
+# axes is a list of increasing 1-D arrays, values has shape tuple(len(a) for a in axes), and
+# points is a list of arrays (broadcast together), one per axis. Points outside the grid are
+# clamped to its edges.
+def grid_interpolate(axes, values, points):
+    points = np.broadcast_arrays(*(np.asarray(p, dtype=float) for p in points))
+    corners = []  # (lower index, weight of the upper index) along every axis
+    for axis, p in zip(axes, points):
+        if len(axis) == 1:
+            corners.append((np.zeros(p.shape, dtype=np.int64), np.zeros(p.shape)))
+            continue
+        i = np.clip(np.searchsorted(axis, p, side='right') - 1, 0, len(axis) - 2)
+        w = np.clip((p - axis[i]) / (axis[i + 1] - axis[i]), 0, 1)
+        corners.append((i, w))
+
+    # Sum over the 2**d corners of the enclosing cell
+    result = np.zeros(points[0].shape)
+    for corner in range(2 ** len(axes)):
+        index = []
+        weight = np.ones(points[0].shape)
+        for d, (i, w) in enumerate(corners):
+            upper = (corner >> d) & 1
+            index.append(np.minimum(i + upper, len(axes[d]) - 1))
+            weight = weight * (w if upper else 1 - w)
+        result += weight * values[tuple(index)]
+    return result
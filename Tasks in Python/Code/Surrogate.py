@@ -0,0 +1,220 @@
+# Required libraries
+import numpy as np
+from contextlib import nullcontext
+from multiprocessing import Pool
+import Atmosphere_Extension as atmosphere
+import Parameter_Sweep
+
+# Surrogate model of the drag trajectory summaries.
+# Range and flight time with drag are tabulated once on a rectilinear grid over the launch
+# speed u, angle theta, height h and c = Cd * A / m (the drag constant is k = c * rho_0 / 2),
+# solved with a parallel parameter sweep. Queries are then answered by multilinear or cubic
+# interpolation, which costs a few gathers per point instead of an ODE solve. The grid is
+# validated by solving at the centre of every cell: cells whose interpolation error there
+# exceeds the tolerance get their intervals halved along the axis where the summaries bend
+# most, and the sweep is repeated for the new grid points only. The centre error of each cell
+# is kept and returned with every query as its error estimate (measured at one point of the
+# cell, so not a bound). All sweeps of a build share one process pool.
+
+SURROGATE_PARAMETERS = ('u', 'theta', 'h', 'c')  # Grid axes, in order
+METHODS = {'linear': 2, 'cubic': 4}  # Interpolation method -> nodes per axis
+
+# Function to find, along one axis, the first of the nodes used for every point and their weights
+# Lagrange interpolation through order nodes around the point (two for linear, four for cubic,
+# fewer near the ends of short axes). Points outside the axis are clamped to its ends.
+def axis_weights(axis, p, order):
+    order = min(order, len(axis))
+    p = np.clip(p, axis[0], axis[-1])
+    cell = np.clip(np.searchsorted(axis, p, side='right') - 1, 0, len(axis) - 2)
+    first = np.clip(cell - (order // 2 - 1), 0, len(axis) - order)
+    nodes = [axis[first + j] for j in range(order)]
+    weights = []
+    for j in range(order):
+        w = np.ones(p.shape)
+        for l in range(order):
+            if l != j:
+                w = w * (p - nodes[l]) / (nodes[j] - nodes[l])
+        weights.append(w)
+    return first, weights
+
+# Function to find the grid points and weights that interpolate at arbitrary points
+# Returns the flat indices into the grid and the weights, both (nodes per point, number of points),
+# for the tensor product of the axis stencils, so several fields can share one stencil.
+def stencil(axes, points, method='linear'):
+    flat = np.zeros((1, points[0].size), dtype=np.intp)
+    weight = np.ones((1, points[0].size))
+    for axis, p in zip(axes, points):
+        first, weights = axis_weights(axis, np.ravel(p), METHODS[method])
+        nodes = first + np.arange(len(weights))[:, None]
+        flat = (flat[:, None] * len(axis) + nodes).reshape(-1, len(first))
+        weight = (weight[:, None] * np.array(weights)).reshape(-1, len(first))
+    return flat, weight
+
+# Function to interpolate values tabulated on a rectilinear grid at arbitrary points
+# Like Parameter_Sweep.grid_interpolate, but with a choice of method ('linear' or 'cubic').
+# Points are interpolated in chunks, so the stencils never take much memory.
+def interpolate(axes, values, points, method='linear', chunk_size=16384):
+    points = np.broadcast_arrays(*(np.asarray(p, dtype=float) for p in points))
+    shape = points[0].shape
+    points = [p.ravel() for p in points]
+    result = np.empty(len(points[0]))
+    for start in range(0, len(points[0]), chunk_size):
+        flat, weight = stencil(axes, [p[start:start + chunk_size] for p in points], method)
+        result[start:start + chunk_size] = np.einsum('ij,ij->j', values.ravel()[flat], weight)
+    return result.reshape(shape)
+
+# Function to find the cell of the grid that holds every point (clamped to the grid)
+def cell_index(axes, points):
+    points = np.broadcast_arrays(*(np.asarray(p, dtype=float) for p in points))
+    return tuple(np.clip(np.searchsorted(axis, p, side='right') - 1, 0, len(axis) - 2) for axis, p in zip(axes, points))
+
+# Function to sweep the summaries over a grid of (u, theta, h, c) axes
+# With the axes and values of an earlier grid, the points the two grids share are copied and
+# only the others are solved: along every axis in turn, the slab of new values of that axis
+# against the shared values of the axes before it and all values of the axes after it. These
+# slabs and the shared points cover the new grid exactly once. A pool, if given, runs every slab.
+def sweep_grid(axes, fields, old_axes=None, old_values=None, accuracy='tight', processes=None, A=atmosphere.A, m=atmosphere.m, pool=None):
+    shape = tuple(len(axis) for axis in axes)
+    values = {field: np.full(shape, np.nan) for field in fields}
+    slabs = [list(axes)]
+    if old_axes is not None:
+        shared = [np.intersect1d(axis, old) for axis, old in zip(axes, old_axes)]
+        new_position = [np.searchsorted(axis, part) for axis, part in zip(axes, shared)]
+        old_position = [np.searchsorted(old, part) for old, part in zip(old_axes, shared)]
+        for field in fields:
+            values[field][np.ix_(*new_position)] = old_values[field][np.ix_(*old_position)]
+        slabs = [shared[:d] + [np.setdiff1d(axes[d], shared[d])] + list(axes[d + 1:]) for d in range(len(axes))]
+
+    for slab in slabs:
+        if any(len(axis) == 0 for axis in slab):
+            continue
+        u, theta, h, c = slab
+        sweep = Parameter_Sweep.run_sweep({'u': u, 'theta': theta, 'h': h, 'Cd': c * m / A, 'A': [A], 'm': [m]},
+                                          accuracy=accuracy, processes=processes, pool=pool)
+        position = [np.searchsorted(axis, part) for axis, part in zip(axes, slab)]
+        for field in fields:
+            values[field][np.ix_(*position)] = sweep[field].reshape(tuple(len(axis) for axis in slab))
+    return values
+
+# Function to take the larger of every two neighbouring entries of an array along one axis
+def pairwise_max(a, axis):
+    a = np.moveaxis(a, axis, 0)
+    return np.moveaxis(np.maximum(a[:-1], a[1:]), 0, axis)
+
+# Function to estimate, for every cell and axis, the linear interpolation error along that axis
+# From second divided differences along the axis: h ** 2 / 8 times the largest curvature at
+# the cell's nodes. Axes with fewer than three nodes show no curvature, so their estimate is
+# infinite and they are split first. Returns an array of shape (number of axes,) + cell shape.
+def bending(axes, values):
+    indicators = []
+    for d, axis in enumerate(axes):
+        v = np.moveaxis(values, d, 0)
+        step = np.diff(axis).reshape((-1,) + (1,) * (v.ndim - 1))
+        if len(axis) < 3:
+            curvature = np.full(v.shape, np.inf)
+        else:
+            slope = np.diff(v, axis=0) / step
+            curvature = np.abs(np.diff(slope, axis=0) / (0.5 * (step[:-1] + step[1:])))
+            # Edge nodes: extrapolated linearly from the two nearest interior nodes, never below the nearest
+            first = np.maximum(curvature[0], 2 * curvature[0] - curvature[1]) if len(curvature) > 1 else curvature[0]
+            last = np.maximum(curvature[-1], 2 * curvature[-1] - curvature[-2]) if len(curvature) > 1 else curvature[-1]
+            curvature = np.concatenate([first[None], curvature, last[None]])
+        indicator = np.moveaxis(step ** 2 / 8 * pairwise_max(curvature, 0), 0, d)
+        for other in range(len(axes)):
+            if other != d:
+                indicator = pairwise_max(indicator, other)
+        indicators.append(np.nan_to_num(indicator, posinf=np.inf))
+    return np.array(indicators)
+
+# Interpolating surrogate of the drag summaries on a validated (u, theta, h, c) grid
+class Surrogate:
+    def __init__(self, axes, values, errors, method='linear'):
+        self.axes = [np.asarray(axis, dtype=float) for axis in axes]
+        self.values = values  # Field -> grid-shaped array of the summaries
+        self.errors = errors  # Field -> cell-shaped array of the interpolation error measured at the cell centres
+        self.method = method  # Interpolation method the errors were measured for
+        self.fields = tuple(values)
+
+    # Number of grid points
+    @property
+    def size(self):
+        return int(np.prod([len(axis) for axis in self.axes]))
+
+    # Interpolated summaries at any (u, theta, h, c), broadcast together
+    # Returns every field and, as '<field>_error', the error estimate of the cell holding each point
+    # (the error measured at the cell's centre).
+    # Points are interpolated in chunks, so the stencils never take much memory.
+    def query(self, u, theta, h, c, chunk_size=16384):
+        points = [p.ravel() for p in np.broadcast_arrays(*(np.asarray(p, dtype=float) for p in (u, theta, h, c)))]
+        shape = np.broadcast(u, theta, h, c).shape
+        result = {name: np.empty(len(points[0])) for field in self.fields for name in (field, field + '_error')}
+        for start in range(0, len(points[0]), chunk_size):
+            part = [p[start:start + chunk_size] for p in points]
+            flat, weight = stencil(self.axes, part, self.method)
+            cells = cell_index(self.axes, part)
+            for field in self.fields:
+                result[field][start:start + chunk_size] = np.einsum('ij,ij->j', self.values[field].ravel()[flat], weight)
+                result[field + '_error'][start:start + chunk_size] = self.errors[field][cells]
+        return {name: values.reshape(shape) for name, values in result.items()}
+
+    # Function to save the grid compactly (compressed, with 32-bit summaries unless float32=False)
+    def save(self, path, float32=True):
+        dtype = np.float32 if float32 else np.float64
+        arrays = {f'axis_{name}': axis for name, axis in zip(SURROGATE_PARAMETERS, self.axes)}
+        arrays.update({f'value_{field}': self.values[field].astype(dtype) for field in self.fields})
+        arrays.update({f'error_{field}': self.errors[field].astype(np.float32) for field in self.fields})
+        np.savez_compressed(path, method=self.method, fields=list(self.fields), **arrays)
+
+# Function to load a surrogate saved with Surrogate.save
+def load_surrogate(path):
+    with np.load(path) as data:
+        fields = [str(field) for field in data['fields']]
+        axes = [data[f'axis_{name}'] for name in SURROGATE_PARAMETERS]
+        values = {field: data[f'value_{field}'].astype(float) for field in fields}
+        errors = {field: data[f'error_{field}'].astype(float) for field in fields}
+        return Surrogate(axes, values, errors, str(data['method']))
+
+# Function to build a surrogate of the drag summaries over the given axis values
+# Every axis needs at least two increasing values. After each sweep the interpolation is
+# checked against solves at all cell centres; a cell fails when its error exceeds
+# atol + rtol * |value| in any field or cannot be measured, and every failing cell has its
+# interval halved along the axis with the largest bending estimate. This repeats until every
+# cell passes, after max_rounds refinements or once the grid would exceed max_points points.
+def build_surrogate(u, theta, h, c, fields=('R', 'T'), method='cubic', rtol=1e-3, atol=1e-3, max_rounds=8,
+                    max_points=10 ** 6, accuracy='loose', processes=None, A=atmosphere.A, m=atmosphere.m):
+    axes = [np.unique(np.asarray(axis, dtype=float)) for axis in (u, theta, h, c)]
+    if any(len(axis) < 2 for axis in axes):
+        raise ValueError("Every surrogate axis needs at least two values")
+
+    # One pool of worker processes for every sweep of the build (none for a serial build)
+    with nullcontext() if processes == 1 else Pool(processes) as pool:
+        options = {'accuracy': accuracy, 'processes': processes, 'A': A, 'm': m, 'pool': pool}
+        values = sweep_grid(axes, fields, **options)
+        old_centres = old_truth = None
+
+        for refinement in range(max_rounds + 1):
+            # Validate every cell at its centre, reusing the centres of cells that were not split
+            centres = [0.5 * (axis[:-1] + axis[1:]) for axis in axes]
+            truth = sweep_grid(centres, fields, old_centres, old_truth, **options)
+            mesh = np.meshgrid(*centres, indexing='ij')
+            errors = {field: np.abs(interpolate(axes, values[field], mesh, method) - truth[field]) for field in fields}
+            excess = np.max([errors[field] / (atol + rtol * np.abs(truth[field])) for field in fields], axis=0)
+            failing = ~(excess <= 1)  # Cells whose error could not be measured (NaN) fail too
+            if not np.any(failing) or refinement == max_rounds:
+                break
+
+            # Halve the failing cells along their most bent axis
+            indicators = np.max([bending(axes, values[field]) / (atol + rtol * np.abs(truth[field])) for field in fields], axis=0)
+            split_axis = np.argmax(indicators, axis=0)
+            cells = np.nonzero(failing)
+            new_axes = []
+            for d, axis in enumerate(axes):
+                intervals = np.unique(cells[d][split_axis[cells] == d])
+                new_axes.append(np.union1d(axis, centres[d][intervals]))
+            if np.prod([len(axis) for axis in new_axes]) > max_points:
+                break
+            values = sweep_grid(new_axes, fields, axes, values, **options)
+            old_centres, old_truth = centres, truth
+            axes = new_axes
+
+    return Surrogate(axes, values, errors, method)
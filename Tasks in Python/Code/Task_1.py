@@ -1,28 +1,165 @@
 # Required libraries
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.widgets import Slider
+from Atmosphere_Extension import DP_A, DP_B, DP_E, hermite_interpolate, hermite_root
+from Task_2 import range_of_projectile
 
-# Function to calculate the projectile motion trajectory
-def projectile_motion(theta, u, g, h, dt=0.01):
+# Function to find where the Euler recurrence leaves the ground, without sampling the trajectory
+# The update (vy -= g*dt, then y += vy*dt) has the closed form
+# y_n = h + uy*n*dt - g*dt**2*n*(n+1)/2, so the last step above ground is the floor
+# of the positive root of that quadratic in n. Returns that step and the fraction of
+# the next step taken before impact; all arguments (including dt) may be arrays.
+def euler_landing(uy, g, h, dt):
+    a = 0.5 * g * dt ** 2
+    b = uy * dt - a
+    n_root = (b + np.sqrt(b ** 2 + 4 * a * h)) / (2 * a)
+    n_last = np.maximum(np.floor(n_root), 0).astype(np.int64)
+
+    def y_step(n):
+        return h + uy * n * dt - a * n * (n + 1)
+
+    # Correct any rounding in the root so that y_step(n_last) >= 0 > y_step(n_last + 1)
+    n_last -= (y_step(n_last) < 0) & (n_last > 0)
+    n_last += y_step(n_last + 1) >= 0
+
+    # Interpolate the crossing inside the step that leaves the ground
+    y_a = y_step(n_last)
+    y_b = y_step(n_last + 1)
+    return n_last, y_a / (y_a - y_b)
+
+# Function to calculate many projectile trajectories at once
+# theta, u, g and h may be scalars or arrays (broadcast together, one entry per shot).
+# Every trajectory is stored back to back in flat x, y, t buffers; the samples of shot k
+# are x[offsets[k]:offsets[k + 1]] and the last sample of each shot is its exact ground crossing.
+def projectile_motion_batch(theta, u, g, h, dt=0.01):
+    theta, u, g, h = np.broadcast_arrays(*(np.atleast_1d(np.asarray(a, dtype=float)) for a in (theta, u, g, h)))
+    theta_rad = np.deg2rad(theta)  # Convert angles to radians
+    ux = u * np.cos(theta_rad)  # Initial horizontal velocity components
+    uy = u * np.sin(theta_rad)  # Initial vertical velocity components
+
+    # Last step above ground and the fraction of the final step taken before impact
+    n_last, frac = euler_landing(uy, g, h, dt)
+    has_crossing = frac > 0  # False only when a sample already lies exactly on the ground
+    a = 0.5 * g * dt ** 2
+
+    # Preallocate the flat buffers and the offsets that index them
+    counts = n_last + 1 + has_crossing
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    total = offsets[-1]
+    shot = np.repeat(np.arange(len(counts)), counts)  # Shot index of every sample
+    n = (np.arange(total) - offsets[shot]).astype(float)  # Step index of every sample
+
+    x = np.empty(total)
+    y = np.empty(total)
+    t = np.empty(total)
+    np.multiply(n, dt, out=t)
+    np.multiply(ux[shot], t, out=x)
+    np.multiply(uy[shot], t, out=y)
+    y += h[shot] - a[shot] * n * (n + 1)
+
+    # Replace the last sample of each shot with the exact ground crossing
+    last = offsets[1:][has_crossing] - 1
+    t_hit = (n_last + frac)[has_crossing] * dt
+    t[last] = t_hit
+    x[last] = ux[has_crossing] * t_hit
+    y[last] = 0.0
+
+    return x, y, t, offsets
+
+# Function to calculate one projectile trajectory with an adaptive embedded Runge-Kutta pair
+# Dormand-Prince 5(4) steps are sized so that the estimated local error stays below tol
+# (relative to the state, and absolute for components below 1), starting from a step of dt.
+# The ground impact is found by Newton's method on the cubic Hermite interpolant inside the
+# final step, so the last sample is the exact crossing. Returns the accepted samples and the
+# number of accepted and rejected steps, right-hand side evaluations and the sum of the
+# local error estimates of the position.
+def projectile_motion_adaptive(theta, u, g, h, tol=1e-6, dt=0.01):
     theta_rad = np.deg2rad(theta)  # Convert angle to radians
-    ux = u * np.cos(theta_rad)  # Initial horizontal velocity component
-    uy = u * np.sin(theta_rad)  # Initial vertical velocity component
-    x = [0.0]  # List to store x-coordinates (horizontal distance)
-    y = [h]    # List to store y-coordinates (vertical distance)
-    t = [0.0]  # List to store time steps
-    vx = ux    # Horizontal velocity (constant in the absence of air resistance)
-    vy = uy    # Vertical velocity (changes due to gravity)
-
-    # Loop to calculate projectile motion until the projectile hits the ground
-    while y[-1] >= 0:
-        vy -= g * dt  # Update vertical velocity due to gravity
-        x.append(x[-1] + vx * dt)  # Update horizontal position
-        y.append(y[-1] + vy * dt)  # Update vertical position
-        t.append(t[-1] + dt)  # Update time
-
-    # Convert lists to NumPy arrays and return x and y coordinates
-    return np.array(x), np.array(y)
+    z = np.array([[u * np.cos(theta_rad)], [u * np.sin(theta_rad)], [0.0], [h]], dtype=float)  # State [vx, vy, x, y]
+
+    def derivatives(z):
+        return np.array([np.zeros(1), np.full(1, -g), z[0], z[1]])
+
+    f = derivatives(z)
+    t = [0.0]
+    x = [0.0]
+    y = [float(h)]
+    stats = {'steps': 0, 'rejected': 0, 'nfev': 1, 'error_estimate': 0.0}
+
+    while True:
+        # Dormand-Prince stages; the last one is the derivative at the new state
+        stages = [f]
+        for row in DP_A[1:]:
+            stages.append(derivatives(z + dt * sum(a * K for a, K in zip(row, stages) if a)))
+        stats['nfev'] += 6
+        z_new = z + dt * sum(b * K for b, K in zip(DP_B, stages) if b)
+        err = dt * sum(e * K for e, K in zip(DP_E, stages) if e)
+        err_norm = np.sqrt(np.mean((err / (tol + tol * np.maximum(np.abs(z), np.abs(z_new)))) ** 2))
+        with np.errstate(divide='ignore'):
+            factor = min(max(0.9 * err_norm ** -0.2, 0.2), 5.0)
+
+        # Reject the step and retry with a smaller one
+        if err_norm > 1:
+            stats['rejected'] += 1
+            dt *= factor
+            continue
+        stats['steps'] += 1
+        stats['error_estimate'] += float(np.hypot(err[2, 0], err[3, 0]))
+
+        # Ground impact inside this step: finish on the exact crossing
+        if z_new[3, 0] < 0:
+            s = hermite_root(3, z, z_new, f, stages[-1], dt)
+            z_hit = hermite_interpolate(z, z_new, f, stages[-1], dt, s)
+            t.append(t[-1] + s[0] * dt)
+            x.append(z_hit[2, 0])
+            y.append(0.0)
+            break
+
+        z, f = z_new, stages[-1]
+        t.append(t[-1] + dt)
+        x.append(z[2, 0])
+        y.append(z[3, 0])
+        dt *= factor
+
+    return np.array(x), np.array(y), np.array(t), stats
+
+# Function to compare the adaptive stepper with Euler for the same landing-point error
+# The error of both is measured against the analytic range of Task 2. Euler is run for many
+# step sizes at once through its closed form, and the largest step that lands within the
+# target error (tol times the range, or the adaptive error if that is larger) is reported.
+# The step sizes default to 321 values spaced logarithmically from 0.1 s down to 1e-9 s.
+def compare_with_euler(theta, u, g, h, tol=1e-6, dt_values=None):
+    if dt_values is None:
+        dt_values = np.logspace(-1, -9, 321)
+    R = range_of_projectile(u, theta, h, g)
+    x, y, t, stats = projectile_motion_adaptive(theta, u, g, h, tol)
+    error_adaptive = abs(x[-1] - R)
+    target = max(tol * R, error_adaptive)
+
+    # Euler landing points for every step size, without sampling any trajectory
+    theta_rad = np.deg2rad(theta)
+    n_last, frac = euler_landing(u * np.sin(theta_rad), g, h, dt_values)
+    error_euler = np.abs(u * np.cos(theta_rad) * (n_last + frac) * dt_values - R)
+    within = np.flatnonzero(error_euler <= target)
+    i = within[0] if len(within) else len(dt_values) - 1
+    return {
+        'R': R,  # Analytic range
+        'error_adaptive': error_adaptive,  # Landing-point error of the adaptive stepper
+        'steps_adaptive': stats['steps'] + stats['rejected'],  # Steps attempted by the adaptive stepper
+        'nfev_adaptive': stats['nfev'],  # Right-hand side evaluations of the adaptive stepper
+        'dt_euler': dt_values[i] if len(within) else np.nan,  # Largest Euler step within the target error
+        'error_euler': error_euler[i],  # Landing-point error of Euler with that step
+        'steps_euler': int(n_last[i]) + 1,  # Euler steps (one right-hand side evaluation each)
+    }
+
+# Function to calculate the projectile motion trajectory
+# With tol, the adaptive stepper is used instead of Euler (dt is then its first step)
+def projectile_motion(theta, u, g, h, dt=0.01, tol=None):
+    if tol is not None:
+        x, y, t, stats = projectile_motion_adaptive(theta, u, g, h, tol, dt)
+        return x, y
+    x, y, t, offsets = projectile_motion_batch(theta, u, g, h, dt)  # Single shot through the batched engine
+    return x, y
 
 # Initial parameters
 initial_theta = 45.0  # Initial launch angle in degrees
@@ -31,18 +168,39 @@ g = 9.81              # Acceleration due to gravity in m/s^2
 h = 2.0               # Initial height of the projectile in meters
 dt = 0.01             # Time step for the simulation
 
-# Calculate the trajectory for the initial parameters
-x, y = projectile_motion(initial_theta, initial_u, g, h, dt)
-
-# Create a plot to visualize the projectile motion
-fig, ax = plt.subplots()
-plt.subplots_adjust(bottom=0.25)  # Adjust the plot to make space for sliders
-trajectory, = ax.plot(x, y, label='Projectile Path')  # Plot the trajectory
-ax.set_xlabel('Horizontal Distance (m)')  # Label for the x-axis
-ax.set_ylabel('Vertical Distance (m)')    # Label for the y-axis
-ax.set_title('Projectile Motion')         # Title of the plot
-plt.legend()  # Display the legend
-plt.grid(True)  # Display a grid
-
-# Show the plot
-plt.show()
+# Function to calculate the numbers shown by this task
+# With tol, the adaptive stepper's step statistics and its comparison with Euler are shown too
+def summary(theta=initial_theta, u=initial_u, g=g, h=h, dt=dt, tol=None):
+    if tol is None:
+        x, y, t, offsets = projectile_motion_batch(theta, u, g, h, dt)
+        return {'R': x[-1], 'T': t[-1], 'steps': len(t) - 1}
+    x, y, t, stats = projectile_motion_adaptive(theta, u, g, h, tol, dt)
+    comparison = compare_with_euler(theta, u, g, h, tol)
+    return {'R': x[-1], 'T': t[-1], **stats, 'R_error': comparison['error_adaptive'],
+            'euler_steps': comparison['steps_euler'], 'euler_dt': comparison['dt_euler']}
+
+# Function to plot the trajectory
+def plot(theta=initial_theta, u=initial_u, g=g, h=h, dt=dt, tol=None, out=None, show=True):
+    import matplotlib.pyplot as plt
+
+    # Calculate the trajectory for the given parameters
+    x, y = projectile_motion(theta, u, g, h, dt, tol)
+
+    # Create a plot to visualize the projectile motion
+    fig, ax = plt.subplots()
+    plt.subplots_adjust(bottom=0.25)  # Adjust the plot to make space for sliders
+    trajectory, = ax.plot(x, y, label='Projectile Path')  # Plot the trajectory
+    ax.set_xlabel('Horizontal Distance (m)')  # Label for the x-axis
+    ax.set_ylabel('Vertical Distance (m)')    # Label for the y-axis
+    ax.set_title('Projectile Motion')         # Title of the plot
+    plt.legend()  # Display the legend
+    plt.grid(True)  # Display a grid
+
+    # Save and/or show the plot
+    if out:
+        plt.savefig(out)
+    if show:
+        plt.show()
+
+if __name__ == '__main__':
+    plot()
@@ -1,6 +1,6 @@
 # Required libraries
 import numpy as np
-import matplotlib.pyplot as plt
+import Atmosphere_Extension as atmosphere
 
 # Constants
 g = 9.81        # Acceleration due to gravity (m/s^2)
@@ -9,12 +9,12 @@ Y = 300         # Vertical height of target (m)
 u_given = 150   # Given launch speed (m/s)
 
 # Function to calculate the minimum launch speed required to hit the target
-def calculate_minimum_launch_speed(X, Y):
+def calculate_minimum_launch_speed(X, Y, g=g):
     u_min = np.sqrt(g * (Y + np.sqrt(X ** 2 + Y ** 2)))
     return u_min
 
 # Function to calculate the two possible launch angles for a given speed to hit the target
-def calculate_launch_angles(u, X, Y):
+def calculate_launch_angles(u, X, Y, g=g):
     discriminant = u ** 4 - g * (g * X ** 2 + 2 * u ** 2 * Y)
     if discriminant < 0:
         raise ValueError("No real solutions for the given parameters.")
@@ -27,8 +27,112 @@ def calculate_min_speed_angle(X, Y):
     theta_min = np.arctan((Y + np.sqrt(X ** 2 + Y ** 2)) / X)
     return theta_min
 
+# Function to solve the targeting problem for whole arrays of targets and speeds at once
+# X, Y and u may be arrays (broadcast together). Unreachable targets get NaN angles
+# and a False entry in the reachable mask instead of raising. Angles are in radians.
+def launch_angles_batch(X, Y, u, g=g):
+    X, Y, u = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (X, Y, u)))
+    discriminant = u ** 4 - g * (g * X ** 2 + 2 * u ** 2 * Y)
+    reachable = discriminant >= 0
+    root = np.sqrt(np.where(reachable, discriminant, np.nan))  # NaN marks the unreachable targets
+    return {
+        'theta_low': np.arctan((u ** 2 - root) / (g * X)),  # Lower launch angle
+        'theta_high': np.arctan((u ** 2 + root) / (g * X)),  # Higher launch angle
+        'u_min': calculate_minimum_launch_speed(X, Y, g),  # Minimum launch speed
+        'theta_min': calculate_min_speed_angle(X, Y),  # Launch angle for the minimum speed
+        'reachable': reachable,
+    }
+
+# Function to solve the same targeting problem with drag (atmosphere model) by shooting
+# Drag only lowers the trajectory, so both roots lie between the vacuum launch angles.
+# A coarse batched scan of that interval finds the highest pass over the target and a
+# bracket on each side of it; both roots of every target are then refined together by
+# Newton's method, with the slope of the miss from the solver's forward sensitivities, kept
+# inside its bracket (steps leaving it fall back to regula falsi with the Illinois modification).
+# Each scan or iteration is one batched integration up to x = X. The sea-level drag
+# constant k = Cd * A * rho_0 / (2 * m) and the scale height H may be arrays. A root is
+# accepted once the miss at the target is below tol times the target distance; targets
+# out of reach with drag (or not converged after max_iter) get NaN angles.
+def launch_angles_drag(X, Y, u, k, H=atmosphere.H, accuracy='tight', tol=1e-7, max_iter=40, n_scan=9):
+    X, Y, u, k, H = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (X, Y, u, k, H)))
+    shape = X.shape
+    vacuum = launch_angles_batch(X, Y, u, atmosphere.g)
+    X, Y, u, k, H, lo, hi = (np.ravel(a) for a in (X, Y, u, k, H, vacuum['theta_low'], vacuum['theta_high']))
+    scale = tol * np.hypot(X, Y)
+
+    # Function to calculate how far above (positive) or below the target trajectory i passes
+    # Trajectories that drop far below the target before getting there count as infinitely far below
+    # With slope=True the derivative of the miss with respect to the angle (per radian) is returned too
+    def miss(theta, i, slope=False):
+        result = atmosphere.solve_projectile_batch(u[i], np.degrees(theta), 0, accuracy=accuracy, k=k[i], H=H[i],
+                                                   x_target=X[i], y_floor=Y[i] - np.hypot(X[i], Y[i]), sensitivities=('theta',) if slope else False)
+        y = result['y_target']
+        F = np.where(np.isnan(y), -np.inf, y - Y[i])
+        if slope:
+            return F, np.degrees(result['gradient']['y_target'][:, 0])
+        return F
+
+    # Coarse scan of the vacuum interval of every target that is reachable without drag
+    i = np.flatnonzero(vacuum['reachable'].ravel())
+    angles = lo[i, None] + np.linspace(0, 1, n_scan) * (hi - lo)[i, None]
+    F = miss(angles.ravel(), np.repeat(i, n_scan)).reshape(len(i), n_scan)
+    rows = np.arange(len(i))
+    peak = np.argmax(F, axis=1)
+    reached = F[rows, peak] > -scale[i]
+    i, angles, F, rows, peak = i[reached], angles[reached], F[reached], rows[:reached.sum()], peak[reached]
+
+    # Brackets: the last sample below the target before the peak and the first one after it.
+    # Without a sample below the target on one side, the vacuum angle itself is the root.
+    below = F < 0
+    cols = np.arange(n_scan)
+    left = below & (cols < peak[:, None])
+    right = below & (cols > peak[:, None])
+    j_low = np.where(left.any(axis=1), n_scan - 1 - np.argmax(left[:, ::-1], axis=1), 0)
+    j_high = np.where(right.any(axis=1), np.argmax(right, axis=1), n_scan - 1)
+    a = np.concatenate([angles[rows, j_low], angles[rows, j_high]])
+    Fa = np.concatenate([F[rows, j_low], F[rows, j_high]])
+    b = np.concatenate([angles[rows, np.minimum(j_low + 1, peak)], angles[rows, np.maximum(j_high - 1, peak)]])
+    Fb = np.concatenate([F[rows, np.minimum(j_low + 1, peak)], F[rows, np.maximum(j_high - 1, peak)]])
+    index = np.concatenate([i, i])
+    branch = np.repeat([0, 1], len(i))  # 0 for the low root, 1 for the high root
+
+    dFb = np.full(len(b), np.nan)  # Slope of the miss at b (unknown for the scanned angles)
+
+    result = np.full((2, len(X)), np.nan)
+    done = np.abs(Fa) < scale[index]
+    result[branch[done], index[done]] = a[done]
+    active = np.flatnonzero(~done)
+    for _ in range(max_iter):
+        if len(active) == 0:
+            break
+        a_, b_, Fa_, Fb_, dFb_ = a[active], b[active], Fa[active], Fb[active], dFb[active]
+
+        # Newton step from the latest angle while it stays inside the bracket, otherwise a
+        # secant step between the bracket ends (bisection while one end has not reached the target)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = b_ - Fb_ / dFb_
+            c = np.where(np.isfinite(Fa_) & np.isfinite(Fb_), b_ - Fb_ * (b_ - a_) / (Fb_ - Fa_), 0.5 * (a_ + b_))
+        inside = (newton - a_) * (newton - b_) < 0
+        c = np.where(inside, newton, c)
+        Fc, dFc = miss(c, index[active], slope=True)
+        converged = np.abs(Fc) < scale[index[active]]
+        result[branch[active[converged]], index[active[converged]]] = c[converged]
+
+        # Keep the root bracketed; halve the value kept at a stale end (Illinois)
+        flip = np.sign(Fc) != np.sign(Fb_)
+        a[active] = np.where(flip, b_, a_)
+        Fa[active] = np.where(flip, Fb_, 0.5 * Fa_)
+        b[active], Fb[active], dFb[active] = c, Fc, dFc
+        active = active[~converged]
+
+    return {
+        'theta_low': result[0].reshape(shape),  # Lower launch angle with drag
+        'theta_high': result[1].reshape(shape),  # Higher launch angle with drag
+        'reachable': np.isfinite(result).any(axis=0).reshape(shape),
+    }
+
 # Function to generate the trajectory data points for a given angle and speed
-def generate_trajectory(theta, v0, X_target, Y_target, num_points=500):
+def generate_trajectory(theta, v0, X_target, Y_target, num_points=500, g=g):
     t_flight = 2 * v0 * np.sin(theta) / g  # Total flight time
     t = np.linspace(0, t_flight, num_points)  # Time array
     x = v0 * np.cos(theta) * t  # Horizontal distance as a function of time
@@ -46,35 +150,55 @@ def generate_trajectory(theta, v0, X_target, Y_target, num_points=500):
     
     return x, y
 
-# Calculate the minimum launch speed required to reach the target
-u_min = calculate_minimum_launch_speed(X, Y)
+# Function to calculate the numbers shown by this task (angles in degrees)
+def summary(X=X, Y=Y, u_given=u_given, g=g):
+    theta_high, theta_low = calculate_launch_angles(u_given, X, Y, g)
+    return {
+        'u_min': calculate_minimum_launch_speed(X, Y, g),
+        'theta_min': np.degrees(calculate_min_speed_angle(X, Y)),
+        'theta_low': np.degrees(theta_low),
+        'theta_high': np.degrees(theta_high),
+    }
+
+# Function to plot the low, high and minimum-speed trajectories to the target
+def plot(X=X, Y=Y, u_given=u_given, g=g, out=None, show=True):
+    import matplotlib.pyplot as plt
+
+    # Calculate the minimum launch speed required to reach the target
+    u_min = calculate_minimum_launch_speed(X, Y, g)
+
+    # Calculate the two possible launch angles for the given speed
+    theta_high, theta_low = calculate_launch_angles(u_given, X, Y, g)
 
-# Calculate the two possible launch angles for the given speed
-theta_high, theta_low = calculate_launch_angles(u_given, X, Y)
+    # Calculate the launch angle for the minimum speed
+    theta_min = calculate_min_speed_angle(X, Y)
 
-# Calculate the launch angle for the minimum speed
-theta_min = calculate_min_speed_angle(X, Y)
+    # Generate the trajectory for the low angle with the given speed
+    x_low, y_low = generate_trajectory(theta_low, u_given, X, Y, g=g)
 
-# Generate the trajectory for the low angle with the given speed
-x_low, y_low = generate_trajectory(theta_low, u_given, X, Y)
+    # Generate the trajectory for the high angle with the given speed
+    x_high, y_high = generate_trajectory(theta_high, u_given, X, Y, g=g)
 
-# Generate the trajectory for the high angle with the given speed
-x_high, y_high = generate_trajectory(theta_high, u_given, X, Y)
+    # Generate the trajectory for the minimum launch speed
+    x_min, y_min = generate_trajectory(theta_min, u_min, X, Y, g=g)
 
-# Generate the trajectory for the minimum launch speed
-x_min, y_min = generate_trajectory(theta_min, u_min, X, Y)
+    # Plot the trajectories
+    plt.figure(figsize=(10, 6))
+    plt.plot(x_low, y_low, label='Low ball', color='orange')  # Low angle trajectory
+    plt.plot(x_high, y_high, label='High ball', color='blue')  # High angle trajectory
+    plt.plot(x_min, y_min, label='Min u', color='gray')  # Minimum speed trajectory
+    plt.scatter([X], [Y], color='yellow', label='Target (X,Y)', zorder=5)  # Mark the target position
+    plt.xlabel('x / m')  # Label for the x-axis
+    plt.ylabel('y above launch height / m')  # Label for the y-axis
+    plt.title('Projectile to hit (X,Y)')  # Title of the plot
+    plt.legend()  # Display the legend
+    plt.grid()  # Display a grid
 
-# Plot the trajectories
-plt.figure(figsize=(10, 6))
-plt.plot(x_low, y_low, label='Low ball', color='orange')  # Low angle trajectory
-plt.plot(x_high, y_high, label='High ball', color='blue')  # High angle trajectory
-plt.plot(x_min, y_min, label='Min u', color='gray')  # Minimum speed trajectory
-plt.scatter([X], [Y], color='yellow', label='Target (X,Y)', zorder=5)  # Mark the target position
-plt.xlabel('x / m')  # Label for the x-axis
-plt.ylabel('y above launch height / m')  # Label for the y-axis
-plt.title('Projectile to hit (X,Y)')  # Title of the plot
-plt.legend()  # Display the legend
-plt.grid()  # Display a grid
+    # Save and/or show the plot
+    if out:
+        plt.savefig(out)
+    if show:
+        plt.show()
 
-# Show the plot
-plt.show()
+if __name__ == '__main__':
+    plot()
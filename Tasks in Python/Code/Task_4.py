@@ -1,6 +1,6 @@
 # Required libraries
 import numpy as np
-import matplotlib.pyplot as plt
+import Atmosphere_Extension as atmosphere
 
 # Function to calculate the optimal angle for maximum range
 def optimal_angle(u, h, g):
@@ -18,6 +18,57 @@ def range_maximum(u, h, g):
     theta_max = optimal_angle(u, h, g)
     return (u ** 2 / g) * np.sqrt(1 + (2 * g * h) / (u ** 2))
 
+# Function to calculate the optimal angle and maximum range with drag (atmosphere model)
+# u, h, the sea-level drag constant k = Cd * A * rho_0 / (2 * m) and the scale height H may be
+# arrays; every problem is solved together. A coarse scan brackets the best angle, then a
+# golden-section search refines it: each iteration keeps one interior point, and its range,
+# from the previous iteration, so only one batched integration is needed per iteration.
+# Returns the optimal angles in radians, like optimal_angle, and the maximum ranges.
+def optimal_angle_drag(u, h, k, H=atmosphere.H, tol=1e-3, accuracy='tight', n_scan=12):
+    u, h, k, H = np.broadcast_arrays(*(np.atleast_1d(np.asarray(a, dtype=float)) for a in (u, h, k, H)))
+
+    def range_drag(theta):
+        return atmosphere.solve_projectile_batch(u, theta, h, accuracy=accuracy, k=k, H=H)['R']
+
+    # Coarse scan of every problem at once to bracket the maximum
+    angles = np.linspace(0, 89, n_scan)
+    scan = atmosphere.solve_projectile_batch(u[:, None], angles, h[:, None], accuracy=accuracy,
+                                             k=k[:, None], H=H[:, None])['R'].reshape(len(u), n_scan)
+    best = np.argmax(scan, axis=1)
+    a = angles[np.maximum(best - 1, 0)]
+    b = angles[np.minimum(best + 1, n_scan - 1)]
+
+    # Golden-section search in degrees
+    invphi = (np.sqrt(5) - 1) / 2
+    c = b - invphi * (b - a)
+    d = a + invphi * (b - a)
+    R_c = range_drag(c)
+    R_d = range_drag(d)
+    while np.max(b - a) > np.degrees(tol):
+        left = R_c > R_d  # The maximum lies in [a, d]
+        a, b = np.where(left, a, c), np.where(left, d, b)
+        new = np.where(left, b - invphi * (b - a), a + invphi * (b - a))
+        R_new = range_drag(new)
+        c, d, R_c, R_d = (np.where(left, new, d), np.where(left, c, new),
+                          np.where(left, R_new, R_d), np.where(left, R_c, R_new))
+
+    theta = np.where(R_c > R_d, c, d)
+    return np.radians(theta), np.maximum(R_c, R_d)
+
+# Function to precompute optimal angles and maximum ranges with drag over a (u, h, k) grid
+def build_optimal_angle_table(u_values, h_values, k_values, H=atmosphere.H, tol=1e-3, accuracy='tight'):
+    axes = [np.asarray(v, dtype=float) for v in (u_values, h_values, k_values)]
+    U, Hh, K = np.meshgrid(*axes, indexing='ij')
+    theta, R = optimal_angle_drag(U.ravel(), Hh.ravel(), K.ravel(), H, tol, accuracy)
+    return {'u': axes[0], 'h': axes[1], 'k': axes[2], 'theta': theta.reshape(U.shape), 'R': R.reshape(U.shape)}
+
+# Function to look up the optimal angle (radians) and maximum range with drag by trilinear interpolation
+# The table can be stored with np.savez(path, **table) and reloaded with dict(np.load(path)).
+def query_optimal_angle_table(table, u, h, k):
+    from Parameter_Sweep import grid_interpolate  # Imported here so the task does not load the sweep machinery
+    axes = [table['u'], table['h'], table['k']]
+    return grid_interpolate(axes, table['theta'], [u, h, k]), grid_interpolate(axes, table['R'], [u, h, k])
+
 # Function to generate the trajectory data points for a given angle
 def trajectory(u, theta, h, g):
     theta_rad = np.radians(theta)
@@ -28,7 +79,8 @@ def trajectory(u, theta, h, g):
     return x, y
 
 # Function to plot the trajectories for both the given angle and the optimal angle
-def plot_trajectories(u, h, g, given_theta):
+def plot_trajectories(u, h, g, given_theta, out=None, show=True):
+    import matplotlib.pyplot as plt
     theta_optimal = np.degrees(optimal_angle(u, h, g))  # Calculate the optimal angle in degrees
     x_given, y_given = trajectory(u, given_theta, h, g)  # Trajectory for the given angle
     x_optimal, y_optimal = trajectory(u, theta_optimal, h, g)  # Trajectory for the optimal angle
@@ -41,7 +93,12 @@ def plot_trajectories(u, h, g, given_theta):
     plt.ylabel('Vertical Distance (m)')  # Label for the y-axis
     plt.legend()  # Display the legend
     plt.grid(True)  # Display a grid
-    plt.show()  # Show the plot
+
+    # Save and/or show the plot
+    if out:
+        plt.savefig(out)
+    if show:
+        plt.show()
 
 # Parameters
 u = 10             # Initial speed (m/s)
@@ -49,5 +106,17 @@ h = 2              # Initial height (m)
 g = 9.81           # Acceleration due to gravity (m/s^2)
 given_theta = 60   # Given launch angle (degrees)
 
-# Plot the trajectories for the given and optimal angles
-plot_trajectories(u, h, g, given_theta)
+# Function to calculate the numbers shown by this task (angles in degrees)
+def summary(u=u, h=h, g=g, given_theta=given_theta):
+    return {
+        'theta_optimal': np.degrees(optimal_angle(u, h, g)),
+        'R_max': range_maximum(u, h, g),
+        'R_given': range_of_trajectory(u, given_theta, h, g),
+    }
+
+# Function to plot the trajectories for the given and optimal angles
+def plot(u=u, h=h, g=g, given_theta=given_theta, out=None, show=True):
+    plot_trajectories(u, h, g, given_theta, out, show)
+
+if __name__ == '__main__':
+    plot()
@@ -1,20 +1,23 @@
 # Required libraries
+import functools
 import numpy as np
-import matplotlib.pyplot as plt
+import Atmosphere_Extension as atmosphere
+from Task_3 import launch_angles_drag  # Drag-aware targeting, shared with Task 3
 
 # Constants
 g = 9.81  # Acceleration due to gravity (m/s^2)
 X = 1000  # Target horizontal distance (m)
 Y = 300   # Target vertical height (m)
 u_given = 150  # Given initial launch speed (m/s)
+ENVELOPE_CACHE_SIZE = 32  # Drag envelopes kept by drag_envelope
 
 # Function to calculate the minimum launch speed required to hit the target (X, Y)
-def calculate_minimum_launch_speed(X, Y):
+def calculate_minimum_launch_speed(X, Y, g=g):
     u_min = np.sqrt(g * (Y + np.sqrt(X ** 2 + Y ** 2)))  # Minimum speed calculation
     return u_min
 
 # Function to calculate the possible launch angles for a given speed to hit the target
-def calculate_launch_angles(u, X, Y):
+def calculate_launch_angles(u, X, Y, g=g):
     discriminant = u ** 4 - g * (g * X ** 2 + 2 * u ** 2 * Y)  # Discriminant for solving quadratic equation
     if discriminant < 0:
         raise ValueError("No real solutions for the given parameters.")  # No valid angle if discriminant is negative
@@ -28,55 +31,201 @@ def calculate_min_speed_angle(X, Y):
     return theta_min
 
 # Function to generate the trajectory for a given angle and speed
-def generate_trajectory(theta, v0, num_points=500):
+def generate_trajectory(theta, v0, num_points=500, g=g):
     t_flight = 2 * v0 * np.sin(theta) / g  # Total flight time
     t = np.linspace(0, t_flight, num_points)  # Time array
     x = v0 * np.cos(theta) * t  # Horizontal distance as a function of time
     y = v0 * np.sin(theta) * t - 0.5 * g * t ** 2  # Vertical distance as a function of time
     return x, y
 
+# Function to generate the trajectory with drag (atmosphere model) for a given angle and speed up to x = X
+# The heights are NaN beyond where the trajectory lands.
+def generate_drag_trajectory(theta, v0, X, k, num_points=500):
+    x = np.linspace(0, X, num_points)
+    y = atmosphere.solve_projectile_batch(v0, np.degrees(theta), 0, k=k, x_target=X, x_grid=x)['y_grid'][0]
+    y[0] = 0.0  # The launch point, which the grid search does not record
+    return x, y
+
 # Function to generate the bounding parabola for the maximum range trajectory
-def generate_bounding_parabola(u, X_max, num_points=500):
+# With a sea-level drag constant k = Cd * A * rho_0 / (2 * m) > 0 the drag envelope of the
+# atmosphere model is drawn instead (NaN beyond its reach), traced with the model's gravity.
+def generate_bounding_parabola(u, X_max, num_points=500, g=g, k=0.0, H=atmosphere.H):
     x = np.linspace(0, X_max, num_points)  # Horizontal distance array
+    if k > 0:
+        return x, envelope_height(drag_envelope(u, k, H), x)
     y = (u**2 / (2 * g)) - (g / (2 * u**2)) * x**2  # Bounding parabola equation
     return x, y
 
+# Function to trace the envelope of all trajectories with drag at launch speed u (from the origin)
+# Trajectories are integrated in batches and sampled where they pass n_x evenly spaced
+# positions out to the vacuum reach at y_floor; the envelope is the highest of them at every
+# position (the vertical shot's apex at x = 0). Starting from a fan of n_initial angles over
+# [0, 90] degrees, the middle angle of every pair of neighbouring angles still to check is
+# added. At each position the height is close to a parabola in the angle near its peak, so
+# the parabola through the three heights estimates how far the envelope points of the pair
+# still fall below the true envelope; pairs where that exceeds tol times the apex height are
+# split in two and checked again. The most recent envelopes are cached (with read-only
+# arrays), so tracing one of them again costs nothing.
+def drag_envelope(u, k, H=atmosphere.H, y_floor=0.0, tol=1e-3, n_x=1024, n_initial=9, max_trajectories=1025, accuracy='loose'):
+    return cached_envelope(float(u), float(k), float(H), float(y_floor), tol, n_x, n_initial, max_trajectories, accuracy)
+
+# Function to trace a drag envelope, remembering the ENVELOPE_CACHE_SIZE most recently used
+@functools.lru_cache(maxsize=ENVELOPE_CACHE_SIZE)
+def cached_envelope(u, k, H, y_floor, tol, n_x, n_initial, max_trajectories, accuracy):
+    g = atmosphere.g
+    x = np.linspace(0, u / g * np.sqrt(u ** 2 - 2 * g * y_floor), n_x)  # Drag only shortens the reach
+    unreached = y_floor - u ** 2 / g  # Height recorded where a trajectory never gets, far below the floor
+
+    # Function to sample the trajectories launched at the given angles (degrees) on the grid
+    def trace(theta):
+        r = atmosphere.solve_projectile_batch(u, theta, 0, accuracy=accuracy, k=k, H=H, x_target=x[-1], y_floor=y_floor, x_grid=x)
+        y = np.nan_to_num(r['y_grid'], nan=unreached)
+        y[:, 0] = np.where(theta == 90, r['apogee'], 0.0)  # Only the vertical shot comes back to x = 0
+        return y
+
+    theta = np.linspace(0, 90, n_initial)
+    y = trace(theta)
+    scale = tol * y[-1, 0]  # Tolerance relative to the apex height of the vertical shot
+    intervals = np.stack([np.arange(n_initial - 1), np.arange(1, n_initial)], axis=1)  # Rows of neighbouring angles to check
+    while len(intervals) and len(theta) + len(intervals) <= max_trajectories:
+        theta_mid = 0.5 * (theta[intervals[:, 0]] + theta[intervals[:, 1]])
+        y_mid = trace(theta_mid)
+        y_a, y_b = y[intervals[:, 0]], y[intervals[:, 1]]
+
+        # Peak of the parabola through the three heights, where it lies between the outer angles.
+        # Where an outer trajectory never gets there (next to the vertical shot), the rise of
+        # the middle one above both is the estimate instead.
+        best = np.maximum(y_mid, np.maximum(y_a, y_b))
+        curvature = y_a - 2 * y_mid + y_b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            peak = y_mid - (y_b - y_a) ** 2 / (8 * curvature)
+        inside = (curvature < 0) & (np.abs(y_a - y_b) <= -2 * curvature) & (np.minimum(y_a, y_b) > unreached)
+        error = np.max(np.where(inside, peak - best, y_mid - np.maximum(y_a, y_b)), axis=1)
+
+        mid = len(theta) + np.arange(len(theta_mid))  # Rows of the new trajectories
+        theta = np.concatenate([theta, theta_mid])
+        y = np.vstack([y, y_mid])
+        refine = error > scale
+        intervals = np.concatenate([np.stack([intervals[refine, 0], mid[refine]], axis=1),
+                                    np.stack([mid[refine], intervals[refine, 1]], axis=1)])
+
+    # Merge the trajectories into the highest height at every grid position; the reach is
+    # where the envelope drops through y_floor
+    envelope = np.max(y, axis=0)
+    below = np.flatnonzero(envelope < y_floor)
+    if len(below):
+        i = below[0]
+        x_reach = x[i - 1] + (x[i] - x[i - 1]) * (envelope[i - 1] - y_floor) / (envelope[i - 1] - envelope[i])
+    else:
+        x_reach = x[-1]
+    result = {
+        'x': x,  # Grid positions, sorted
+        'y': envelope,  # Highest height reached at each position
+        'x_reach': x_reach,  # Furthest horizontal distance reached at y_floor
+        'y_floor': y_floor,
+        'theta': np.sort(theta),  # Launch angles traced (degrees)
+        'n_trajectories': len(theta),
+    }
+    for name in ('x', 'y', 'theta'):
+        result[name].setflags(write=False)  # Shared by every caller of the cache
+    return result
+
+# Function to calculate the height of an envelope at horizontal distances X (NaN outside its reach)
+# The grid is sorted, so each distance is located by binary search and interpolated linearly.
+def envelope_height(envelope, X):
+    x, y = envelope['x'], envelope['y']
+    X = np.asarray(X, dtype=float)
+    i = np.clip(np.searchsorted(x, X, side='right') - 1, 0, len(x) - 2)
+    w = (X - x[i]) / (x[i + 1] - x[i])
+    with np.errstate(invalid='ignore'):
+        height = y[i] + w * (y[i + 1] - y[i])
+    return np.where((X >= 0) & (X <= envelope['x_reach']), height, np.nan)
+
+# Function to test whether targets (X, Y) can be hit with drag at launch speed u
+# Only the region above the envelope's y_floor is traced, so deeper targets count as out of reach.
+def reachable_drag(X, Y, u, k, H=atmosphere.H, y_floor=0.0, tol=1e-3):
+    envelope = drag_envelope(u, k, H, y_floor, tol)
+    with np.errstate(invalid='ignore'):
+        return (np.asarray(Y) >= y_floor) & (np.asarray(Y) <= envelope_height(envelope, X))
+
 # Function to calculate the angle for maximum range (which is 45 degrees)
 def calculate_max_range_angle():
     return np.pi / 4  # 45 degrees in radians
 
-# Calculate the minimum launch speed to hit the target
-u_min = calculate_minimum_launch_speed(X, Y)
-
-# Calculate the launch angles for the given speed
-theta_high, theta_low = calculate_launch_angles(u_given, X, Y)
-
-# Calculate the launch angle for the minimum speed
-theta_min = calculate_min_speed_angle(X, Y)
-
-# Calculate the angle for maximum range
-theta_max_range = calculate_max_range_angle()
-
-# Generate trajectories for different launch angles
-x_low, y_low = generate_trajectory(theta_low, u_given)  # Trajectory for the low launch angle
-x_high, y_high = generate_trajectory(theta_high, u_given)  # Trajectory for the high launch angle
-x_min, y_min = generate_trajectory(theta_min, u_min)  # Trajectory for the minimum launch speed angle
-x_max_range, y_max_range = generate_trajectory(theta_max_range, u_given)  # Trajectory for the max range angle
-
-# Generate the bounding parabola for the given speed
-x_bound, y_bound = generate_bounding_parabola(u_given, max(x_max_range))
-
-# Plotting the trajectories
-plt.figure(figsize=(10, 6))
-plt.plot(x_low, y_low, label='Low ball', color='orange')  # Low angle trajectory
-plt.plot(x_high, y_high, label='High ball', color='blue')  # High angle trajectory
-plt.plot(x_min, y_min, label='Min u', color='gray')  # Minimum speed trajectory
-plt.plot(x_max_range, y_max_range, label='Max range', color='red')  # Maximum range trajectory
-plt.plot(x_bound, y_bound, label='Bounding parabola', color='purple', linestyle='dashed')  # Bounding parabola
-plt.scatter([X], [Y], color='yellow', label='Target (X,Y)', zorder=5)  # Mark the target point
-plt.xlabel('x / m')  # Label for the x-axis
-plt.ylabel('y above launch height / m')  # Label for the y-axis
-plt.title('Projectile to hit (X,Y)')  # Title of the plot
-plt.legend()  # Display the legend
-plt.grid()  # Display a grid
-plt.show()  # Show the plot
+# Function to calculate the numbers shown by this task (angles in degrees)
+# With a drag constant k > 0 the reach with drag, the reachability of the target and the
+# launch angles that hit it with drag (NaN where it is out of reach) are added.
+def summary(X=X, Y=Y, u_given=u_given, g=g, k=0.0):
+    theta_high, theta_low = calculate_launch_angles(u_given, X, Y, g)
+    result = {
+        'u_min': calculate_minimum_launch_speed(X, Y, g),
+        'theta_min': np.degrees(calculate_min_speed_angle(X, Y)),
+        'theta_low': np.degrees(theta_low),
+        'theta_high': np.degrees(theta_high),
+        'R_max': u_given ** 2 / g,  # Maximum range on level ground at 45 degrees
+    }
+    if k > 0:
+        result['R_max_drag'] = drag_envelope(u_given, k)['x_reach']  # Maximum range on level ground with drag
+        result['reachable_drag'] = bool(reachable_drag(X, Y, u_given, k))
+        angles = launch_angles_drag(X, Y, u_given, k)
+        result['theta_low_drag'] = float(np.degrees(angles['theta_low']))
+        result['theta_high_drag'] = float(np.degrees(angles['theta_high']))
+    return result
+
+# Function to plot the trajectories to the target together with the bounding parabola
+def plot(X=X, Y=Y, u_given=u_given, g=g, k=0.0, out=None, show=True):
+    import matplotlib.pyplot as plt
+
+    # Calculate the minimum launch speed to hit the target
+    u_min = calculate_minimum_launch_speed(X, Y, g)
+
+    # Calculate the launch angles for the given speed
+    theta_high, theta_low = calculate_launch_angles(u_given, X, Y, g)
+
+    # Calculate the launch angle for the minimum speed
+    theta_min = calculate_min_speed_angle(X, Y)
+
+    # Calculate the angle for maximum range
+    theta_max_range = calculate_max_range_angle()
+
+    # Generate trajectories for different launch angles
+    x_low, y_low = generate_trajectory(theta_low, u_given, g=g)  # Trajectory for the low launch angle
+    x_high, y_high = generate_trajectory(theta_high, u_given, g=g)  # Trajectory for the high launch angle
+    x_min, y_min = generate_trajectory(theta_min, u_min, g=g)  # Trajectory for the minimum launch speed angle
+    x_max_range, y_max_range = generate_trajectory(theta_max_range, u_given, g=g)  # Trajectory for the max range angle
+
+    # Generate the bounding parabola for the given speed
+    x_bound, y_bound = generate_bounding_parabola(u_given, max(x_max_range), g=g)
+
+    # Plotting the trajectories
+    plt.figure(figsize=(10, 6))
+    plt.plot(x_low, y_low, label='Low ball', color='orange')  # Low angle trajectory
+    plt.plot(x_high, y_high, label='High ball', color='blue')  # High angle trajectory
+    plt.plot(x_min, y_min, label='Min u', color='gray')  # Minimum speed trajectory
+    plt.plot(x_max_range, y_max_range, label='Max range', color='red')  # Maximum range trajectory
+    plt.plot(x_bound, y_bound, label='Bounding parabola', color='purple', linestyle='dashed')  # Bounding parabola
+    if k > 0:
+        x_drag, y_drag = generate_bounding_parabola(u_given, max(x_max_range), k=k)  # Envelope of the trajectories with drag
+        plt.plot(x_drag, y_drag, label='Drag envelope', color='green', linestyle='dashed')
+
+        # Trajectories with drag that hit the target, where it is in reach
+        angles = launch_angles_drag(X, Y, u_given, k)
+        for name, color in (('theta_low', 'orange'), ('theta_high', 'blue')):
+            if np.isfinite(angles[name]):
+                x_drag, y_drag = generate_drag_trajectory(angles[name], u_given, X, k)
+                plt.plot(x_drag, y_drag, label=f"{'Low' if name == 'theta_low' else 'High'} ball with drag", color=color, linestyle='dotted')
+    plt.scatter([X], [Y], color='yellow', label='Target (X,Y)', zorder=5)  # Mark the target point
+    plt.xlabel('x / m')  # Label for the x-axis
+    plt.ylabel('y above launch height / m')  # Label for the y-axis
+    plt.title('Projectile to hit (X,Y)')  # Title of the plot
+    plt.legend()  # Display the legend
+    plt.grid()  # Display a grid
+
+    # Save and/or show the plot
+    if out:
+        plt.savefig(out)
+    if show:
+        plt.show()
+
+if __name__ == '__main__':
+    plot()
@@ -1,51 +1,105 @@
 # Required libraries
 import numpy as np
-import matplotlib.pyplot as plt
 
 # Function to compute the z function used in trajectory length calculation
 def z_func(z):
     return 0.5 * np.log(np.abs(np.sqrt(1 + z ** 2) + z)) + 0.5 * z * np.sqrt(1 + z ** 2)
 
+# Descriptor for an array field that is computed on first access and then cached in its slot
+class LazyField:
+    def __init__(self, compute):
+        self.compute = compute
+        self.slot = '_' + compute.__name__
+
+    def __get__(self, p, owner):
+        if p is None:
+            return self
+        value = getattr(p, self.slot)
+        if value is None:
+            value = self.compute(p)
+            setattr(p, self.slot, value)
+        return value
+
+# Properties of the projectile motion for one launch, or for arrays of theta and u at once
+# Scalar fields (range, time of flight, apogee, arc length, maximum range trajectory) are
+# computed up front with the shape of the broadcast inputs. The sampled fields x, t, y, vx,
+# vy, v, phi and s_numeric gain a trailing axis of N points and are only computed when read.
+# Fields can be read as attributes or, like a dict, as p['R'].
+class Trajectory:
+    __slots__ = ('theta', 'u', 'g', 'h', 'N', 'theta_rad', 'R', 'T', 'ta', 'xa', 'ya', 's', 'theta_m', 'T_m', 'R_m',
+                 '_x', '_t', '_y', '_vx', '_vy', '_v', '_phi', '_s_numeric')
+
+    def __init__(self, theta, u, g, h, N):
+        self.theta, self.u, self.g, self.h, self.N = theta, u, g, h, N
+        theta_rad = self.theta_rad = np.radians(theta)  # Convert angle to radians
+
+        # Calculate range and total time of flight of the projectile
+        self.R = ((u ** 2) / g) * (np.sin(theta_rad) * np.cos(theta_rad) + np.cos(theta_rad) * np.sqrt(np.sin(theta_rad) ** 2 + 2 * g * h / (u ** 2)))
+        self.T = self.R / (u * np.cos(theta_rad))
+
+        # Compute apogee
+        self.ta = u * np.sin(theta_rad) / g
+        self.xa = (u ** 2) * np.sin(2 * theta_rad) / (2 * g)
+        self.ya = h + ((u ** 2) / (2 * g)) * np.sin(theta_rad) ** 2
+
+        # Compute the analytical length of the trajectory
+        a = (u ** 2) / (g * (1 + (np.tan(theta_rad)) ** 2))
+        b = np.tan(theta_rad)
+        c = np.tan(theta_rad) - g * self.R * (1 + (np.tan(theta_rad)) ** 2) / (u ** 2)
+        self.s = a * (z_func(b) - z_func(c))
+
+        # Compute properties for the maximum range trajectory
+        self.theta_m = np.degrees(np.arcsin(np.sqrt(1 / (2 + 2 * g * h / (u ** 2)))))  # Optimal launch angle for maximum range
+        self.T_m = (u / g) * np.sqrt(2 + 2 * g * h / (u ** 2))  # Total time of flight for maximum range
+        self.R_m = ((u ** 2) / g) * np.sqrt(1 + 2 * g * h / (u ** 2))  # Maximum range
+
+        # Sampled fields are filled in on first access
+        self._x = self._t = self._y = self._vx = self._vy = self._v = self._phi = self._s_numeric = None
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    # Function to add a trailing sample axis to a per-launch value
+    def column(self, value):
+        return np.expand_dims(value, -1)
+
+    @LazyField
+    def x(self):
+        return np.linspace(0, self.R, self.N, axis=-1)  # Horizontal distances
+
+    @LazyField
+    def t(self):
+        return self.x / self.column(self.u * np.cos(self.theta_rad))  # Time of flight for each horizontal distance
+
+    @LazyField
+    def y(self):
+        tan = self.column(np.tan(self.theta_rad))
+        return self.column(self.h) + self.x * tan - self.column(self.g / (2 * self.u ** 2)) * (self.x ** 2) * (1 + tan ** 2)  # Vertical distance
+
+    @LazyField
+    def vx(self):
+        return self.column(self.u * np.cos(self.theta_rad)) * np.ones(self.N)  # Horizontal velocity
+
+    @LazyField
+    def vy(self):
+        return self.column(self.u * np.sin(self.theta_rad)) - self.column(self.g) * self.t  # Vertical velocity
+
+    @LazyField
+    def v(self):
+        return np.sqrt(self.vx ** 2 + self.vy ** 2)  # Total velocity
+
+    @LazyField
+    def phi(self):
+        return np.arctan2(self.vy, self.vx)  # Angle of velocity vector
+
+    @LazyField
+    def s_numeric(self):
+        return np.sum(np.sqrt(np.diff(self.x) ** 2 + np.diff(self.y) ** 2), axis=-1)  # Numerical length of the trajectory
+
 # Function to calculate various properties of the projectile motion
+# theta and u may be arrays, giving range, apogee and arc length as whole curves in one call
 def pcalc(theta, u, g, h, N):
-    p = {}
-    theta_rad = np.radians(theta)  # Convert angle to radians
-
-    # Calculate range of the projectile
-    p['R'] = ((u ** 2) / g) * (np.sin(theta_rad) * np.cos(theta_rad) + np.cos(theta_rad) * np.sqrt(np.sin(theta_rad) ** 2 + 2 * g * h / (u ** 2)))
-
-    # Compute the trajectory points
-    p['x'] = np.linspace(0, p['R'], N)  # Horizontal distances
-    p['t'] = p['x'] / (u * np.cos(theta_rad))  # Time of flight for each horizontal distance
-    p['T'] = p['R'] / (u * np.cos(theta_rad))  # Total time of flight
-    p['y'] = h + p['x'] * np.tan(theta_rad) - (g / (2 * u ** 2)) * (p['x'] ** 2) * (1 + np.tan(theta_rad) ** 2)  # Vertical distance
-    
-    # Compute apogee and velocity components
-    p['ta'] = u * np.sin(theta_rad) / g
-    p['xa'] = (u ** 2) * np.sin(2 * theta_rad) / (2 * g)
-    p['ya'] = h + ((u ** 2) / (2 * g)) * np.sin(theta_rad) ** 2
-    p['vx'] = u * np.cos(theta_rad) * np.ones(N)  # Horizontal velocity
-    p['vy'] = u * np.sin(theta_rad) - g * p['t']  # Vertical velocity
-    p['v'] = np.sqrt(p['vx'] ** 2 + p['vy'] ** 2)  # Total velocity
-    p['phi'] = np.arctan2(p['vy'], p['vx'])  # Angle of velocity vector
-
-    # Compute the analytical length of the trajectory
-    a = (u ** 2) / (g * (1 + (np.tan(theta_rad)) ** 2))
-    b = np.tan(theta_rad)
-    c = np.tan(theta_rad) - g * p['R'] * (1 + (np.tan(theta_rad)) ** 2) / (u ** 2)
-    p['s'] = a * (z_func(b) - z_func(c))
-
-    # Compute the numerical length of the trajectory using numerical integration
-    dx = np.diff(p['x'])
-    dy = np.diff(p['y'])
-    p['s_numeric'] = np.sum(np.sqrt(dx ** 2 + dy ** 2))
-
-    # Compute properties for the maximum range trajectory
-    p['theta_m'] = np.degrees(np.arcsin(np.sqrt(1 / (2 + 2 * g * h / (u ** 2)))))  # Optimal launch angle for maximum range
-    p['T_m'] = (u / g) * np.sqrt(2 + 2 * g * h / (u ** 2))  # Total time of flight for maximum range
-    p['R_m'] = ((u ** 2) / g) * np.sqrt(1 + 2 * g * h / (u ** 2))  # Maximum range
-
-    return p
+    return Trajectory(theta, u, g, h, N)
 
 # Parameters for the projectile
 theta = 60  # Given launch angle (degrees)
@@ -54,33 +108,57 @@ g = 9.81    # Acceleration due to gravity (m/s^2)
 h = 2       # Initial height (m)
 N = 500     # Number of points in trajectory calculation
 
-# Calculate properties for the given and optimal trajectories
-p_given = pcalc(theta, u, g, h, N)
-theta_optimal = np.degrees(np.arcsin(np.sqrt(1 / (2 + 2 * g * h / (u ** 2)))))  # Optimal angle for maximum range
-p_optimal = pcalc(theta_optimal, u, g, h, N)
-
-# Plotting the trajectories
-plt.figure(figsize=(12, 6))
-plt.plot(p_given['x'], p_given['y'], label=f'Trajectory: θ={theta}°')
-plt.plot(p_optimal['x'], p_optimal['y'], label=f'Max Range Trajectory: θ={theta_optimal:.2f}°', linestyle='--')
-plt.xlabel('Horizontal Distance (m)')
-plt.ylabel('Vertical Distance (m)')
-plt.title('Projectile Trajectories')
-plt.legend()
-plt.grid(True)
-plt.show()
-
-# Output the calculated properties
-print(f"Given Trajectory:")
-print(f"  Range: {p_given['R']:.2f} m")
-print(f"  Time of flight: {p_given['T']:.2f} s")
-print(f"  Apogee: ({p_given['xa']:.2f}, {p_given['ya']:.2f}) m")
-print(f"  Length of trajectory (analytical): {p_given['s']:.2f} m")
-print(f"  Length of trajectory (numeric): {p_given['s_numeric']:.2f} m")
-
-print(f"Optimal Trajectory for Max Range:")
-print(f"  Range: {p_optimal['R']:.2f} m")
-print(f"  Time of flight: {p_optimal['T']:.2f} s")
-print(f"  Apogee: ({p_optimal['xa']:.2f}, {p_optimal['ya']:.2f}) m")
-print(f"  Length of trajectory (analytical): {p_optimal['s']:.2f} m")
-print(f"  Length of trajectory (numeric): {p_optimal['s_numeric']:.2f} m")
+# Function to calculate the given trajectory and the maximum range trajectory
+def given_and_optimal(theta=theta, u=u, g=g, h=h, N=N):
+    p_given = pcalc(theta, u, g, h, N)
+    theta_optimal = np.degrees(np.arcsin(np.sqrt(1 / (2 + 2 * g * h / (u ** 2)))))  # Optimal angle for maximum range
+    p_optimal = pcalc(theta_optimal, u, g, h, N)
+    return p_given, theta_optimal, p_optimal
+
+# Function to calculate the numbers shown by this task
+def summary(theta=theta, u=u, g=g, h=h, N=N):
+    p_given, theta_optimal, p_optimal = given_and_optimal(theta, u, g, h, N)
+    return {
+        'R': p_given['R'], 'T': p_given['T'], 'xa': p_given['xa'], 'ya': p_given['ya'], 's': p_given['s'],
+        'theta_m': theta_optimal, 'R_m': p_optimal['R'], 'T_m': p_optimal['T'], 's_m': p_optimal['s'],
+    }
+
+# Function to plot the given and maximum range trajectories
+def plot(theta=theta, u=u, g=g, h=h, N=N, out=None, show=True):
+    import matplotlib.pyplot as plt
+    p_given, theta_optimal, p_optimal = given_and_optimal(theta, u, g, h, N)
+
+    # Plotting the trajectories
+    plt.figure(figsize=(12, 6))
+    plt.plot(p_given['x'], p_given['y'], label=f'Trajectory: θ={theta}°')
+    plt.plot(p_optimal['x'], p_optimal['y'], label=f'Max Range Trajectory: θ={theta_optimal:.2f}°', linestyle='--')
+    plt.xlabel('Horizontal Distance (m)')
+    plt.ylabel('Vertical Distance (m)')
+    plt.title('Projectile Trajectories')
+    plt.legend()
+    plt.grid(True)
+
+    # Save and/or show the plot
+    if out:
+        plt.savefig(out)
+    if show:
+        plt.show()
+
+if __name__ == '__main__':
+    plot()
+    p_given, theta_optimal, p_optimal = given_and_optimal()
+
+    # Output the calculated properties
+    print(f"Given Trajectory:")
+    print(f"  Range: {p_given['R']:.2f} m")
+    print(f"  Time of flight: {p_given['T']:.2f} s")
+    print(f"  Apogee: ({p_given['xa']:.2f}, {p_given['ya']:.2f}) m")
+    print(f"  Length of trajectory (analytical): {p_given['s']:.2f} m")
+    print(f"  Length of trajectory (numeric): {p_given['s_numeric']:.2f} m")
+
+    print(f"Optimal Trajectory for Max Range:")
+    print(f"  Range: {p_optimal['R']:.2f} m")
+    print(f"  Time of flight: {p_optimal['T']:.2f} s")
+    print(f"  Apogee: ({p_optimal['xa']:.2f}, {p_optimal['ya']:.2f}) m")
+    print(f"  Length of trajectory (analytical): {p_optimal['s']:.2f} m")
+    print(f"  Length of trajectory (numeric): {p_optimal['s_numeric']:.2f} m")
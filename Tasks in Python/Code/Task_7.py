@@ -1,14 +1,71 @@
 # Required libraries
+import os
 import numpy as np
-import matplotlib.pyplot as plt
 
 # Constants
 g = 10     # Acceleration due to gravity (m/s^2)
 v0 = 10    # Initial velocity (m/s)
 h = 0      # Initial height (m)
 
+# Function to find the times at which the distance from the launch point is stationary
+# d(r^2)/dt = 0 is the cubic (g^2/2) t^3 - (3/2) g v0 sin(theta) t^2 + (v0^2 - g h) t + h v0 sin(theta) = 0.
+# In units of v0 / g it only depends on sin(theta) and eta = g h / v0^2, and it is solved in
+# closed form (trigonometric method) for whole broadcast grids of theta, v0, g and h at once.
+# Returns the local maximum and the local minimum of the range; both are NaN where the range
+# keeps growing with time (below the critical angle).
+def range_extremum_times(theta, v0=v0, g=g, h=h):
+    sin_theta = np.sin(np.radians(theta))
+    eta = g * h / v0 ** 2
+
+    # Depressed cubic z^3 + p z + q = 0 with tau = z + sin(theta)
+    a, b, c = -3 * sin_theta, 2 * (1 - eta), 2 * eta * sin_theta
+    p = b - a ** 2 / 3
+    q = 2 * a ** 3 / 27 - a * b / 3 + c
+    three_roots = 4 * p ** 3 + 27 * q ** 2 < 0  # Two turning points besides the first one
+
+    # Of the three roots, the middle one is the local maximum of the range and the largest the local minimum
+    with np.errstate(invalid='ignore', divide='ignore'):
+        m = 2 * np.sqrt(-p / 3)
+        phi = np.arccos(np.clip(3 * q / (p * m), -1, 1)) / 3
+    tau_min = m * np.cos(phi) - a / 3
+    tau_max = m * np.cos(phi - 2 * np.pi / 3) - a / 3
+    scale = v0 / g
+    return np.where(three_roots, tau_max * scale, np.nan), np.where(three_roots, tau_min * scale, np.nan)
+
+# Function to find the critical launch angle (degrees) above which the range stops growing monotonically
+# The cubic gains its turning points when its discriminant changes sign; the angle is found by
+# bisection for every (v0, g, h) at once (70.53 degrees when h = 0). NaN where no angle below 90 degrees has them.
+def critical_angle(v0=v0, g=g, h=h, iterations=60):
+    eta = np.asarray(g * h / v0 ** 2, dtype=float)
+    lo = np.zeros_like(eta)
+    hi = np.full_like(eta, 90.0)
+    reaches = np.isfinite(range_extremum_times(hi, 1, 1, eta)[0])
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        above = np.isfinite(range_extremum_times(mid, 1, 1, eta)[0])
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+    return np.where(reaches, hi, np.nan)
+
+# Function to compute the range extrema for whole grids of theta, v0, g and h in one pass
+# All inputs broadcast together; positions and ranges are NaN where the range is monotonic.
+def range_extrema(theta, v0=v0, g=g, h=h):
+    theta_rad = np.radians(theta)
+    t_max, t_min = range_extremum_times(theta, v0, g, h)
+
+    # Positions at the exact extremum times
+    x_max = v0 * np.cos(theta_rad) * t_max
+    y_max = h + v0 * np.sin(theta_rad) * t_max - 0.5 * g * t_max ** 2
+    x_min = v0 * np.cos(theta_rad) * t_min
+    y_min = h + v0 * np.sin(theta_rad) * t_min - 0.5 * g * t_min ** 2
+    return {
+        't_max': t_max, 'x_max': x_max, 'y_max': y_max, 'r_max': np.hypot(x_max, y_max),
+        't_min': t_min, 'x_min': x_min, 'y_min': y_min, 'r_min': np.hypot(x_min, y_min),
+        'monotonic': np.isnan(t_max),  # True where the range keeps growing
+    }
+
 # Function to compute projectile motion properties
-def projectile_motion(theta):
+def projectile_motion(theta, v0=v0, g=g, h=h):
     theta_rad = np.radians(theta)  # Convert angle to radians
 
     # Time of flight
@@ -19,58 +76,70 @@ def projectile_motion(theta):
     
     # Horizontal and vertical positions
     x = v0 * np.cos(theta_rad) * t
-    y = v0 * np.sin(theta_rad) * t - 0.5 * g * t**2
-
-    # Compute times for maximum and minimum range
-    sin_theta = np.sin(theta_rad)
-    t1 = (3 * v0 * sin_theta) / (2 * g)
-    t2 = (3 * v0 * sin_theta) / (2 * g) - np.sqrt((v0 * sin_theta)**2 - (8 * g * h) / 9) / g
-
-    # Maximum range calculations
-    x_max = v0 * np.cos(theta_rad) * t1
-    y_max = v0 * np.sin(theta_rad) * t1 - 0.5 * g * t1**2
-    r_max = np.sqrt(x_max**2 + y_max**2)
-
-    # Minimum range calculations
-    x_min = v0 * np.cos(theta_rad) * t2
-    y_min = v0 * np.sin(theta_rad) * t2 - 0.5 * g * t2**2
-    r_min = np.sqrt(x_min**2 + y_min**2)
-
-    return t, x, y, x_max, y_max, x_min, y_min, r_max, r_min
-
-# Number of angles to evaluate
-n = 5
-angles = np.linspace(70.5, 80.5, n)
-
-# Plotting projectile paths
-plt.figure(figsize=(10, 6))
-
-for theta in angles:
-    t, x, y, x_max, y_max, x_min, y_min, r_max, r_min = projectile_motion(theta)
-    plt.plot(x, y, label=f'Projectile Path (θ={theta:.1f}°)')
-    plt.scatter([x_max], [y_max], color='red', marker='*', label='Maximum' if theta == angles[0] else "")
-    plt.scatter([x_min], [y_min], color='blue', marker='*', label='Minimum' if theta == angles[0] else "")
-
-plt.xlabel('Distance (m)')
-plt.ylabel('Height (m)')
-plt.legend()
-plt.grid(True)
-plt.title('Projectile Motion with Maxima and Minima')
-plt.show()
-
-# Plotting range over time
-plt.figure(figsize=(10, 6))
-
-for theta in angles:
-    t, x, y, x_max, y_max, x_min, y_min, r_max, r_min = projectile_motion(theta)
-    range_values = np.sqrt(x**2 + y**2)  # Compute range from horizontal and vertical positions
-    plt.plot(t, range_values, label=f'Projectile Range (θ={theta:.1f}°)')
-    plt.scatter([t[np.argmin(abs(range_values - r_max))]], [r_max], color='red', marker='*', label='Maximum' if theta == angles[0] else "")
-    plt.scatter([t[np.argmin(abs(range_values - r_min))]], [r_min], color='blue', marker='*', label='Minimum' if theta == angles[0] else "")
-
-plt.xlabel('Time (s)')
-plt.ylabel('Range (m)')
-plt.legend()
-plt.grid(True)
-plt.title('Range Over Time with Maxima and Minima')
-plt.show()
+    y = h + v0 * np.sin(theta_rad) * t - 0.5 * g * t**2
+
+    # Maximum and minimum range at their exact times
+    e = range_extrema(theta, v0, g, h)
+
+    return t, x, y, e['x_max'], e['y_max'], e['x_min'], e['y_min'], e['r_max'], e['r_min']
+
+# Angles to evaluate
+theta_start = 70.5  # First launch angle (degrees)
+theta_stop = 80.5   # Last launch angle (degrees)
+n = 5               # Number of angles to evaluate
+
+# Function to calculate the numbers shown by this task for every angle
+def summary(v0=v0, g=g, h=h, theta_start=theta_start, theta_stop=theta_stop, n=n):
+    angles = np.linspace(theta_start, theta_stop, n)
+    extrema = range_extrema(angles, v0, g, h)
+    return {'theta': angles, 'r_max': extrema['r_max'], 'r_min': extrema['r_min'], 'theta_critical': critical_angle(v0, g, h)}
+
+# Function to plot the paths and the range over time with their maxima and minima
+# With out, the two figures are saved with 'a' and 'b' appended to the file name.
+def plot(v0=v0, g=g, h=h, theta_start=theta_start, theta_stop=theta_stop, n=n, out=None, show=True):
+    import matplotlib.pyplot as plt
+    angles = np.linspace(theta_start, theta_stop, n)
+    stem, ext = os.path.splitext(out) if out else (None, None)
+
+    # Plotting projectile paths
+    plt.figure(figsize=(10, 6))
+
+    for theta in angles:
+        t, x, y, x_max, y_max, x_min, y_min, r_max, r_min = projectile_motion(theta, v0, g, h)
+        plt.plot(x, y, label=f'Projectile Path (θ={theta:.1f}°)')
+        plt.scatter([x_max], [y_max], color='red', marker='*', label='Maximum' if theta == angles[0] else "")
+        plt.scatter([x_min], [y_min], color='blue', marker='*', label='Minimum' if theta == angles[0] else "")
+
+    plt.xlabel('Distance (m)')
+    plt.ylabel('Height (m)')
+    plt.legend()
+    plt.grid(True)
+    plt.title('Projectile Motion with Maxima and Minima')
+    if out:
+        plt.savefig(f'{stem}a{ext}')
+    if show:
+        plt.show()
+
+    # Plotting range over time
+    plt.figure(figsize=(10, 6))
+
+    for theta in angles:
+        t, x, y, x_max, y_max, x_min, y_min, r_max, r_min = projectile_motion(theta, v0, g, h)
+        t_max, t_min = range_extremum_times(theta, v0, g, h)  # Exact times of the extrema
+        range_values = np.sqrt(x**2 + y**2)  # Compute range from horizontal and vertical positions
+        plt.plot(t, range_values, label=f'Projectile Range (θ={theta:.1f}°)')
+        plt.scatter([t_max], [r_max], color='red', marker='*', label='Maximum' if theta == angles[0] else "")
+        plt.scatter([t_min], [r_min], color='blue', marker='*', label='Minimum' if theta == angles[0] else "")
+
+    plt.xlabel('Time (s)')
+    plt.ylabel('Range (m)')
+    plt.legend()
+    plt.grid(True)
+    plt.title('Range Over Time with Maxima and Minima')
+    if out:
+        plt.savefig(f'{stem}b{ext}')
+    if show:
+        plt.show()
+
+if __name__ == '__main__':
+    plot()
@@ -1,7 +1,5 @@
 # Required libraries
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation, FFMpegWriter
+from Bounce_Engine import bounce_events, stream_bounces, animation_samples, terrain_bounce_events, sample_terrain_bounces, bounce_time_grid
 
 # Constants
 g = 9.81       # Acceleration due to gravity (m/s^2)
@@ -15,73 +13,71 @@ y0 = 10        # Initial vertical position (m)
 vx0 = 2        # Initial horizontal velocity (m/s)
 vy0 = 10       # Initial vertical velocity (m/s)
 
-# Lists to store the trajectory
-x = [x0]
-y = [y0]
+# Function to calculate the numbers shown by this task
+# Over a terrain (Terrain.Terrain) instead of flat ground, the height of the last bounce
+# is given instead of the limits after infinitely many bounces.
+def summary(g=g, dt=dt, N_bounces=N_bounces, e=e, x0=x0, y0=y0, vx0=vx0, vy0=vy0, terrain=None):
+    if terrain is not None:
+        events = terrain_bounce_events(x0, y0, vx0, vy0, g, e, N_bounces, terrain)
+        return {
+            't_final': events['t_hit'][-1],  # Time of the last bounce
+            'x_final': events['x_hit'][-1],  # Position of the last bounce
+            'y_final': events['y_hit'][-1],
+        }
+    events = bounce_events(x0, y0, vx0, vy0, g, e, N_bounces)
+    return {
+        't_final': events['t_hit'][-1],  # Time of the last bounce
+        'x_final': events['x_hit'][-1],  # Distance travelled by the last bounce
+        't_inf': events['t_inf'],  # Time after infinitely many bounces
+        'x_inf': events['x_inf'],  # Distance travelled after infinitely many bounces
+    }
 
-# Current state
-x_curr = x0
-y_curr = y0
-vx_curr = vx0
-vy_curr = vy0
-bounces = 0
+# Function to animate the bouncing ball, saving the video to out
+# A terrain (Terrain.Terrain) replaces the flat ground and is drawn under the trajectory
+def plot(g=g, dt=dt, N_bounces=N_bounces, e=e, x0=x0, y0=y0, vx0=vx0, vy0=vy0, out=None, show=True, terrain=None):
+    import matplotlib.pyplot as plt
+    from Animation_Tools import TrailAnimation
 
-# Simulation loop
-while bounces < N_bounces:
-    # Update positions and velocities
-    x_next = x_curr + vx_curr * dt
-    y_next = y_curr + vy_curr * dt - 0.5 * g * dt**2
-    vy_next = vy_curr - g * dt
+    # Jump from impact to impact in closed form, then stream the arcs sampled every dt,
+    # keeping four samples per video frame so memory does not grow with the number of steps
+    if terrain is None:
+        events = bounce_events(x0, y0, vx0, vy0, g, e, N_bounces)
+        t, x, y = animation_samples(stream_bounces(events, dt), fps=4 * 30)
+    else:
+        events = terrain_bounce_events(x0, y0, vx0, vy0, g, e, N_bounces, terrain)
+        t = bounce_time_grid(events, dt)
+        x, y = sample_terrain_bounces(events, t)
+        t, x, y = animation_samples([{'t': t, 'x': x, 'y': y}], fps=4 * 30)
 
-    # Handle bounce with ground
-    if y_next < 0:
-        y_next = 0
-        vy_next = -e * vy_curr  # Reverse and reduce vertical velocity
-        bounces += 1  # Increment bounce counter
+    # Set up the plot
+    fig, ax = plt.subplots()
+    if terrain is None:
+        ax.set_xlim(0, max(x))  # Set x-axis limits
+        ax.set_ylim(0, max(y) + 1)  # Set y-axis limits with a bit of extra space
+    else:
+        from Terrain import draw_terrain
+        ax.set_xlim(min(x), max(x))
+        ax.set_ylim(min(min(y), min(terrain.height([min(x), max(x)]))) - 1, max(y) + 1)
+        draw_terrain(ax, terrain, min(x), max(x), color='k')
+    line, = ax.plot([], [], 'b-', label='Projectile trajectory')  # Line plot for trajectory
+    point, = ax.plot([], [], 'ro')  # Point plot for the current position
+    ax.set_title('Projectile Trajectory with Bounces')
+    ax.set_xlabel('Horizontal Distance (m)')
+    ax.set_ylabel('Vertical Distance (m)')
+    ax.legend()
+    ax.grid()
 
-    # Append new values to trajectory lists
-    x.append(x_next)
-    y.append(y_next)
-    
-    # Update current state
-    x_curr = x_next
-    y_curr = y_next
-    vy_curr = vy_next
+    # Create the animation: 30 frames per simulated second, drawing only new path segments each frame
+    ani = TrailAnimation(fig, fps=30)
+    ani.add_track(line, point, t, x, y)
 
-# Convert lists to numpy arrays for plotting
-x = np.array(x)
-y = np.array(y)
+    # Save the animation to a video file
+    if out:
+        ani.save(out, bitrate=1800, metadata={'artist': 'Devansh Srivastava'})
 
-# Set up the plot
-fig, ax = plt.subplots()
-ax.set_xlim(0, max(x))  # Set x-axis limits
-ax.set_ylim(0, max(y) + 1)  # Set y-axis limits with a bit of extra space
-line, = ax.plot([], [], 'b-', label='Projectile trajectory')  # Line plot for trajectory
-point, = ax.plot([], [], 'ro')  # Point plot for the current position
-ax.set_title('Projectile Trajectory with Bounces')
-ax.set_xlabel('Horizontal Distance (m)')
-ax.set_ylabel('Vertical Distance (m)')
-ax.legend()
-ax.grid()
+    # Show the animation
+    if show:
+        ani.show()
 
-# Initialization function for animation
-def init():
-    line.set_data([], [])
-    point.set_data([], [])
-    return line, point
-
-# Animation function
-def animate(i):
-    line.set_data(x[:i+1], y[:i+1])  # Update trajectory line
-    point.set_data([x[i]], [y[i]])    # Update current position point
-    return line, point
-
-# Create the animation
-ani = FuncAnimation(fig, animate, init_func=init, frames=len(x), interval=20, blit=True)
-
-# Save the animation to a video file
-writer = FFMpegWriter(fps=30, metadata={'artist': 'Devansh Srivastava'}, bitrate=1800)
-ani.save("Task_8.mp4", writer=writer)
-
-# Show the plot
-plt.show()
+if __name__ == '__main__':
+    plot(out="Task_8.mp4")
@@ -1,7 +1,5 @@
 # Required libraries
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation, FFMpegWriter
+from Bounce_Engine import bounce_events, simulate_drag_bounces, stream_bounces, stream_drag_bounces, animation_samples, terrain_bounce_events, sample_terrain_bounces, bounce_time_grid
 
 # Constants
 g = 9.81       # Acceleration due to gravity (m/s^2)
@@ -16,123 +14,75 @@ y0 = 10        # Initial vertical position (m)
 vx0 = 2        # Initial horizontal velocity (m/s)
 vy0 = 10       # Initial vertical velocity (m/s)
 
-# Lists to store the trajectories
-x_drag_free = [x0]  # Trajectory without drag
-y_drag_free = [y0]  # Trajectory without drag
-x_drag = [x0]       # Trajectory with drag
-y_drag = [y0]       # Trajectory with drag
-
-# Current state for no drag trajectory
-x_curr_df = x0
-y_curr_df = y0
-vx_curr_df = vx0
-vy_curr_df = vy0
-
-# Current state for drag trajectory
-x_curr_drag = x0
-y_curr_drag = y0
-vx_curr_drag = vx0
-vy_curr_drag = vy0
-bounces_df = 0
-
-# Simulation loop for drag-free trajectory
-while bounces_df < N_bounces:
-    # Calculate next positions and velocities
-    x_next_df = x_curr_df + vx_curr_df * dt
-    y_next_df = y_curr_df + vy_curr_df * dt - 0.5 * g * dt**2
-    vy_next_df = vy_curr_df - g * dt
-
-    # Handle bounce with ground
-    if y_next_df < 0:
-        y_next_df = 0
-        vy_next_df = -e * vy_curr_df  # Reverse and reduce vertical velocity
-        bounces_df += 1  # Increment bounce counter
-
-    # Append new values to trajectory lists
-    x_drag_free.append(x_next_df)
-    y_drag_free.append(y_next_df)
-    
-    # Update current state
-    x_curr_df = x_next_df
-    y_curr_df = y_next_df
-    vy_curr_df = vy_next_df
-
-# Reset bounce counter for drag trajectory
-bounces_drag = 0
-
-# Simulation loop for trajectory with drag
-while bounces_drag < N_bounces:
-    # Calculate velocity magnitude and drag forces
-    v_curr_drag = np.sqrt(vx_curr_drag**2 + vy_curr_drag**2)
-    drag_fx = -c * v_curr_drag * vx_curr_drag
-    drag_fy = -c * v_curr_drag * vy_curr_drag
-    
-    # Calculate next positions and velocities
-    x_next_drag = x_curr_drag + vx_curr_drag * dt + 0.5 * drag_fx * dt**2
-    y_next_drag = y_curr_drag + vy_curr_drag * dt - 0.5 * g * dt**2 + 0.5 * drag_fy * dt**2
-    vx_next_drag = vx_curr_drag + drag_fx * dt
-    vy_next_drag = vy_curr_drag - g * dt + drag_fy * dt
-
-    # Handle bounce with ground
-    if y_next_drag < 0:
-        y_next_drag = 0
-        vy_next_drag = -e * vy_curr_drag  # Reverse and reduce vertical velocity
-        bounces_drag += 1  # Increment bounce counter
-
-    # Append new values to trajectory lists
-    x_drag.append(x_next_drag)
-    y_drag.append(y_next_drag)
-    
-    # Update current state
-    x_curr_drag = x_next_drag
-    y_curr_drag = y_next_drag
-    vx_curr_drag = vx_next_drag
-    vy_curr_drag = vy_next_drag
-
-# Convert lists to numpy arrays for plotting
-x_drag_free = np.array(x_drag_free)
-y_drag_free = np.array(y_drag_free)
-x_drag = np.array(x_drag)
-y_drag = np.array(y_drag)
-
-# Set up the plot
-fig, ax = plt.subplots()
-ax.set_xlim(0, max(max(x_drag_free), max(x_drag)))  # Set x-axis limits
-ax.set_ylim(0, max(max(y_drag_free), max(y_drag)) + 1)  # Set y-axis limits with a bit of extra space
-line_df, = ax.plot([], [], 'b-', label='Drag-Free Trajectory')  # Line plot for drag-free trajectory
-point_df, = ax.plot([], [], 'bo')  # Point plot for drag-free current position
-line_drag, = ax.plot([], [], 'r-', label='Trajectory with Drag')  # Line plot for trajectory with drag
-point_drag, = ax.plot([], [], 'ro')  # Point plot for drag trajectory current position
-ax.set_title('Projectile Trajectory Comparison: Drag-Free vs. With Drag')
-ax.set_xlabel('Horizontal Distance (m)')
-ax.set_ylabel('Vertical Distance (m)')
-ax.legend()
-ax.grid()
-
-# Initialization function for animation
-def init():
-    line_df.set_data([], [])
-    point_df.set_data([], [])
-    line_drag.set_data([], [])
-    point_drag.set_data([], [])
-    return line_df, point_df, line_drag, point_drag
-
-# Animation function
-def animate(i):
-    if i < len(x_drag_free):  # Ensure index is within bounds
-        line_df.set_data(x_drag_free[:i+1], y_drag_free[:i+1])
-        point_df.set_data([x_drag_free[i]], [y_drag_free[i]])
-    if i < len(x_drag):  # Ensure index is within bounds
-        line_drag.set_data(x_drag[:i+1], y_drag[:i+1])
-        point_drag.set_data([x_drag[i]], [y_drag[i]])
-    return line_df, point_df, line_drag, point_drag
-
-# Create the animation
-ani = FuncAnimation(fig, animate, init_func=init, frames=len(x_drag_free), interval=20, blit=True)
-
-# Save the animation to a video file
-writer = FFMpegWriter(fps=30, metadata={'artist': 'Devansh Srivastava'}, bitrate=1800)
-ani.save("Task_9.mp4", writer=writer)
-
-# Show the plot
-plt.show()
+# Function to calculate the numbers shown by this task (over a Terrain.Terrain instead of flat ground when given)
+def summary(g=g, dt=dt, N_bounces=N_bounces, e=e, c=c, x0=x0, y0=y0, vx0=vx0, vy0=vy0, terrain=None):
+    if terrain is None:
+        events_df = bounce_events(x0, y0, vx0, vy0, g, e, N_bounces)
+    else:
+        events_df = terrain_bounce_events(x0, y0, vx0, vy0, g, e, N_bounces, terrain)
+    sim_drag = simulate_drag_bounces(x0, y0, vx0, vy0, g, e, c, N_bounces, dt, record=False, terrain=terrain)
+    return {
+        't_final_drag_free': events_df['t_hit'][-1],  # Time of the last bounce without drag
+        'x_final_drag_free': events_df['x_hit'][-1],  # Distance travelled by then
+        't_final_drag': sim_drag['t_impact'][0, -1],  # Time of the last bounce with drag
+        'x_final_drag': sim_drag['x_impact'][0, -1],  # Distance travelled by then
+    }
+
+# Function to animate the bouncing balls with and without drag, saving the video to out
+# A terrain (Terrain.Terrain) replaces the flat ground and is drawn under the trajectories
+def plot(g=g, dt=dt, N_bounces=N_bounces, e=e, c=c, x0=x0, y0=y0, vx0=vx0, vy0=vy0, out=None, show=True, terrain=None):
+    import matplotlib.pyplot as plt
+    from Animation_Tools import TrailAnimation
+
+    # Both simulations are streamed in chunks and only four samples per video frame are kept,
+    # so memory does not grow with the number of steps however small dt is
+
+    # Drag-free trajectory: jump from impact to impact in closed form, then sample the arcs every dt
+    if terrain is None:
+        events_df = bounce_events(x0, y0, vx0, vy0, g, e, N_bounces)
+        t_drag_free, x_drag_free, y_drag_free = animation_samples(stream_bounces(events_df, dt), fps=4 * 30)
+    else:
+        events_df = terrain_bounce_events(x0, y0, vx0, vy0, g, e, N_bounces, terrain)
+        t = bounce_time_grid(events_df, dt)
+        x, y = sample_terrain_bounces(events_df, t)
+        t_drag_free, x_drag_free, y_drag_free = animation_samples([{'t': t, 'x': x, 'y': y}], fps=4 * 30)
+
+    # Trajectory with drag: RK4 with the impact interpolated inside the step
+    t_drag, x_drag, y_drag = animation_samples(stream_drag_bounces(x0, y0, vx0, vy0, g, e, c, N_bounces, dt, terrain=terrain), fps=4 * 30)
+
+    # Set up the plot
+    fig, ax = plt.subplots()
+    if terrain is None:
+        ax.set_xlim(0, max(max(x_drag_free), max(x_drag)))  # Set x-axis limits
+        ax.set_ylim(0, max(max(y_drag_free), max(y_drag)) + 1)  # Set y-axis limits with a bit of extra space
+    else:
+        from Terrain import draw_terrain
+        x_min, x_max = min(min(x_drag_free), min(x_drag)), max(max(x_drag_free), max(x_drag))
+        ax.set_xlim(x_min, x_max)
+        ax.set_ylim(min(min(y_drag_free), min(y_drag), min(terrain.height([x_min, x_max]))) - 1, max(max(y_drag_free), max(y_drag)) + 1)
+        draw_terrain(ax, terrain, x_min, x_max, color='k')
+    line_df, = ax.plot([], [], 'b-', label='Drag-Free Trajectory')  # Line plot for drag-free trajectory
+    point_df, = ax.plot([], [], 'bo')  # Point plot for drag-free current position
+    line_drag, = ax.plot([], [], 'r-', label='Trajectory with Drag')  # Line plot for trajectory with drag
+    point_drag, = ax.plot([], [], 'ro')  # Point plot for drag trajectory current position
+    ax.set_title('Projectile Trajectory Comparison: Drag-Free vs. With Drag')
+    ax.set_xlabel('Horizontal Distance (m)')
+    ax.set_ylabel('Vertical Distance (m)')
+    ax.legend()
+    ax.grid()
+
+    # Create the animation: 30 frames per simulated second, drawing only new path segments each frame
+    ani = TrailAnimation(fig, fps=30)
+    ani.add_track(line_df, point_df, t_drag_free, x_drag_free, y_drag_free)
+    ani.add_track(line_drag, point_drag, t_drag, x_drag, y_drag)
+
+    # Save the animation to a video file
+    if out:
+        ani.save(out, bitrate=1800, metadata={'artist': 'Devansh Srivastava'})
+
+    # Show the animation
+    if show:
+        ani.show()
+
+if __name__ == '__main__':
+    plot(out="Task_9.mp4")
@@ -0,0 +1,163 @@
+# Required libraries
+import numpy as np
+
+# Piecewise-linear terrain and obstacles for the bounce engines.
+# The ground is a polyline over increasing x, held flat beyond its ends; obstacles are any
+# further line segments (walls, ledges, ramps), which balls can hit from either side. Every
+# segment is indexed by the x-intervals between consecutive segment end points: locating a
+# position is one binary search, and each interval lists the few segments over it, so a
+# query only tests the segments near a ball instead of all of them. Queries are batched:
+# K swept steps (chords from p0 to p1) or K exact parabolic arcs are tested at once.
+
+EXTENT = 1e9    # Half-width of the flat ground added beyond the ends of the profile (m)
+NUDGE = 1e-9    # Distance a ball is lifted off a surface after an impact (m)
+
+# Function to build the indices start, start + 1, ..., start + count - 1 of every (start, count) pair, concatenated
+def ragged_arange(starts, counts):
+    return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(np.sum(counts))
+
+# Segments indexed by sorted x-intervals
+class Terrain:
+    def __init__(self, x, y, obstacles=None):
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        if len(x) < 2 or np.any(np.diff(x) <= 0):
+            raise ValueError("The ground needs at least two points with increasing x")
+        self.ground_x = np.concatenate([[x[0] - EXTENT], x, [x[-1] + EXTENT]])
+        self.ground_y = np.concatenate([[y[0]], y, [y[-1]]])
+        ground = np.stack([self.ground_x[:-1], self.ground_y[:-1], self.ground_x[1:], self.ground_y[1:]], axis=1)
+        obstacles = np.zeros((0, 4)) if obstacles is None else np.reshape(np.asarray(obstacles, dtype=float), (-1, 4))
+        self.segments = np.concatenate([ground, obstacles])  # (S, 4) rows of x1, y1, x2, y2
+        self.n_ground = len(ground)  # Ground segments come first
+        self.y_min = float(np.min(self.segments[:, [1, 3]]))
+
+        # Unit normals: up for the ground (left of the direction of increasing x), either side for obstacles
+        a, b = self.segments[:, :2], self.segments[:, 2:]
+        self.direction = b - a
+        length = np.hypot(self.direction[:, 0], self.direction[:, 1])
+        if np.any(length == 0):
+            raise ValueError("Obstacle segments need two distinct end points")
+        self.normals = np.stack([-self.direction[:, 1], self.direction[:, 0]], axis=1) / length[:, None]
+
+        # x-intervals between all end points; every segment is listed in each interval its
+        # x-range touches (end points included, so vertical walls sit in both neighbours)
+        x_low = np.minimum(self.segments[:, 0], self.segments[:, 2])
+        x_high = np.maximum(self.segments[:, 0], self.segments[:, 2])
+        self.edges = np.unique(np.concatenate([x_low, x_high]))
+        n_intervals = len(self.edges) - 1
+        first = np.clip(np.searchsorted(self.edges, x_low, side='left') - 1, 0, n_intervals - 1)
+        last = np.clip(np.searchsorted(self.edges, x_high, side='right') - 1, 0, n_intervals - 1)
+        counts = last - first + 1
+        interval = ragged_arange(first, counts)
+        segment = np.repeat(np.arange(len(self.segments)), counts)
+        order = np.argsort(interval, kind='stable')
+        self.members = segment[order]  # Segments of interval i: members[offsets[i]:offsets[i + 1]]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(interval, minlength=n_intervals))])
+
+    # Ground height at positions x (obstacles not included)
+    def height(self, x):
+        return np.interp(x, self.ground_x, self.ground_y)
+
+    # Function to find the interval holding every position (clamped to the indexed range)
+    def interval(self, x):
+        return np.clip(np.searchsorted(self.edges, x, side='right') - 1, 0, len(self.edges) - 2)
+
+    # Function to list the candidate segments of K queries spanning x-ranges [x_low, x_high]
+    # Returns (query, segment) pairs as two flat arrays; a segment may appear more than once.
+    def candidates(self, x_low, x_high):
+        first = self.interval(x_low)
+        n_intervals = self.interval(x_high) - first + 1
+        query = np.repeat(np.arange(len(first)), n_intervals)
+        interval = ragged_arange(first, n_intervals)
+        n_members = self.offsets[interval + 1] - self.offsets[interval]
+        return np.repeat(query, n_members), self.members[ragged_arange(self.offsets[interval], n_members)]
+
+    # Function to find where K straight steps from p0 to p1 ((K, 2) arrays) first cross a segment
+    # A step crosses a segment when its ends lie on opposite sides of the segment's line (the
+    # end may lie on it) and the crossing point lies on the segment. Returns 'hit' (K,), the
+    # fraction 's' of the step taken before the crossing, the crossing 'point', the 'segment'
+    # and the unit 'normal' there facing the side the step came from (NaN / -1 without a hit).
+    def cast(self, p0, p1):
+        p0, p1 = np.atleast_2d(p0).astype(float), np.atleast_2d(p1).astype(float)
+        query, segment = self.candidates(np.minimum(p0[:, 0], p1[:, 0]), np.maximum(p0[:, 0], p1[:, 0]))
+        n, a = self.normals[segment], self.segments[segment, :2]
+        side0 = np.sum(n * (p0[query] - a), axis=1)
+        side1 = np.sum(n * (p1[query] - a), axis=1)
+        crossing = ((side0 > 0) & (side1 <= 0)) | ((side0 < 0) & (side1 >= 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = np.where(crossing, side0 / (side0 - side1), np.inf)
+            point = p0[query] + s[:, None] * (p1[query] - p0[query])
+            along = np.sum((point - a) * self.direction[segment], axis=1) / np.sum(self.direction[segment] ** 2, axis=1)
+        s[~crossing | (along < 0) | (along > 1)] = np.inf
+        return self.earliest(len(p0), query, segment, s, side0, point)
+
+    # Function to find where K parabolic arcs p(t) = p0 + v t - g t ** 2 / 2 (vertical) first cross a segment
+    # p0 and v are (K, 2) arrays; only times up to t_max ((K,) array) are searched. The arcs are
+    # bounded in x up to the time they fall below the lowest segment, so only the segments under
+    # that x-range are tested. Returns the crossing time 't', the 'point', 'segment' and 'normal'.
+    def cast_parabola(self, p0, v, g, t_max=np.inf):
+        p0, v = np.atleast_2d(p0).astype(float), np.atleast_2d(v).astype(float)
+        drop = np.maximum(p0[:, 1] - self.y_min + 1, 0)  # Fall below the lowest segment
+        t_fall = np.minimum((v[:, 1] + np.sqrt(v[:, 1] ** 2 + 2 * g * drop)) / g, t_max)
+        x_end = p0[:, 0] + v[:, 0] * t_fall
+        query, segment = self.candidates(np.minimum(p0[:, 0], x_end), np.maximum(p0[:, 0], x_end))
+        n, a = self.normals[segment], self.segments[segment, :2]
+
+        # Signed distance from the segment's line: side0 + rate t - 0.5 g n_y t ** 2
+        side0 = np.sum(n * (p0[query] - a), axis=1)
+        rate = np.sum(n * v[query], axis=1)
+        curve = -0.5 * g * n[:, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            root = np.sqrt(rate ** 2 - 4 * curve * side0)
+            q = -0.5 * (rate + np.copysign(root, rate))  # Roots q / curve and side0 / q without cancellation
+            roots = np.stack([np.where(curve != 0, q / curve, np.inf), side0 / q])
+        roots[~(roots > 0) | (roots > t_fall[query])] = np.inf
+
+        # The earlier root that lies on the segment
+        t = np.where(np.isfinite(roots), roots, 0)[..., None]
+        point = p0[query] + t * v[query] - 0.5 * g * t ** 2 * np.array([0, 1])
+        along = np.sum((point - a) * self.direction[segment], axis=-1) / np.sum(self.direction[segment] ** 2, axis=1)
+        roots[(along < 0) | (along > 1)] = np.inf
+        first = np.argmin(roots, axis=0)
+        t = roots[first, np.arange(len(query))]
+        result = self.earliest(len(p0), query, segment, t, side0, point[first, np.arange(len(query))])
+        result['t'] = result.pop('s')
+        return result
+
+    # Function to reduce (query, segment) crossings at parameters s to the earliest crossing of every query
+    def earliest(self, K, query, segment, s, side0, point):
+        order = np.lexsort((s, query))
+        query, segment, s, side0, point = query[order], segment[order], s[order], side0[order], point[order]
+        first = np.flatnonzero(np.r_[True, query[1:] != query[:-1]])  # Earliest candidate of every query
+        first = first[np.isfinite(s[first])]
+        result = {
+            'hit': np.zeros(K, dtype=bool),
+            's': np.full(K, np.nan),
+            'point': np.full((K, 2), np.nan),
+            'segment': np.full(K, -1, dtype=np.int64),
+            'normal': np.full((K, 2), np.nan),
+        }
+        q = query[first]
+        result['hit'][q] = True
+        result['s'][q] = s[first]
+        result['point'][q] = point[first]
+        result['segment'][q] = segment[first]
+        result['normal'][q] = self.normals[segment[first]] * np.where(side0[first] < 0, -1.0, 1.0)[:, None]
+        return result
+
+# Function to bounce velocities v (K, 2) off surfaces with unit normals n (K, 2)
+# The velocity along the normal is reversed and scaled by the coefficient of restitution e;
+# the velocity along the surface is kept, as on flat ground.
+def reflect(v, n, e):
+    return v - (1 + np.reshape(e, (-1, 1))) * np.sum(v * n, axis=1, keepdims=True) * n
+
+# Function to build ground at y = 0 up to x = 0 that rises by slope (rise over run) from there to x_max
+def sloped_terrain(slope=0.0, x_max=1000.0, obstacles=None):
+    return Terrain([0.0, x_max], [0.0, slope * x_max], obstacles)
+
+# Function to draw the ground and obstacles of a terrain on matplotlib axes (between x_min and x_max)
+def draw_terrain(ax, terrain, x_min, x_max, **style):
+    x = np.concatenate([[x_min], terrain.ground_x[(terrain.ground_x > x_min) & (terrain.ground_x < x_max)], [x_max]])
+    lines = ax.plot(x, terrain.height(x), **style)
+    for x1, y1, x2, y2 in terrain.segments[terrain.n_ground:]:
+        lines += ax.plot([x1, x2], [y1, y2], **style)
+    return lines
@@ -0,0 +1,189 @@
+# Required libraries
+import json
+import os
+import shutil
+import numpy as np
+from Terrain import ragged_arange
+
+# On-disk columnar store for many trajectories.
+# File layout: 8 magic bytes, the header length as a little-endian uint64, a JSON header,
+# then one contiguous column per field, each starting on a 64-byte boundary. Parameter
+# columns hold one value per trajectory; the t, x, y, vx and vy columns hold every
+# trajectory back to back, and trajectory k spans offsets[k]:offsets[k + 1].
+
+MAGIC = b'BPHOTRJ1'
+ALIGNMENT = 64
+SAMPLE_COLUMNS = ('t', 'x', 'y', 'vx', 'vy')
+
+# Function to round a byte position up to the column alignment
+def aligned(position):
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+# Streaming writer: trajectories are appended in batches (or one at a time, chunk by chunk,
+# with extend and finish) and each column is spooled to its own part file, so memory use
+# does not grow with the size of the store. close() assembles the part files behind the
+# header into the final file.
+class TrajectoryWriter:
+    def __init__(self, path, params, float32=False):
+        self.path = path
+        self.params = tuple(params)
+        self.dtype = np.dtype(np.float32 if float32 else np.float64)
+        self.columns = self.params + ('offsets',) + SAMPLE_COLUMNS
+        self.parts = {name: open(f'{path}.{name}.part', 'wb') for name in self.columns}
+        self.n_trajectories = 0
+        self.n_samples = 0
+        self.streamed = 0  # Samples of the trajectory being streamed with extend()
+        np.zeros(1, dtype=np.int64).tofile(self.parts['offsets'])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    # Append a batch of K trajectories given in ragged form (offsets of length K + 1)
+    def append(self, offsets, params, t, x, y, vx=None, vy=None):
+        offsets = np.asarray(offsets, dtype=np.int64)
+        K = len(offsets) - 1
+        missing = set(self.params) - set(params)
+        if missing:
+            raise ValueError(f"Missing parameter columns: {sorted(missing)}")
+
+        # Samples offsets[0]:offsets[-1] of every column, checked before anything is written
+        n = offsets[-1] - offsets[0]
+        columns = {}
+        for name, column in zip(SAMPLE_COLUMNS, (t, x, y, vx, vy)):
+            if column is None:
+                columns[name] = np.full(n, np.nan, dtype=self.dtype)  # Engines that do not track a column store NaN
+            else:
+                columns[name] = np.asarray(column, dtype=self.dtype)[offsets[0]:offsets[-1]]
+            if len(columns[name]) != n:
+                raise ValueError(f"Column '{name}' has {len(columns[name])} samples in offsets[0]:offsets[-1], expected {n}")
+
+        for name in self.params:
+            np.broadcast_to(np.asarray(params[name], dtype=self.dtype), (K,)).tofile(self.parts[name])
+        (offsets[1:] - offsets[0] + self.n_samples).tofile(self.parts['offsets'])
+        for name, column in columns.items():
+            column.tofile(self.parts[name])
+        self.n_trajectories += K
+        self.n_samples += int(n)
+
+    # Append samples to a trajectory that is still being streamed; finish() ends it
+    def extend(self, t, x, y, vx=None, vy=None):
+        n = len(t)
+        for name, column in zip(SAMPLE_COLUMNS, (t, x, y, vx, vy)):
+            if column is None:
+                column = np.full(n, np.nan)
+            np.asarray(column, dtype=self.dtype).tofile(self.parts[name])
+        self.streamed += n
+
+    # End the streamed trajectory, giving its parameters
+    def finish(self, params):
+        missing = set(self.params) - set(params)
+        if missing:
+            raise ValueError(f"Missing parameter columns: {sorted(missing)}")
+        for name in self.params:
+            np.asarray([params[name]], dtype=self.dtype).tofile(self.parts[name])
+        self.n_samples += self.streamed
+        np.array([self.n_samples], dtype=np.int64).tofile(self.parts['offsets'])
+        self.n_trajectories += 1
+        self.streamed = 0
+
+    # Write the header and copy every part file into place
+    def close(self):
+        for part in self.parts.values():
+            part.close()
+        sizes = {name: os.path.getsize(f'{self.path}.{name}.part') for name in self.columns}
+
+        # The header size depends on the column positions, so grow it until it is stable
+        header_size = ALIGNMENT
+        while True:
+            position = header_size
+            layout = {}
+            for name in self.columns:
+                dtype = np.int64 if name == 'offsets' else self.dtype
+                layout[name] = {'offset': position, 'length': sizes[name] // np.dtype(dtype).itemsize, 'dtype': np.dtype(dtype).str}
+                position = aligned(position + sizes[name])
+            header = json.dumps({
+                'version': 1,
+                'n_trajectories': self.n_trajectories,
+                'n_samples': self.n_samples,
+                'params': list(self.params),
+                'columns': layout,
+            }).encode()
+            if aligned(len(MAGIC) + 8 + len(header)) <= header_size:
+                break
+            header_size = aligned(len(MAGIC) + 8 + len(header))
+
+        with open(self.path, 'wb') as out:
+            out.write(MAGIC)
+            out.write(np.uint64(len(header)).tobytes())
+            out.write(header)
+            for name in self.columns:
+                out.seek(layout[name]['offset'])
+                with open(f'{self.path}.{name}.part', 'rb') as part:
+                    shutil.copyfileobj(part, out, 1 << 22)
+            out.truncate(max(layout[name]['offset'] + sizes[name] for name in self.columns))
+        self.discard()
+
+    # Remove the part files (after closing, or when a write fails)
+    def discard(self):
+        for name, part in self.parts.items():
+            part.close()
+            if os.path.exists(f'{self.path}.{name}.part'):
+                os.remove(f'{self.path}.{name}.part')
+
+# Function to open a store with every column memory-mapped (slicing a column copies nothing)
+def open_store(path, mode='r'):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a trajectory store")
+        header_length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(header_length))
+    store = {'header': header, 'params': {}}
+    for name, column in header['columns'].items():
+        data = np.memmap(path, dtype=np.dtype(column['dtype']), mode=mode, offset=column['offset'], shape=(column['length'],)) if column['length'] else np.empty(0, dtype=np.dtype(column['dtype']))
+        if name in header['params']:
+            store['params'][name] = data
+        else:
+            store[name] = data
+    return store
+
+# Function to get one trajectory from an open store as views of the mapped columns
+def load_trajectory(store, k):
+    start, stop = store['offsets'][k], store['offsets'][k + 1]
+    trajectory = {name: store[name][start:stop] for name in SAMPLE_COLUMNS}
+    trajectory.update({name: values[k] for name, values in store['params'].items()})
+    return trajectory
+
+# Function to stream a batch from the Task_1 launch engine into a store
+# params must include 'theta', 'u', 'g' and 'h'; velocities follow from the launch conditions.
+def append_launch_batch(writer, x, y, t, offsets, params):
+    shot = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    theta_rad = np.deg2rad(np.broadcast_to(params['theta'], (len(offsets) - 1,)))
+    u = np.broadcast_to(params['u'], theta_rad.shape)
+    g = np.broadcast_to(params['g'], theta_rad.shape)
+    vx = (u * np.cos(theta_rad))[shot]
+    vy = (u * np.sin(theta_rad))[shot] - g[shot] * t
+    writer.append(offsets, params, t, x, y, vx, vy)
+
+# Function to stream the recorded history of simulate_drag_bounces (Task_9) into a store
+# Each ball keeps its samples up to the step that contains its final impact.
+def append_bounce_simulation(writer, sim, params, dt):
+    K = sim['x'].shape[1]
+    last = np.where(np.isnan(sim['t_impact'][:, -1]), len(sim['t']) - 1, np.ceil(sim['t_impact'][:, -1] / dt))
+    counts = np.minimum(last.astype(np.int64), len(sim['t']) - 1) + 1
+    offsets = np.zeros(K + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    rows = ragged_arange(np.zeros(K, dtype=np.int64), counts)  # Time index of every stored sample
+    ball = np.repeat(np.arange(K), counts)
+    writer.append(offsets, params, sim['t'][rows], sim['x'][rows, ball], sim['y'][rows, ball], sim['vx'][rows, ball], sim['vy'][rows, ball])
+
+# Function to stream a dense-output solution from Atmosphere_Extension.projectile_solution into a store
+def append_solution(writer, solution, params, dt=0.01):
+    t = np.append(np.arange(0, solution['t_end'], dt), solution['t_end'])
+    vx, vy, x, y = solution['sol'](t)
+    writer.append([0, len(t)], params, t, x, y, vx, vy)
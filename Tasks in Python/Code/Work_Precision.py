@@ -0,0 +1,162 @@
+# Required libraries
+import time
+import tracemalloc
+import numpy as np
+import Atmosphere_Extension as atmosphere
+import Task_1
+import Task_4
+import Task_8
+from Bounce_Engine import bounce_events, simulate_drag_bounces
+
+# Convergence and work-precision benchmarks of the time-stepping schemes in the project.
+# Every scheme is run over a range of step sizes or tolerances on a problem with a known
+# answer, recording wall time, right-hand side evaluations, peak memory and the error of
+# the landing point and of the energy. The vacuum shot is checked against the analytic
+# maximum range of Task 4 (the range formula of Task 2 at the optimal angle), the bouncing
+# ball against the closed-form bounces of Task 8, and the drag shot against a DOP853
+# solution at a tolerance of 1e-13.
+
+# Test problems
+u = 10.0       # Launch speed (m/s)
+h = 2.0        # Launch height (m)
+g = atmosphere.g  # Acceleration due to gravity (m/s^2), shared with the drag model
+theta_vacuum = np.degrees(Task_4.optimal_angle(u, h, g))  # Maximum-range angle of the vacuum shot (degrees)
+theta_drag = 45.0  # Launch angle of the drag shot (degrees)
+reference_accuracy = {'method': 'DOP853', 'rtol': 1e-13, 'atol': 1e-13}
+
+# Function to calculate the specific mechanical energy (J/kg)
+def energy(vx, vy, y):
+    return 0.5 * (vx ** 2 + vy ** 2) + g * y
+
+# Function to calculate the exact landing point and energy of each test problem
+def reference(problem):
+    if problem == 'vacuum':
+        return Task_4.range_maximum(u, h, g), energy(u, 0, h)
+    if problem == 'bounce':
+        events = bounce_events(Task_8.x0, Task_8.y0, Task_8.vx0, Task_8.vy0, g, Task_8.e, Task_8.N_bounces)
+        vy_out = Task_8.e ** Task_8.N_bounces * np.sqrt(Task_8.vy0 ** 2 + 2 * g * Task_8.y0)  # Rebound speed after the last impact
+        return events['x_hit'][-1], energy(Task_8.vx0, vy_out, 0)
+    solution = atmosphere.projectile_solution(u, theta_drag, h, accuracy=reference_accuracy)
+    return solution['R'], np.nan  # Drag dissipates energy, so there is no conserved value to check
+
+# Function to run Task 1's explicit Euler on the vacuum shot (one evaluation per step)
+def run_euler(dt):
+    theta_rad = np.radians(theta_vacuum)
+    x, y, t, offsets = Task_1.projectile_motion_batch(theta_vacuum, u, g, h, dt)
+    n_last, frac = Task_1.euler_landing(u * np.sin(theta_rad), g, h, dt)
+    vy = u * np.sin(theta_rad) - g * (n_last + 1) * dt  # Vertical velocity over the step that lands
+    return x[-1], energy(u * np.cos(theta_rad), vy, 0), int(n_last) + 1
+
+# Function to run Task 1's adaptive Dormand-Prince stepper on the vacuum shot
+def run_adaptive(tol):
+    x, y, t, stats = Task_1.projectile_motion_adaptive(theta_vacuum, u, g, h, tol)
+    return x[-1], np.nan, stats['nfev']  # The stepper does not return velocities
+
+# Function to run the RK4 bouncing-ball engine of Task 9 without drag, so Task 8 gives the answer
+def run_rk4_bounces(dt):
+    sim = simulate_drag_bounces(Task_8.x0, Task_8.y0, Task_8.vx0, Task_8.vy0, g, Task_8.e, 0.0, Task_8.N_bounces, dt, record=False)
+    steps = int(np.ceil(sim['t_impact'][0, -1] / dt))
+    vx, vy = sim['state'][0, 2], sim['state'][0, 3]
+    return sim['x_impact'][0, -1], energy(vx, vy, 0), 4 * (steps + Task_8.N_bounces)  # Impacts cost one extra partial step
+
+# Function to run scipy's solve_ivp on the drag shot with one of its methods
+def run_solve_ivp(method):
+    def run(tol):
+        solution = atmosphere.projectile_solution(u, theta_drag, h, accuracy={'method': method, 'rtol': tol, 'atol': tol})
+        return solution['R'], np.nan, solution['nfev']
+    return run
+
+# Function to run the batched Dormand-Prince stepper of the atmosphere model on the drag shot
+def run_batch(tol):
+    result = atmosphere.solve_projectile_batch(u, theta_drag, h, accuracy={'rtol': tol, 'atol': tol})
+    return result['R'][0], np.nan, 6 * int(result['steps'][0]) + 1  # Rejected steps are not counted
+
+# Scheme name -> (runner, test problem, name of the resolution parameter, resolutions)
+SCHEMES = {
+    'Euler (Task 1)': (run_euler, 'vacuum', 'dt', np.logspace(-1, -5, 9)),
+    'DP5(4) adaptive (Task 1)': (run_adaptive, 'vacuum', 'tol', np.logspace(-2, -12, 6)),
+    'RK4 bounces (Task 9)': (run_rk4_bounces, 'bounce', 'dt', np.logspace(-1, -4, 7)),
+    'RK45 solve_ivp (atmosphere)': (run_solve_ivp('RK45'), 'drag', 'tol', np.logspace(-3, -11, 9)),
+    'DOP853 solve_ivp (atmosphere)': (run_solve_ivp('DOP853'), 'drag', 'tol', np.logspace(-3, -11, 9)),
+    'DP5(4) batched (atmosphere)': (run_batch, 'drag', 'tol', np.logspace(-3, -11, 9)),
+}
+
+# Function to run every scheme over its resolutions and measure cost and error
+# Wall time is the best of repeat runs; peak memory comes from one extra run under tracemalloc.
+# Returns one dict per (scheme, resolution).
+def run_benchmarks(schemes=None, repeat=3):
+    schemes = schemes or list(SCHEMES)
+    truths = {}
+    rows = []
+    for name in schemes:
+        runner, problem, parameter, resolutions = SCHEMES[name]
+        if problem not in truths:
+            truths[problem] = reference(problem)
+        x_true, E_true = truths[problem]
+
+        for resolution in resolutions:
+            tracemalloc.start()
+            runner(resolution)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            wall = np.inf
+            for _ in range(repeat):
+                start = time.perf_counter()
+                x_land, E, nfev = runner(resolution)
+                wall = min(wall, time.perf_counter() - start)
+
+            rows.append({
+                'scheme': name,
+                'problem': problem,
+                'parameter': parameter,
+                'resolution': resolution,
+                'wall_time': wall,  # Seconds
+                'nfev': nfev,  # Right-hand side evaluations
+                'peak_memory': peak,  # Bytes
+                'landing_error': abs(x_land - x_true),  # Metres
+                'energy_error': abs(E - E_true) / E_true,  # Relative
+            })
+    return rows
+
+# Function to format the benchmark results as a plain-text work-precision table
+def format_table(rows):
+    lines = [f"{'scheme':<30} {'problem':<7} {'resolution':>14} {'time / s':>10} {'nfev':>10} {'memory / kB':>12} {'landing err / m':>16} {'energy err':>11}"]
+    for r in rows:
+        lines.append(
+            f"{r['scheme']:<30} {r['problem']:<7} {r['parameter'] + '=' + format(r['resolution'], '.0e'):>14} "
+            f"{r['wall_time']:>10.2e} {r['nfev']:>10d} {r['peak_memory'] / 1024:>12.1f} "
+            f"{r['landing_error']:>16.2e} {r['energy_error']:>11.2e}"
+        )
+    return '\n'.join(lines)
+
+# Function to plot landing error against wall time and against right-hand side evaluations
+def plot_work_precision(rows, out=None, show=True):
+    import matplotlib.pyplot as plt
+    fig, (ax_time, ax_nfev) = plt.subplots(1, 2, figsize=(14, 6))
+    floor = 1e-16  # Exact answers are drawn on the floor of the log scale
+
+    for name in dict.fromkeys(r['scheme'] for r in rows):
+        scheme_rows = [r for r in rows if r['scheme'] == name]
+        error = np.maximum([r['landing_error'] for r in scheme_rows], floor)
+        ax_time.loglog([r['wall_time'] for r in scheme_rows], error, 'o-', label=name)
+        ax_nfev.loglog([r['nfev'] for r in scheme_rows], error, 'o-', label=name)
+
+    ax_time.set_xlabel('Wall time (s)')
+    ax_nfev.set_xlabel('Right-hand side evaluations')
+    for ax in (ax_time, ax_nfev):
+        ax.set_ylabel('Landing-point error (m)')
+        ax.grid(True, which='both', alpha=0.3)
+    ax_time.legend()
+    fig.suptitle('Work-precision diagram')
+
+    # Save and/or show the plot
+    if out:
+        fig.savefig(out)
+    if show:
+        plt.show()
+
+if __name__ == '__main__':
+    rows = run_benchmarks()
+    print(format_table(rows))
+    plot_work_precision(rows, out="Work_Precision.png")
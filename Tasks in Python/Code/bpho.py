@@ -0,0 +1,90 @@
+# Command-line interface for the BPhO tasks, e.g.
+#     bpho run task6 --u 10 --theta 60 --out task6.png
+#     bpho run task2 --u 50 --theta 45 --no-plot
+# Only the chosen task module is imported, and matplotlib (and scipy, for the
+# atmosphere model) are only imported when a plot is drawn or an ODE is solved.
+
+# Required libraries
+import argparse
+import importlib
+import inspect
+import sys
+
+# Task name -> (module, plotting function)
+TASKS = {
+    'task1': ('Task_1', 'plot'),
+    'task2': ('Task_2', 'plot'),
+    'task3': ('Task_3', 'plot'),
+    'task4': ('Task_4', 'plot'),
+    'task5': ('Task_5', 'plot'),
+    'task6': ('Task_6', 'plot'),
+    'task7': ('Task_7', 'plot'),
+    'task8': ('Task_8', 'plot'),
+    'task9': ('Task_9', 'plot'),
+    'atmosphere': ('Atmosphere_Extension', 'plot_trajectories'),
+}
+
+# Parameters that take objects rather than numbers, so cannot be set from the command line
+OBJECT_PARAMETERS = {'terrain'}
+
+# Function to turn '--name value' pairs into keyword arguments (ints stay ints)
+def parse_parameters(extra, allowed, parser):
+    params = {}
+    i = 0
+    while i < len(extra):
+        token = extra[i]
+        if not token.startswith('--'):
+            parser.error(f"unexpected argument '{token}'")
+        if '=' in token:
+            name, value = token[2:].split('=', 1)
+            i += 1
+        elif i + 1 < len(extra):
+            name, value = token[2:], extra[i + 1]
+            i += 2
+        else:
+            parser.error(f"missing value for '{token}'")
+        if name not in allowed:
+            parser.error(f"unknown parameter '{name}' (choose from {', '.join(allowed)})")
+        try:
+            params[name] = int(value)
+        except ValueError:
+            try:
+                params[name] = float(value)
+            except ValueError:
+                parser.error(f"parameter '{name}' needs a number, got '{value}'")
+    return params
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bpho', description='Run the BPhO Computational Challenge tasks.', allow_abbrev=False)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='print a task\'s results and draw its plot or animation',
+                              epilog='Any other --name value pair sets a parameter of the task.', allow_abbrev=False)
+    run.add_argument('task', choices=sorted(TASKS))
+    run.add_argument('--out', help='save the plot or video to this file instead of showing it')
+    run.add_argument('--no-plot', action='store_true', help='only print the numbers')
+    args, extra = parser.parse_known_args(argv)
+
+    module_name, plot_name = TASKS[args.task]
+    module = importlib.import_module(module_name)
+    # Only numeric parameters (or optional ones, like a tolerance) can be set from the command line
+    allowed = [name for name, p in inspect.signature(module.summary).parameters.items()
+               if name not in OBJECT_PARAMETERS and (p.default is None or isinstance(p.default, (int, float)))]
+    params = parse_parameters(extra, allowed, run)
+
+    # Print the task's numbers
+    try:
+        results = module.summary(**params)
+    except ValueError as error:
+        sys.exit(f"bpho: {error}")
+    for name, value in results.items():
+        print(f"{name} = {value}")
+
+    # Draw the plot only when asked for, with a non-interactive backend when writing to a file
+    if not args.no_plot:
+        if args.out:
+            import matplotlib
+            matplotlib.use('Agg')
+        getattr(module, plot_name)(**params, out=args.out, show=args.out is None)
+
+if __name__ == '__main__':
+    main()